@@ -1,13 +1,204 @@
 import os
+import json
+import filecmp
+import gzip
+import hashlib
 import shutil
 import subprocess
 import sys
+import threading
+import time
+import uuid
+from collections import OrderedDict, deque
+from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
 from pathlib import Path
 from dotenv import load_dotenv
 from flask import Flask, request, jsonify
 
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
 app = Flask(__name__)
 
+# Files copied into the Hugo content directory by the last sync, relative to it
+SYNC_MANIFEST = '.wordpress-sync.json'
+
+# Export manifest kept in the Hugo content directory by the export pipeline
+EXPORT_MANIFEST = '.export-manifest.json'
+
+# Exported changes not deployed yet (the build or sync of their publish failed), under HUGO_ROOT
+PENDING_CHANGES = '.pending-changes.json'
+
+# Config items that may be left unset
+OPTIONAL_CONFIG = {'flask_port', 'wp_root', 'incremental_deploy', 'hugo_cache_dir', 'keep_releases',
+                   'nginx_targets', 'sync_workers', 'sync_quorum', 'precompress', 'search_index',
+                   'type_config', 'front_matter', 'content_layout', 'artifact_cache'}
+
+# Incremental deploys: versioned build directories, the active-release symlink,
+# the file hashes of each release (next to its directory) and, per sync target,
+# the manifest of what was last synced, all under HUGO_ROOT
+RELEASES_DIR = 'releases'
+CURRENT_RELEASE_LINK = 'current'
+RELEASE_MANIFEST = '{}.files.json'
+DEPLOYED_MANIFEST = 'deployed-{}.json'
+
+# Build artifact cache: the index of release directories by the hash of their
+# build inputs and the per-file hash cache used to compute it, under HUGO_ROOT/releases
+ARTIFACT_INDEX = 'artifacts.json'
+TREE_HASH_CACHE = 'tree-hashes.json'
+
+# Site inputs hashed besides the content directory: directories and files in HUGO_ROOT
+SITE_INPUT_DIRS = ('config', 'layouts', 'themes', 'static', 'data', 'assets', 'i18n')
+SITE_INPUT_FILES = ('hugo.toml', 'hugo.yaml', 'hugo.yml', 'hugo.json',
+                    'config.toml', 'config.yaml', 'config.yml', 'config.json', 'go.mod', 'go.sum')
+
+# Number of activated releases remembered for rollbacks
+ACTIVATION_HISTORY = 20
+
+# Pre-compression: file types worth compressing, the smallest file compressed
+# (matching nginx's gzip_min_length) and the cache of compressed output by content hash
+COMPRESSIBLE_EXTENSIONS = {'.html', '.htm', '.css', '.js', '.mjs', '.json', '.xml', '.svg',
+                           '.txt', '.map', '.webmanifest', '.rss', '.atom', '.ico'}
+PRECOMPRESS_MIN_SIZE = 256
+PRECOMPRESS_CACHE = '.precompress-cache'
+
+# Longest per-target sync output kept in the sync phase output
+TARGET_OUTPUT_LIMIT = 4000
+
+# Number of finished jobs kept for /jobs/<id>
+JOB_HISTORY = 50
+
+# Longest phase output kept on a job (the tail is kept)
+JOB_OUTPUT_LIMIT = 20000
+
+class DeployJob:
+    """A publish request and the progress of each deployment phase"""
+    
+    def __init__(self):
+        self.id = uuid.uuid4().hex
+        self.status = 'queued'
+        self.message = None
+        self.requests = 1
+        self.force = False
+        self.kind = 'publish'
+        self.release = None
+        self.changes = None
+        self.created = time.time()
+        self.started = None
+        self.finished = None
+        self.phases = []
+        self.done = threading.Event()
+    
+    @contextmanager
+    def phase(self, name):
+        """Record the timing, status and output of one deployment phase"""
+        phase = {'name': name, 'status': 'running', 'started': time.time(),
+                 'finished': None, 'seconds': None, 'output': ''}
+        self.phases.append(phase)
+        try:
+            yield phase
+        except BaseException:
+            phase['status'] = 'failed'
+            raise
+        else:
+            if phase['status'] == 'running':
+                phase['status'] = 'succeeded'
+        finally:
+            phase['finished'] = time.time()
+            phase['seconds'] = round(phase['finished'] - phase['started'], 3)
+            phase['output'] = (phase['output'] or '')[-JOB_OUTPUT_LIMIT:]
+    
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'status': self.status,
+            'message': self.message,
+            'requests': self.requests,
+            'created': self.created,
+            'started': self.started,
+            'finished': self.finished,
+            'seconds': round(self.finished - self.started, 3) if self.finished and self.started else None,
+            'force': self.force,
+            'kind': self.kind,
+            'release': self.release,
+            'changes': {kind: len(paths) for kind, paths in self.changes.items()} if self.changes else None,
+            'phases': [dict(phase) for phase in self.phases],
+        }
+
+class DeployQueue:
+    """Single-flight background deployment worker
+    
+    Only one deployment runs at a time, so concurrent publishes never race on
+    the Hugo public/ directory. Publish requests that arrive while a job is
+    still queued join that job instead of queueing another build, so a burst
+    of publishes results in at most one build after the one in progress.
+    Rollbacks are queued in order and never coalesced, and a publish only joins
+    a queued publish that would not run before a rollback requested earlier.
+    """
+    
+    def __init__(self, deploy=None):
+        self.deploy = deploy or deploy_site
+        self.jobs = OrderedDict()
+        self._pending = deque()
+        self._condition = threading.Condition()
+        self._worker = None
+    
+    def submit(self, force=False, rollback=None):
+        """Queue a deployment, or a rollback to release rollback ('' for the previous one); returns (job, coalesced)"""
+        with self._condition:
+            self._ensure_worker()
+            last = self._pending[-1] if self._pending else None
+            if rollback is None and last is not None and last.kind == 'publish':
+                last.requests += 1
+                last.force = last.force or force
+                return last, True
+            job = DeployJob()
+            job.force = force
+            if rollback is not None:
+                job.kind = 'rollback'
+                job.release = rollback or None
+            self._pending.append(job)
+            self.jobs[job.id] = job
+            self._trim()
+            self._condition.notify()
+            return job, False
+    
+    def get(self, job_id):
+        with self._condition:
+            return self.jobs.get(job_id)
+    
+    def _ensure_worker(self):
+        if self._worker is None or not self._worker.is_alive():
+            self._worker = threading.Thread(target=self._run, name='deploy-worker', daemon=True)
+            self._worker.start()
+    
+    def _trim(self):
+        finished = [job_id for job_id, job in self.jobs.items() if job.done.is_set()]
+        for job_id in finished[:max(0, len(self.jobs) - JOB_HISTORY)]:
+            del self.jobs[job_id]
+    
+    def _run(self):
+        while True:
+            with self._condition:
+                while not self._pending:
+                    self._condition.wait()
+                job = self._pending.popleft()
+            
+            job.status = 'running'
+            job.started = time.time()
+            try:
+                success, message = self.deploy(job)
+            except Exception as e:
+                success, message = False, f"Error during deployment: {str(e)}"
+            job.status = 'succeeded' if success else 'failed'
+            job.message = message
+            job.finished = time.time()
+            job.done.set()
+
 def load_config():
     """Load environment configuration"""
     load_dotenv()
@@ -17,52 +208,215 @@ def load_config():
         'hugo_root': os.getenv('HUGO_ROOT'),
         'nginx_public': os.getenv('NGINX_PUBLIC'),
         'password': os.getenv('PUBLISH_PASSWORD'),
-        'flask_port': os.getenv('FLASK_PORT', 5000)
+        'flask_port': os.getenv('FLASK_PORT', 5000),
+        # WordPress root; when set, content is exported straight into HUGO_CONTENT_PATH
+        'wp_root': os.getenv('WP_ROOT'),
+        # Let the export pipeline write the search index and taxonomy maps next to the content
+        'search_index': os.getenv('SEARCH_INDEX', '').lower() in ('1', 'true', 'yes'),
+        # Exporter content type config (custom post types, taxonomies and meta fields)
+        'type_config': os.getenv('WP_TYPE_CONFIG'),
+        # Front matter format written by the export pipeline: yaml, toml or json
+        'front_matter': os.getenv('FRONT_MATTER', 'yaml').lower(),
+        # Content directory layout written by the export pipeline: flat, date or hash
+        'content_layout': os.getenv('CONTENT_LAYOUT', 'flat').lower(),
+        # Build into versioned directories and sync only changed files
+        'incremental_deploy': os.getenv('INCREMENTAL_DEPLOY', '').lower() in ('1', 'true', 'yes'),
+        'hugo_cache_dir': os.getenv('HUGO_CACHE_DIR'),
+        'keep_releases': int(os.getenv('KEEP_RELEASES', 3)),
+        # Skip the Hugo build when a kept release was built from identical inputs
+        'artifact_cache': os.getenv('ARTIFACT_CACHE', '').lower() in ('1', 'true', 'yes'),
+        # Comma-separated sync targets: Nginx hosts, rsync destinations (user@host:/path) or local directories
+        'nginx_targets': [target.strip() for target in os.getenv('NGINX_TARGETS', '').split(',') if target.strip()],
+        'sync_workers': int(os.getenv('SYNC_WORKERS', 4)),
+        # Number of targets that must sync successfully (default: all)
+        'sync_quorum': int(os.getenv('SYNC_QUORUM', 0)) or None,
+        # Write .gz (and .br when brotli is installed) siblings after the build
+        'precompress': os.getenv('PRECOMPRESS', '').lower() in ('1', 'true', 'yes')
     }
+    if not config['nginx_targets'] and config['nginx_public']:
+        config['nginx_targets'] = [config['nginx_public']]
     
     # Validate configuration
+    optional = OPTIONAL_CONFIG | ({'wordpress_content'} if config['wp_root'] else set())
+    if config['nginx_targets']:
+        optional.add('nginx_public')
     for key, value in config.items():
-        if key != 'flask_port' and not value:
+        if key not in optional and not value:
             raise ValueError(f"Config item {key.upper()} is not set")
+    if config['front_matter'] not in ('yaml', 'toml', 'json'):
+        raise ValueError(f"FRONT_MATTER must be yaml, toml or json, not {config['front_matter']}")
+    if config['content_layout'] not in ('flat', 'date', 'hash'):
+        raise ValueError(f"CONTENT_LAYOUT must be flat, date or hash, not {config['content_layout']}")
     
     # Validate directories
-    if not Path(config['wordpress_content']).exists():
+    if config['wp_root']:
+        if not Path(config['wp_root']).exists():
+            raise FileNotFoundError(f"WordPress root directory does not exist: {config['wp_root']}")
+    elif not Path(config['wordpress_content']).exists():
         raise FileNotFoundError(f"WordPress content directory does not exist: {config['wordpress_content']}")
     if not Path(config['hugo_root']).exists():
         raise FileNotFoundError(f"Hugo root directory does not exist: {config['hugo_root']}")
     
     return config
 
+def iter_content_files(src_path):
+    """Yield Markdown files and the resources of page bundles (directories with an index.md)"""
+    for md_file in src_path.glob('**/*.md'):
+        yield md_file
+        if md_file.name == 'index.md':
+            for resource in md_file.parent.iterdir():
+                if resource.is_file() and resource.suffix != '.md':
+                    yield resource
+
+def files_identical(src, dest):
+    """Compare size first, then content, so unchanged files are not rewritten"""
+    try:
+        if src.stat().st_size != dest.stat().st_size:
+            return False
+    except FileNotFoundError:
+        return False
+    return filecmp.cmp(src, dest, shallow=False)
+
+def copy_file_atomic(src, dest):
+    """Copy a file through a temporary file in the target directory and rename it into place"""
+    tmp_file = dest.with_name(f".{dest.name}.{os.getpid()}.tmp")
+    try:
+        shutil.copy2(src, tmp_file)
+        os.replace(tmp_file, dest)
+    except BaseException:
+        tmp_file.unlink(missing_ok=True)
+        raise
+
 def copy_markdown_files(src, dest):
-    """Copy Markdown files from WordPress to Hugo"""
+    """Copy Markdown files (and page bundle resources) from WordPress to Hugo
+    
+    Files whose content already matches the target are skipped and writes are
+    atomic, so an unchanged export leaves every mtime in the Hugo tree alone.
+    Files copied by a previous sync that no longer exist in the source are deleted.
+    Returns a dict with the written, skipped and deleted counts.
+    """
     src_path = Path(src)
     dest_path = Path(dest)
     
     # Ensure destination directory exists
     dest_path.mkdir(parents=True, exist_ok=True)
     
-    copied = 0
-    for md_file in src_path.glob('**/*.md'):
+    manifest_file = dest_path / SYNC_MANIFEST
+    try:
+        previous = set(json.loads(manifest_file.read_text(encoding='utf-8')))
+    except (OSError, ValueError):
+        previous = set()
+    
+    stats = {'written': 0, 'skipped': 0, 'deleted': 0}
+    current = set()
+    for md_file in iter_content_files(src_path):
         relative_path = md_file.relative_to(src_path)
         target_file = dest_path / relative_path
+        current.add(relative_path.as_posix())
+        
+        if files_identical(md_file, target_file):
+            stats['skipped'] += 1
+            continue
         
         # Ensure directory for target file exists
         target_file.parent.mkdir(parents=True, exist_ok=True)
         
         # Copy file
-        shutil.copy2(md_file, target_file)
+        copy_file_atomic(md_file, target_file)
         print(f"Copied: {md_file} -> {target_file}")
-        copied += 1
+        stats['written'] += 1
+    
+    # Remove files this sync created earlier whose source is gone
+    for relative_path in sorted(previous - current):
+        target_file = dest_path / relative_path
+        if target_file.is_file():
+            target_file.unlink()
+            print(f"Deleted: {target_file}")
+            stats['deleted'] += 1
+            # Drop the directory of a removed page bundle once it is empty
+            if target_file.parent != dest_path and not any(target_file.parent.iterdir()):
+                target_file.parent.rmdir()
+    
+    if current != previous:
+        manifest_file.write_text(json.dumps(sorted(current), indent=1), encoding='utf-8')
+    
+    print(f"Content sync: {stats['written']} written, {stats['skipped']} unchanged, {stats['deleted']} deleted")
+    return stats
+
+def export_to_hugo(wp_root, hugo_content, search_index=False, type_config=None, front_matter='yaml',
+                   layout='flat'):
+    """Export WordPress straight into the Hugo content directory
+    
+    Runs the exporter incrementally with its manifest kept next to the content,
+    and returns its change set (paths relative to the parent of hugo_content,
+    e.g. content/posts/a.md or static/search/index.json), or None when the
+    export failed. With search_index the exporter also maintains the search
+    index under static/search and the taxonomy maps under data/taxonomies.
+    type_config is the path of the exporter's content type config file, and
+    front_matter the front matter format (yaml, toml or json), and layout the
+    content directory layout (flat, date or hash); the non-flat layouts write a
+    url into each post's front matter so public URLs do not change.
+    """
+    from wp_to_hugo_exporter import WpToHugoExporter, load_type_config
     
-    print(f"Copied {copied} Markdown files in total")
-    return copied
+    exporter = WpToHugoExporter(wp_root)
+    if type_config:
+        exporter.type_config = load_type_config(type_config)
+    exporter.content_dir = hugo_content
+    exporter.manifest_file = os.path.join(hugo_content, EXPORT_MANIFEST)
+    exporter.incremental = True
+    exporter.output_mode = 'quiet'
+    exporter.search_index = search_index
+    exporter.front_matter = front_matter
+    exporter.layout = layout
+    if not exporter.read_wp_config() or not exporter.connect_db():
+        return None
+    try:
+        if not exporter.export_content('any'):
+            return None
+    finally:
+        exporter.close_db()
+    return exporter.changes
+
+def load_pending_changes(hugo_root):
+    """Return the exported changes that have not been deployed yet, as {kind: [paths]}"""
+    try:
+        return json.loads((Path(hugo_root) / PENDING_CHANGES).read_text(encoding='utf-8'))
+    except (OSError, ValueError):
+        return {}
+
+def merge_changes(pending, changes):
+    """Combine the undeployed changes with a newer export's, e.g. added then deleted cancels out"""
+    from wp_to_hugo_exporter import ChangeSet
+    
+    merged = ChangeSet()
+    for change_set in (pending, changes):
+        for kind in ('added', 'modified', 'deleted'):
+            for path in change_set.get(kind, ()):
+                merged.record(path, kind)
+    return merged.to_dict()
+
+def save_pending_changes(hugo_root, changes):
+    """Remember changes until a deployment succeeds; an empty change set removes the file"""
+    pending_file = Path(hugo_root) / PENDING_CHANGES
+    if any(changes.values()):
+        tmp_file = pending_file.with_suffix('.tmp')
+        tmp_file.write_text(json.dumps(changes), encoding='utf-8')
+        os.replace(tmp_file, pending_file)
+    elif pending_file.exists():
+        pending_file.unlink()
 
-def build_hugo_site(hugo_root):
-    """Build Hugo site"""
+def build_hugo_site(hugo_root, destination=None, cache_dir=None):
+    """Build Hugo site, optionally into another directory and with a persistent cache directory"""
     print("Starting Hugo site build...")
+    hugo_cmd = ['hugo', '--minify']
+    if destination:
+        hugo_cmd += ['--destination', destination]
+    if cache_dir:
+        hugo_cmd += ['--cacheDir', cache_dir]
     try:
         result = subprocess.run(
-            ['hugo', '--minify'],
+            hugo_cmd,
             cwd=hugo_root,
             capture_output=True,
             text=True,
@@ -75,14 +429,535 @@ def build_hugo_site(hugo_root):
         print(f"Hugo build failed: {e.stderr}")
         return False, e.stderr
 
+def compress_to_cache(src, cache_base, encodings):
+    """Compress one file into the cache as cache_base.gz / cache_base.br (runs in a worker thread)"""
+    with open(src, 'rb') as f:
+        data = f.read()
+    for encoding in encodings:
+        if encoding == 'gz':
+            # mtime=0 keeps the output identical for identical input
+            compressed = gzip.compress(data, compresslevel=9, mtime=0)
+        else:
+            compressed = brotli.compress(data, quality=11)
+        tmp_file = f"{cache_base}.{encoding}.{os.getpid()}.tmp"
+        with open(tmp_file, 'wb') as f:
+            f.write(compressed)
+        os.replace(tmp_file, f"{cache_base}.{encoding}")
+
+def link_or_copy(src, dest):
+    """Hard-link src to dest (copy across file systems); leaves dest alone if it already is src"""
+    if dest.exists():
+        if os.path.samefile(src, dest):
+            return
+        dest.unlink()
+    try:
+        os.link(src, dest)
+    except OSError:
+        shutil.copy2(src, dest)
+
+def precompress_site(public_dir, cache_dir):
+    """Write .gz (and .br) siblings for compressible files, for nginx gzip_static/brotli_static
+    
+    Compressed output is cached by content hash, so only files whose content
+    changed since the last build are compressed again; the rest are linked from
+    the cache. Siblings whose source file is gone are removed, and cache entries
+    not used by this build are pruned. Compression runs on a thread pool rather
+    than a process pool: zlib and brotli release the GIL while compressing, and
+    forking from the deploy worker thread of the threaded Flask server could
+    deadlock the children on locks held by other threads.
+    """
+    public_dir = Path(public_dir)
+    cache_dir = Path(cache_dir)
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    encodings = ('gz', 'br') if brotli else ('gz',)
+    suffixes = tuple(f".{encoding}" for encoding in encodings)
+    
+    stats = {'files': 0, 'compressed': 0, 'reused': 0, 'removed': 0}
+    sources = []
+    for path in public_dir.rglob('*'):
+        if not path.is_file():
+            continue
+        if path.suffix in suffixes and path.with_suffix('').suffix.lower() in COMPRESSIBLE_EXTENSIONS:
+            if not path.with_suffix('').exists():
+                path.unlink()
+                stats['removed'] += 1
+            continue
+        if path.suffix.lower() in COMPRESSIBLE_EXTENSIONS and path.stat().st_size >= PRECOMPRESS_MIN_SIZE:
+            sources.append(path)
+    
+    with ThreadPoolExecutor(max_workers=os.cpu_count() or 4) as pool:
+        digests = list(pool.map(hash_file, sources))
+    
+    # One compression per distinct content hash that is not cached yet
+    todo = {}
+    for source, digest in zip(sources, digests):
+        if digest not in todo and not all((cache_dir / f"{digest}.{encoding}").exists()
+                                          for encoding in encodings):
+            todo[digest] = source
+    if todo:
+        with ThreadPoolExecutor(max_workers=os.cpu_count() or 4) as pool:
+            list(pool.map(compress_to_cache, [str(source) for source in todo.values()],
+                          [str(cache_dir / digest) for digest in todo], [encodings] * len(todo)))
+    
+    used = set()
+    for source, digest in zip(sources, digests):
+        for encoding in encodings:
+            cached = cache_dir / f"{digest}.{encoding}"
+            used.add(cached.name)
+            link_or_copy(cached, source.with_name(f"{source.name}.{encoding}"))
+        stats['files'] += 1
+    stats['compressed'] = len(todo)
+    stats['reused'] = sum(1 for digest in digests if digest not in todo)
+    
+    for cached in cache_dir.iterdir():
+        if cached.name not in used:
+            cached.unlink()
+    
+    print(f"Pre-compressed {stats['files']} files: {stats['compressed']} compressed, "
+          f"{stats['reused']} reused, {stats['removed']} stale siblings removed")
+    return stats
+
+def precompress_phase(job, config, public_dir):
+    """Run the optional pre-compression stage as a job phase"""
+    if not config['precompress']:
+        return
+    with job.phase('compress') as phase:
+        stats = precompress_site(public_dir, Path(config['hugo_root']) / PRECOMPRESS_CACHE)
+        phase['output'] = json.dumps(stats)
+
+def nginx_target(target):
+    """rsync destination for a sync target
+    
+    A bare host name means the Nginx web root on that host; rsync destinations
+    (user@host:/path) and local directories are used as given.
+    """
+    if target.startswith(('/', '.', '~')):
+        local_dir = Path(target).expanduser()
+        local_dir.mkdir(parents=True, exist_ok=True)
+        return f"{local_dir}/"
+    if ':' in target:
+        return target if target.endswith('/') else f"{target}/"
+    return f"root@{target}:/var/www/html/"
+
+def sync_fan_out(targets, sync_one, workers=4, quorum=None):
+    """Run sync_one(target) for every target concurrently on a bounded pool
+    
+    Returns (quorum reached, per-target results with status, timing and output).
+    quorum defaults to all targets.
+    """
+    def run(target):
+        started = time.time()
+        try:
+            success, output = sync_one(target)
+        except Exception as e:
+            success, output = False, str(e)
+        return {
+            'target': target,
+            'status': 'succeeded' if success else 'failed',
+            'seconds': round(time.time() - started, 3),
+            'output': (output or '')[-TARGET_OUTPUT_LIMIT:]
+        }
+    
+    with ThreadPoolExecutor(max_workers=max(1, min(workers, len(targets)))) as pool:
+        results = list(pool.map(run, targets))
+    
+    quorum = min(max(1, quorum or len(targets)), len(targets))
+    succeeded = sum(1 for result in results if result['status'] == 'succeeded')
+    print(f"Synced {succeeded}/{len(targets)} targets (quorum {quorum})")
+    return succeeded >= quorum, results
+
+def sync_phase(job, config, sync_one):
+    """Fan a sync out over all configured targets inside a job phase; returns (success, message)"""
+    with job.phase('sync') as phase:
+        success, results = sync_fan_out(config['nginx_targets'], sync_one,
+                                        config['sync_workers'], config['sync_quorum'])
+        phase['output'] = json.dumps(results)
+        if not success:
+            phase['status'] = 'failed'
+            failed = ', '.join(result['target'] for result in results if result['status'] != 'succeeded')
+            return False, f"Sync to Nginx failed for {failed}"
+    return True, None
+
+def hash_file(path):
+    """SHA-1 of a file, read in 1 MB chunks"""
+    digest = hashlib.sha1()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def hash_tree(root):
+    """Map every file under root (relative POSIX path) to its content hash"""
+    root = Path(root)
+    files = [path for path in root.rglob('*') if path.is_file()]
+    with ThreadPoolExecutor(max_workers=os.cpu_count() or 4) as pool:
+        hashes = pool.map(hash_file, files)
+        return {path.relative_to(root).as_posix(): digest for path, digest in zip(files, hashes)}
+
+def release_manifest(release_dir):
+    """File hashes of a release directory, hashed once and then read from the file next to it
+    
+    Releases are not changed after they are built and compressed, so syncing
+    the same release again (a retry, a reused build or a rollback) does not
+    rehash it.
+    """
+    release_dir = Path(release_dir)
+    manifest_file = release_dir.with_name(RELEASE_MANIFEST.format(release_dir.name))
+    try:
+        return json.loads(manifest_file.read_text(encoding='utf-8'))
+    except (OSError, ValueError):
+        pass
+    manifest = hash_tree(release_dir)
+    tmp_file = manifest_file.with_suffix('.tmp')
+    tmp_file.write_text(json.dumps(manifest), encoding='utf-8')
+    os.replace(tmp_file, manifest_file)
+    return manifest
+
+def diff_manifests(old, new):
+    """Paths that are new or changed in new, and paths that disappeared from old"""
+    changed = sorted(path for path, digest in new.items() if old.get(path) != digest)
+    deleted = sorted(path for path in old if path not in new)
+    return changed, deleted
+
+def sync_changed_files(hugo_public, nginx_public, changed, deleted):
+    """Push only the given paths to Nginx
+    
+    Deleted paths are passed too; --delete-missing-args removes them on the
+    receiving side because they no longer exist in the source. With
+    --delay-updates the changed files are moved into place together at the end
+    of the transfer rather than one by one as they arrive.
+    """
+    print(f"Syncing {len(changed)} changed and {len(deleted)} deleted files to Nginx...")
+    try:
+        rsync_cmd = [
+            'rsync', '-az', '--files-from=-', '--delete-missing-args', '--delay-updates',
+            f"{hugo_public}/",
+            nginx_target(nginx_public)
+        ]
+        result = subprocess.run(
+            rsync_cmd,
+            input='\n'.join(changed + deleted) + '\n',
+            capture_output=True,
+            text=True,
+            check=True
+        )
+        print("Sync completed")
+        return True, result.stdout
+    except subprocess.CalledProcessError as e:
+        print(f"Sync failed: {e.stderr}")
+        return False, e.stderr
+
+def activate_release(hugo_root, release_dir):
+    """Point HUGO_ROOT/current at release_dir with an atomic symlink swap
+    
+    The swap is local: it records which release is active and is what
+    rollbacks start from. Sync targets hold a single copy of the site that
+    rsync updates in place (see sync_to_nginx), not a release directory each.
+    """
+    link = Path(hugo_root) / CURRENT_RELEASE_LINK
+    tmp_link = link.with_name(f".{CURRENT_RELEASE_LINK}.{os.getpid()}")
+    tmp_link.unlink(missing_ok=True)
+    tmp_link.symlink_to(os.path.relpath(release_dir, hugo_root))
+    os.replace(tmp_link, link)
+
+def active_release(hugo_root):
+    """Name of the release HUGO_ROOT/current points at, or None"""
+    try:
+        return Path(os.readlink(Path(hugo_root) / CURRENT_RELEASE_LINK)).name
+    except OSError:
+        return None
+
+def hugo_version():
+    """Output of hugo version, so that upgrading Hugo invalidates cached builds"""
+    try:
+        return subprocess.run(['hugo', 'version'], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return ''
+
+def tree_digest(root, file_hashes, seen, skip_hidden=False):
+    """Merkle digest of a directory tree
+    
+    Files contribute their content hash and directories the hash of their
+    children's names and digests, so a change anywhere changes the root digest.
+    Hashes in file_hashes (path -> [size, mtime_ns, digest]) are reused while a
+    file's size and mtime are unchanged; every file hashed is recorded in seen.
+    With skip_hidden, files and directories whose names start with a dot are
+    left out: Hugo does not read them from the content directory, which is where
+    the sync manifest and the exporter's manifests, checkpoints and search index
+    state live.
+    """
+    walk = []
+    for dirpath, dirnames, filenames in os.walk(root, followlinks=True):
+        if skip_hidden:
+            dirnames[:] = [name for name in dirnames if not name.startswith('.')]
+            filenames = [name for name in filenames if not name.startswith('.')]
+        walk.append((dirpath, dirnames, filenames))
+    stale = []
+    for dirpath, _, filenames in walk:
+        for name in filenames:
+            path = os.path.join(dirpath, name)
+            stat = os.stat(path)
+            cached = file_hashes.get(path)
+            if cached and cached[0] == stat.st_size and cached[1] == stat.st_mtime_ns:
+                seen[path] = cached
+            else:
+                stale.append((path, stat))
+    if stale:
+        with ThreadPoolExecutor(max_workers=os.cpu_count() or 4) as pool:
+            for (path, stat), digest in zip(stale, pool.map(hash_file, [path for path, _ in stale])):
+                seen[path] = [stat.st_size, stat.st_mtime_ns, digest]
+    
+    # Reversed top-down walk order visits every directory after its subdirectories
+    digests = {}
+    for dirpath, dirnames, filenames in reversed(walk):
+        node = hashlib.sha1()
+        for name in sorted(filenames):
+            path = os.path.join(dirpath, name)
+            if path in seen:
+                node.update(f"f {name} {seen[path][2]}\n".encode('utf-8'))
+        for name in sorted(dirnames):
+            node.update(f"d {name} {digests.pop(os.path.join(dirpath, name))}\n".encode('utf-8'))
+        digests[dirpath] = node.hexdigest()
+    return digests[root]
+
+def site_input_key(config):
+    """Hash of everything the Hugo build reads, used as the artifact cache key
+    
+    Covers the content directory, the site's config files and input
+    directories (layouts, themes, static, data, ...), the Hugo version and the
+    pre-compression setting.
+    """
+    hugo_root = Path(config['hugo_root'])
+    cache_file = hugo_root / RELEASES_DIR / TREE_HASH_CACHE
+    try:
+        file_hashes = json.loads(cache_file.read_text(encoding='utf-8'))
+    except (OSError, ValueError):
+        file_hashes = {}
+    
+    seen = {}
+    inputs = [('content', tree_digest(str(Path(config['hugo_content']).resolve()), file_hashes, seen,
+                                      skip_hidden=True))]
+    for name in SITE_INPUT_DIRS:
+        if (hugo_root / name).is_dir():
+            inputs.append((name, tree_digest(str((hugo_root / name).resolve()), file_hashes, seen)))
+    for name in SITE_INPUT_FILES:
+        if (hugo_root / name).is_file():
+            inputs.append((name, hash_file(hugo_root / name)))
+    inputs.append(('hugo', hugo_version()))
+    inputs.append(('precompress', ('gz,br' if brotli else 'gz') if config['precompress'] else ''))
+    
+    # Only the files seen this time are kept, so deleted files drop out of the cache
+    tmp_file = cache_file.with_suffix('.tmp')
+    tmp_file.write_text(json.dumps(seen), encoding='utf-8')
+    os.replace(tmp_file, cache_file)
+    return hashlib.sha1(json.dumps(inputs).encode('utf-8')).hexdigest()
+
+class ArtifactCache:
+    """Release directories under HUGO_ROOT/releases, indexed by the hash of their build inputs
+    
+    Each release is recorded with the input key it was built from (None when
+    the cache is off) and when it was last built or activated. The least
+    recently used releases beyond the cache size are evicted, and the
+    activation history is what rollbacks go back through.
+    """
+    
+    def __init__(self, releases_dir, size):
+        self.releases_dir = Path(releases_dir)
+        self.size = max(1, size)
+        self.index_file = self.releases_dir / ARTIFACT_INDEX
+        try:
+            index = json.loads(self.index_file.read_text(encoding='utf-8'))
+        except (OSError, ValueError):
+            index = {}
+        self.releases = {name: entry for name, entry in index.get('releases', {}).items()
+                         if (self.releases_dir / name).is_dir()}
+        self.history = [name for name in index.get('history', []) if name in self.releases]
+    
+    def lookup(self, key):
+        """Newest release built from key, or None"""
+        return max((name for name, entry in self.releases.items() if key and entry['key'] == key), default=None)
+    
+    def resolve(self, ref):
+        """Release directory named ref, or the newest release whose input key starts with ref"""
+        if self.releases_dir.is_dir() and ref in {path.name for path in self.releases_dir.iterdir() if path.is_dir()}:
+            return ref
+        return max((name for name, entry in self.releases.items()
+                    if entry['key'] and len(ref) >= 7 and entry['key'].startswith(ref)), default=None)
+    
+    def previous(self, active):
+        """Release activated before the active one, or None"""
+        return next((name for name in reversed(self.history) if name != active), None)
+    
+    def add(self, name, key):
+        now = time.time()
+        self.releases[name] = {'key': key, 'built': now, 'last_used': now}
+    
+    def activated(self, name):
+        self.releases.setdefault(name, {'key': None, 'built': None})['last_used'] = time.time()
+        self.history = [entry for entry in self.history if entry != name][-(ACTIVATION_HISTORY - 1):] + [name]
+    
+    def evict(self, active):
+        """Remove the least recently used release directories beyond the cache size, never the active one"""
+        releases = [path for path in self.releases_dir.iterdir() if path.is_dir()]
+        releases.sort(key=lambda path: self.releases.get(path.name, {}).get('last_used') or 0, reverse=True)
+        for release in releases[self.size:]:
+            if release.name != active:
+                shutil.rmtree(release, ignore_errors=True)
+                (self.releases_dir / RELEASE_MANIFEST.format(release.name)).unlink(missing_ok=True)
+                self.releases.pop(release.name, None)
+        self.history = [name for name in self.history if name in self.releases]
+    
+    def save(self):
+        tmp_file = self.index_file.with_suffix('.tmp')
+        tmp_file.write_text(json.dumps({'releases': self.releases, 'history': self.history}), encoding='utf-8')
+        os.replace(tmp_file, self.index_file)
+    
+    def to_list(self, active):
+        return [dict(entry, name=name, active=name == active)
+                for name, entry in sorted(self.releases.items(), reverse=True)]
+
+def sync_release(config, job, release_dir):
+    """Sync a release directory to every target; returns (success, message)
+    
+    In incremental deploy mode each target only receives the files whose
+    content hash differs from its manifest of the last sync; otherwise the
+    release is synced in full with rsync --delete. The release's file hashes
+    are computed on its first sync and cached next to it.
+    """
+    releases_dir = release_dir.parent
+    if not config['incremental_deploy']:
+        return sync_phase(job, config, lambda target: sync_to_nginx(str(release_dir), target))
+    
+    with job.phase('diff') as phase:
+        manifest = release_manifest(release_dir)
+        phase['output'] = json.dumps({'files': len(manifest)})
+    
+    def sync_target(target):
+        # Each target keeps its own manifest, so a target that missed a sync catches up next time
+        deployed_file = releases_dir / DEPLOYED_MANIFEST.format(hashlib.sha1(target.encode('utf-8')).hexdigest()[:12])
+        try:
+            deployed = json.loads(deployed_file.read_text(encoding='utf-8'))
+        except (OSError, ValueError):
+            deployed = None
+        
+        if deployed is None:
+            # No record of what the target has yet: one full sync
+            success, output = sync_to_nginx(str(release_dir), target)
+        else:
+            changed, deleted = diff_manifests(deployed, manifest)
+            if not changed and not deleted:
+                return True, "No changed files to sync"
+            success, output = sync_changed_files(str(release_dir), target, changed, deleted)
+            output = f"{len(changed)} changed, {len(deleted)} deleted\n{output}"
+        
+        if success:
+            tmp_file = deployed_file.with_suffix('.tmp')
+            tmp_file.write_text(json.dumps(manifest), encoding='utf-8')
+            os.replace(tmp_file, deployed_file)
+        return success, output
+    
+    return sync_phase(job, config, sync_target)
+
+def deploy_release(config, job):
+    """Build into a new release directory (or reuse a cached one), sync it and make it active
+    
+    Used in incremental deploy mode and with the artifact cache. Hugo's
+    resource cache is kept across incremental builds. With the artifact cache
+    the build inputs are hashed first, and a kept release built from identical
+    inputs is synced again instead of running Hugo (unless the job is forced).
+    """
+    hugo_root = Path(config['hugo_root'])
+    releases_dir = hugo_root / RELEASES_DIR
+    releases_dir.mkdir(parents=True, exist_ok=True)
+    cache = ArtifactCache(releases_dir, config['keep_releases'])
+    
+    key = release = None
+    if config['artifact_cache']:
+        with job.phase('hash') as phase:
+            key = site_input_key(config)
+            if not job.force:
+                release = cache.lookup(key)
+            phase['output'] = json.dumps({'key': key, 'cached': release})
+    
+    if release is None:
+        release = datetime.now().strftime('%Y%m%d%H%M%S%f')
+        with job.phase('build') as phase:
+            build_success, build_output = build_hugo_site(
+                hugo_root,
+                destination=str(releases_dir / release),
+                cache_dir=(config['hugo_cache_dir'] or str(hugo_root / '.hugo_cache'))
+                if config['incremental_deploy'] else None
+            )
+            phase['output'] = build_output
+            if not build_success:
+                phase['status'] = 'failed'
+                shutil.rmtree(releases_dir / release, ignore_errors=True)
+                return False, f"Hugo build failed: {build_output}"
+        precompress_phase(job, config, releases_dir / release)
+        # Kept even if the sync fails, so the retry does not build again
+        cache.add(release, key)
+        cache.save()
+        message = "Deployment completed successfully"
+    else:
+        print(f"Build inputs unchanged, reusing release {release}")
+        message = f"Deployment completed successfully (reused release {release})"
+    job.release = release
+    
+    sync_success, sync_message = sync_release(config, job, releases_dir / release)
+    if not sync_success:
+        return False, sync_message
+    
+    # Switch the local release pointer once enough targets have the release
+    activate_release(hugo_root, releases_dir / release)
+    cache.activated(release)
+    cache.evict(release)
+    cache.save()
+    return True, message
+
+def rollback_release(config, job):
+    """Re-activate a kept release without building: sync it to the targets and point current at it
+    
+    job.release names the release, or a prefix of its input key; without one
+    the release that was active before the current one is used.
+    """
+    hugo_root = Path(config['hugo_root'])
+    releases_dir = hugo_root / RELEASES_DIR
+    cache = ArtifactCache(releases_dir, config['keep_releases'])
+    active = active_release(hugo_root)
+    
+    with job.phase('rollback') as phase:
+        release = cache.resolve(job.release) if job.release else cache.previous(active)
+        phase['output'] = json.dumps({'from': active, 'to': release})
+        if release is None:
+            phase['status'] = 'failed'
+            if job.release:
+                return False, f"Unknown release: {job.release}"
+            return False, "No earlier release to roll back to"
+    job.release = release
+    
+    sync_success, sync_message = sync_release(config, job, releases_dir / release)
+    if not sync_success:
+        return False, sync_message
+    
+    activate_release(hugo_root, releases_dir / release)
+    cache.activated(release)
+    cache.save()
+    return True, f"Rolled back to release {release}"
+
 def sync_to_nginx(hugo_public, nginx_public):
-    """Sync to Nginx directory using rsync"""
+    """Sync to Nginx directory using rsync
+    
+    The target is updated in place. --delay-updates and --delete-delay hold
+    back renaming the new files into place and removing old ones until the
+    transfer is done, which keeps the window in which Nginx serves a mix of
+    old and new files short, though not atomic.
+    """
     print("Starting sync to Nginx directory...")
     try:
         rsync_cmd = [
-            'rsync', '-avz', '--delete',
+            'rsync', '-avz', '--delete', '--delete-delay', '--delay-updates',
             f"{hugo_public}/",
-            f"root@{nginx_public}:/var/www/html/"
+            nginx_target(nginx_public)
         ]
         
         result = subprocess.run(
@@ -98,60 +973,179 @@ def sync_to_nginx(hugo_public, nginx_public):
         print(f"Sync failed: {e.stderr}")
         return False, e.stderr
 
-def deploy_site():
-    """Execute the full deployment process"""
-    try:
-        config = load_config()
-        
-        # Copy Markdown files
-        copied_count = copy_markdown_files(
-            config['wordpress_content'],
-            config['hugo_content']
-        )
-        if copied_count == 0:
-            return False, "No Markdown files found to copy"
-        
-        # Build Hugo site
+def deploy_in_place(config, job):
+    """Build into HUGO_ROOT/public and sync it to the targets
+    
+    The whole output directory is synced with rsync --delete, which only
+    transfers the files that differ on the target.
+    """
+    with job.phase('build') as phase:
         build_success, build_output = build_hugo_site(config['hugo_root'])
+        phase['output'] = build_output
         if not build_success:
+            phase['status'] = 'failed'
             return False, f"Hugo build failed: {build_output}"
+    
+    hugo_public = os.path.join(config['hugo_root'], 'public')
+    precompress_phase(job, config, hugo_public)
+    sync_success, sync_message = sync_phase(job, config, lambda target: sync_to_nginx(hugo_public, target))
+    if not sync_success:
+        return False, sync_message
+    
+    return True, "Deployment completed successfully"
+
+def deploy_site(job=None):
+    """Execute the full deployment process, recording each phase on job
+    
+    In export pipeline mode the export's change set decides whether anything is
+    built and synced, and is reported on the job. It is not passed on to the
+    build or sync: a changed post also changes its list, taxonomy and feed pages,
+    so content paths do not map to output files. The later stages narrow the
+    work by output instead, through rsync's own comparison or, in incremental
+    deploy mode, the per-target hash manifests.
+    """
+    job = job or DeployJob()
+    try:
+        with job.phase('config'):
+            config = load_config()
         
-        # Sync to Nginx
-        sync_success, sync_output = sync_to_nginx(
-            os.path.join(config['hugo_root'], 'public'),
-            config['nginx_public']
-        )
-        if not sync_success:
-            return False, f"Sync to Nginx failed: {sync_output}"
+        if job.kind == 'rollback':
+            return rollback_release(config, job)
+        
+        if config['wp_root']:
+            # Export straight into Hugo. The change set decides whether to build at all;
+            # changes from earlier publishes whose build or sync failed are still
+            # pending, since the export manifest already counts them as done
+            with job.phase('export') as phase:
+                changes = export_to_hugo(config['wp_root'], config['hugo_content'],
+                                         config['search_index'], config['type_config'],
+                                         config['front_matter'], config['content_layout'])
+                if changes is None:
+                    phase['status'] = 'failed'
+                    return False, "WordPress export failed"
+                job.changes = merge_changes(load_pending_changes(config['hugo_root']), changes.to_dict())
+                save_pending_changes(config['hugo_root'], job.changes)
+                phase['output'] = json.dumps({kind: len(paths) for kind, paths in job.changes.items()})
+            if not any(job.changes.values()) and not job.force:
+                return True, "No content changes, nothing to deploy"
+        else:
+            # Copy Markdown files
+            with job.phase('copy') as phase:
+                copy_stats = copy_markdown_files(
+                    config['wordpress_content'],
+                    config['hugo_content']
+                )
+                phase['output'] = json.dumps(copy_stats)
+                if copy_stats['written'] + copy_stats['skipped'] == 0:
+                    phase['status'] = 'failed'
+                    return False, "No Markdown files found to copy"
         
-        return True, "Deployment completed successfully"
+        if config['incremental_deploy'] or config['artifact_cache']:
+            success, message = deploy_release(config, job)
+        else:
+            success, message = deploy_in_place(config, job)
+        if success and config['wp_root']:
+            save_pending_changes(config['hugo_root'], {})
+        return success, message
             
     except Exception as e:
         return False, f"Error during deployment: {str(e)}"
 
-@app.route('/publish', methods=['POST'])
-def publish():
-    """API endpoint to trigger deployment"""
-    password = request.args.get('password')
-    
+deploy_queue = DeployQueue()
+
+def check_password():
+    """Return an error response when the request password is wrong, else None"""
     config = load_config()
-    if password != config['password']:
+    if request.args.get('password') != config['password']:
         return jsonify({
             'status': 'error',
             'message': 'Invalid password'
         }), 401
+    return None
+
+@app.route('/publish', methods=['POST'])
+def publish():
+    """API endpoint to queue a deployment
+    
+    Returns 202 with the job ID straight away. With ?wait=1 the request blocks
+    until the job finishes and returns 200 or 500 like a synchronous deploy.
+    """
+    error = check_password()
+    if error:
+        return error
     
-    success, message = deploy_site()
-    if success:
+    job, coalesced = deploy_queue.submit(force=bool(request.args.get('force')))
+    if request.args.get('wait'):
+        job.done.wait()
         return jsonify({
-            'status': 'success',
-            'message': message
-        }), 200
-    else:
+            'status': 'success' if job.status == 'succeeded' else 'error',
+            'message': job.message,
+            'job_id': job.id
+        }), 200 if job.status == 'succeeded' else 500
+    
+    return jsonify({
+        'status': 'accepted',
+        'message': 'Joined queued deployment' if coalesced else 'Deployment queued',
+        'job_id': job.id,
+        'coalesced': coalesced
+    }), 202
+
+@app.route('/jobs/<job_id>', methods=['GET'])
+def job_status(job_id):
+    """API endpoint to check a deployment job"""
+    error = check_password()
+    if error:
+        return error
+    
+    job = deploy_queue.get(job_id)
+    if job is None:
         return jsonify({
             'status': 'error',
-            'message': message
-        }), 500
+            'message': 'Unknown job'
+        }), 404
+    return jsonify(job.to_dict()), 200
+
+@app.route('/rollback', methods=['POST'])
+def rollback():
+    """API endpoint to queue a rollback to a kept release
+    
+    ?release= names the release directory or a prefix of its input key; without
+    it the release that was active before the current one is restored. The
+    rollback runs in the deployment queue, so it never races with a deployment.
+    """
+    error = check_password()
+    if error:
+        return error
+    
+    job, _ = deploy_queue.submit(rollback=request.args.get('release', ''))
+    if request.args.get('wait'):
+        job.done.wait()
+        return jsonify({
+            'status': 'success' if job.status == 'succeeded' else 'error',
+            'message': job.message,
+            'job_id': job.id,
+            'release': job.release
+        }), 200 if job.status == 'succeeded' else 500
+    
+    return jsonify({
+        'status': 'accepted',
+        'message': 'Rollback queued',
+        'job_id': job.id
+    }), 202
+
+@app.route('/releases', methods=['GET'])
+def releases():
+    """API endpoint to list the kept releases, newest first"""
+    error = check_password()
+    if error:
+        return error
+    
+    config = load_config()
+    cache = ArtifactCache(Path(config['hugo_root']) / RELEASES_DIR, config['keep_releases'])
+    return jsonify({
+        'active': active_release(config['hugo_root']),
+        'releases': cache.to_list(active_release(config['hugo_root']))
+    }), 200
 
 @app.route('/status', methods=['GET'])
 def status():
@@ -0,0 +1,69 @@
+import contextlib
+import io
+import os
+import sys
+
+import pytest
+
+# 测试直接导入仓库根目录下的脚本模块
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from wp_to_hugo_exporter import WxrExporter  # noqa: E402
+
+WXR = """<?xml version="1.0" encoding="UTF-8" ?>
+<rss version="2.0" xmlns:content="http://purl.org/rss/1.0/modules/content/"
+    xmlns:excerpt="http://wordpress.org/export/1.2/excerpt/" xmlns:wp="http://wordpress.org/export/1.2/">
+<channel>
+{items}
+</channel>
+</rss>
+"""
+
+ITEM = """<item><title>{title}</title><link>https://example.com{link}</link>
+<content:encoded><![CDATA[{content}]]></content:encoded>
+<wp:post_id>{id}</wp:post_id><wp:post_date>{date}</wp:post_date><wp:post_modified>{modified}</wp:post_modified>
+<wp:post_name>{slug}</wp:post_name><wp:status>{status}</wp:status><wp:post_type>{type}</wp:post_type>
+<wp:post_parent>{parent}</wp:post_parent>{extra}</item>"""
+
+
+@pytest.fixture
+def wxr_item():
+    """生成WXR中一篇文章的<item>元素；标题默认为Title {ID}，slug为p{ID}，链接为/{slug}/"""
+    def item(post_id, slug=None, date='2023-01-02 03:04:05', link=None, title=None, content=None,
+             modified=None, status='publish', post_type='post', parent=0, extra=''):
+        title = title or f"Title {post_id}"
+        slug = slug or f"p{post_id}"
+        return ITEM.format(id=post_id, title=title, slug=slug, date=date, modified=modified or date,
+                           link=link or f"/{slug}/", content=content or f"<p>{title}</p>",
+                           status=status, type=post_type, parent=parent, extra=extra)
+    return item
+
+
+@pytest.fixture
+def write_wxr(tmp_path):
+    """把<item>元素列表写入tmp_path/site.xml，返回文件路径"""
+    wxr = tmp_path / 'site.xml'
+
+    def write(items):
+        wxr.write_text(WXR.format(items='\n'.join(items)), encoding='utf-8')
+        return wxr
+    return write
+
+
+@pytest.fixture
+def export_wxr(tmp_path, write_wxr):
+    """写入WXR文件并导出，返回导出器
+
+    默认新建导出到root（默认tmp_path/out）的导出器，传入exporter时用它再次导出；
+    其余关键字参数设置为导出器的属性。导出必须成功。
+    """
+    def export(items, root=None, exporter=None, **options):
+        wxr = write_wxr(items)
+        if exporter is None:
+            exporter = WxrExporter(str(root or tmp_path / 'out'), str(wxr))
+        for name, value in options.items():
+            setattr(exporter, name, value)
+        with contextlib.redirect_stdout(io.StringIO()):
+            assert exporter.export_content('any')
+        return exporter
+    return export
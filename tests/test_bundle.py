@@ -0,0 +1,40 @@
+"""页面包测试：只有放进页面包的资源才改写为相对文件名"""
+
+import os
+
+import pytest
+
+from wp_to_hugo_exporter import WxrExporter
+
+GALLERY = """<p><img src="https://example.com/wp-content/uploads/2023/01/local.jpg" alt="local"/>
+<img src="http://127.0.0.1:9/missing.jpg" alt="missing"/></p>"""
+
+
+@pytest.fixture
+def export_gallery(tmp_path, write_wxr, wxr_item, export_wxr):
+    def export():
+        item = wxr_item(1, 'gallery', title='Gallery', content=GALLERY)
+        exporter = WxrExporter(str(tmp_path), str(write_wxr([item])))
+        exporter.assets.workers = 2
+        return export_wxr([item], exporter=exporter, bundle=True)
+    return export
+
+
+def test_failed_assets_keep_original_url(tmp_path, export_gallery):
+    uploads = tmp_path / 'wp-content' / 'uploads' / '2023' / '01'
+    uploads.mkdir(parents=True)
+    (uploads / 'local.jpg').write_bytes(b'jpeg')
+    
+    exporter = export_gallery()
+    bundle_dir = os.path.join(exporter.content_dir, 'posts', 'gallery')
+    text = open(os.path.join(bundle_dir, 'index.md'), encoding='utf-8').read()
+    assert '![local](local.jpg)' in text
+    assert '![missing](http://127.0.0.1:9/missing.jpg)' in text
+    assert sorted(os.listdir(bundle_dir)) == ['index.md', 'local.jpg']
+    assert exporter.assets.copied == 1 and exporter.assets.failed == 1
+    
+    # 上传目录中的文件被删除后，页面包中上次放入的文件继续使用
+    (uploads / 'local.jpg').unlink()
+    export_gallery()
+    assert open(os.path.join(bundle_dir, 'index.md'), encoding='utf-8').read() == text
+    assert sorted(os.listdir(bundle_dir)) == ['index.md', 'local.jpg']
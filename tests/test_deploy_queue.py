@@ -0,0 +1,109 @@
+"""deploy.py部署队列的测试：连续的发布请求合并成一个排队的任务，任务运行时不会并发构建，/jobs返回各阶段的状态"""
+
+import threading
+
+import pytest
+
+pytest.importorskip('flask')
+pytest.importorskip('dotenv')
+
+import deploy  # noqa: E402
+
+
+class StubDeploy:
+    """代替deploy_site：记录一个build阶段，在release()之前一直阻塞，并统计同时运行的部署数"""
+
+    def __init__(self):
+        self.started = threading.Semaphore(0)
+        self.proceed = threading.Event()
+        self.lock = threading.Lock()
+        self.running = 0
+        self.max_running = 0
+        self.jobs = []
+
+    def __call__(self, job):
+        with self.lock:
+            self.running += 1
+            self.max_running = max(self.max_running, self.running)
+            self.jobs.append(job)
+        try:
+            with job.phase('build') as phase:
+                self.started.release()
+                assert self.proceed.wait(5)
+                phase['output'] = 'built'
+            return True, 'Deployment completed successfully'
+        finally:
+            with self.lock:
+                self.running -= 1
+
+    def wait_started(self):
+        assert self.started.acquire(timeout=5)
+
+
+@pytest.fixture
+def stub():
+    return StubDeploy()
+
+
+@pytest.fixture
+def queue(stub):
+    queue = deploy.DeployQueue(stub)
+    yield queue
+    stub.proceed.set()
+
+
+def test_burst_of_publishes_during_a_running_job_is_one_queued_job(queue, stub):
+    first, coalesced = queue.submit()
+    assert not coalesced
+    stub.wait_started()
+
+    burst = [queue.submit() for _ in range(3)]
+    second = burst[0][0]
+    assert [coalesced for _, coalesced in burst] == [False, True, True]
+    assert all(job is second for job, _ in burst)
+    assert second.requests == 3 and second.status == 'queued'
+    assert first.status == 'running'
+
+    stub.proceed.set()
+    assert first.done.wait(5) and second.done.wait(5)
+    assert stub.jobs == [first, second]
+    assert stub.max_running == 1
+    assert (first.status, second.status) == ('succeeded', 'succeeded')
+
+
+def test_forced_publish_makes_the_joined_job_forced(queue, stub):
+    queue.submit()
+    stub.wait_started()
+    job, _ = queue.submit()
+    queue.submit(force=True)
+    assert job.force
+
+
+def test_job_endpoint_reports_phases(queue, stub, monkeypatch):
+    monkeypatch.setattr(deploy, 'deploy_queue', queue)
+    monkeypatch.setattr(deploy, 'load_config', lambda: {'password': 'pw'})
+    client = deploy.app.test_client()
+
+    response = client.post('/publish?password=pw')
+    assert response.status_code == 202
+    job_id = response.get_json()['job_id']
+    stub.wait_started()
+
+    running = client.get(f'/jobs/{job_id}?password=pw').get_json()
+    assert running['status'] == 'running'
+    assert [(phase['name'], phase['status']) for phase in running['phases']] == [('build', 'running')]
+
+    second = client.post('/publish?password=pw').get_json()
+    assert second['job_id'] != job_id and not second['coalesced']
+    assert client.post('/publish?password=pw').get_json() == dict(second, coalesced=True,
+                                                                 message='Joined queued deployment')
+
+    stub.proceed.set()
+    assert queue.get(job_id).done.wait(5)
+    finished = client.get(f'/jobs/{job_id}?password=pw').get_json()
+    assert finished['status'] == 'succeeded'
+    assert finished['phases'][0]['status'] == 'succeeded' and finished['phases'][0]['output'] == 'built'
+    assert client.get(f'/jobs/{job_id}?password=wrong').status_code == 401
+    assert client.get('/jobs/unknown?password=pw').status_code == 404
+    assert queue.get(second['job_id']).done.wait(5)
+    assert stub.max_running == 1
@@ -0,0 +1,114 @@
+"""front matter发射器的往返测试：渲染结果用yaml、tomllib、json读回，应与输入的值完全相同"""
+
+import datetime
+import json
+
+import pytest
+
+from wp_to_hugo_exporter import FRONT_MATTER_DELIMITERS, render_front_matter
+
+yaml = pytest.importorskip('yaml')
+tomllib = pytest.importorskip('tomllib')
+
+DATE = datetime.datetime(2023, 1, 2, 3, 4, 5)
+
+TITLES = [
+    'plain',
+    '',
+    'He said "hi"',
+    "It's 'quoted'",
+    'key: value',
+    'ends with colon:',
+    'a # not a comment',
+    '# leading hash',
+    '- leading dash',
+    '[leading bracket]',
+    '{leading brace}',
+    '*star* &anchor !tag |pipe >fold %percent @at `tick',
+    '? question',
+    'C:\\path\\to\\file',
+    'trailing backslash \\',
+    'line one\nline two',
+    'windows\r\nnewline',
+    'tab\there',
+    'null',
+    'true',
+    'yes',
+    '~',
+    '0123',
+    '1e3',
+    '2023-01-02',
+    '  leading and trailing spaces  ',
+    '中文标题：冒号与“引号”',
+    'emoji 🎉 and ünïcödé',
+    'control \x00\x01\x1b\x7f chars',
+    'C1 \x85 NEL \u2028 LS \u2029 PS',
+    '\ufeffbom',
+    '"""triple"""',
+    "'''triple'''",
+    '---',
+    '+++',
+]
+
+
+def _fields(title):
+    return [
+        ('layout', 'post'),
+        ('title', title),
+        ('slug', 'slug'),
+        ('date', DATE),
+        ('categories', [title, 'Other: "x"']),
+        ('tags', []),
+        ('featureImage', None),
+        ('custom-field', title),
+    ]
+
+
+def _expected(title):
+    return {
+        'layout': 'post',
+        'title': title,
+        'slug': 'slug',
+        'date': DATE,
+        'categories': [title, 'Other: "x"'],
+        'tags': [],
+        'featureImage': '',
+        'custom-field': title,
+    }
+
+
+def _body(rendered, front_matter):
+    delimiter = FRONT_MATTER_DELIMITERS[front_matter]
+    assert rendered.startswith(delimiter)
+    body, end, rest = rendered[len(delimiter):].partition(delimiter)
+    assert end and rest == '\n'
+    return body
+
+
+@pytest.mark.parametrize('title', TITLES)
+def test_yaml_round_trip(title):
+    document = yaml.safe_load(_body(render_front_matter(_fields(title), 'yaml'), 'yaml'))
+    assert document == _expected(title)
+
+
+@pytest.mark.parametrize('title', TITLES)
+def test_toml_round_trip(title):
+    document = tomllib.loads(_body(render_front_matter(_fields(title), 'toml'), 'toml'))
+    assert document == _expected(title)
+
+
+@pytest.mark.parametrize('title', TITLES)
+def test_json_round_trip(title):
+    rendered = render_front_matter(_fields(title), 'json')
+    assert rendered.endswith('}\n\n')
+    expected = _expected(title)
+    expected['date'] = DATE.isoformat(' ')
+    assert json.loads(rendered) == expected
+
+
+@pytest.mark.parametrize('front_matter', ['yaml', 'toml'])
+def test_key_needing_quotes(front_matter):
+    fields = [('odd key: "x"', 'value')]
+    rendered = _body(render_front_matter(fields, front_matter), front_matter)
+    document = yaml.safe_load(rendered) if front_matter == 'yaml' else tomllib.loads(rendered)
+    assert document == {'odd key: "x"': 'value'}
@@ -0,0 +1,19 @@
+"""增量导出的测试：取消发布的文章文件被删除，修改过的文章被重写，其余文章不变"""
+
+
+def test_unpublished_post_is_deleted_and_edited_post_rewritten(tmp_path, export_wxr, wxr_item):
+    exporter = export_wxr([wxr_item(1), wxr_item(2), wxr_item(3)], incremental=True)
+    posts = tmp_path / 'out' / 'wp-content' / 'md' / 'content' / 'posts'
+    assert sorted(path.name for path in posts.iterdir()) == [f'2023-01-02-p{post_id}.md' for post_id in (1, 2, 3)]
+    unchanged = (posts / '2023-01-02-p3.md').read_text(encoding='utf-8')
+
+    # 1改为草稿，2在上次导出之后被修改
+    export_wxr([wxr_item(1, status='draft'), wxr_item(2, content='<p>Edited</p>', modified='2023-02-03 04:05:06'),
+                wxr_item(3)], exporter=exporter)
+    assert exporter.export_count == 1
+    assert sorted(path.name for path in posts.iterdir()) == ['2023-01-02-p2.md', '2023-01-02-p3.md']
+    assert 'Edited' in (posts / '2023-01-02-p2.md').read_text(encoding='utf-8')
+    assert (posts / '2023-01-02-p3.md').read_text(encoding='utf-8') == unchanged
+    assert exporter.changes.to_dict() == {'added': [], 'modified': ['content/posts/2023-01-02-p2.md'],
+                                          'deleted': ['content/posts/2023-01-02-p1.md']}
+    assert sorted(exporter.manifest['posts']) == ['2', '3']
@@ -0,0 +1,41 @@
+"""命令行入口的测试：导出成功时正常退出，导出中止或有文章失败时退出码为1"""
+
+import contextlib
+import io
+import sys
+
+import pytest
+
+import wp_to_hugo_exporter
+from wp_to_hugo_exporter import WpToHugoExporter, WxrExporter
+
+
+@pytest.fixture
+def run_main(write_wxr, wxr_item, tmp_path, monkeypatch):
+    def run():
+        wxr = write_wxr([wxr_item(1, 'hello', title='Hello')])
+        monkeypatch.setattr(sys, 'argv', ['wp_to_hugo_exporter.py', '--wxr', str(wxr), '--wp-root', str(tmp_path)])
+        with contextlib.redirect_stdout(io.StringIO()):
+            wp_to_hugo_exporter.main()
+    return run
+
+
+def test_successful_export_exits_normally(run_main, tmp_path):
+    run_main()
+    assert list((tmp_path / 'wp-content' / 'md' / 'content').rglob('*.md'))
+
+
+def test_failed_post_exits_with_error(run_main, monkeypatch):
+    def build_post_data(self, post):
+        raise ValueError('broken post')
+    monkeypatch.setattr(WpToHugoExporter, 'build_post_data', build_post_data)
+    with pytest.raises(SystemExit) as excinfo:
+        run_main()
+    assert excinfo.value.code == 1
+
+
+def test_aborted_export_exits_with_error(run_main, monkeypatch):
+    monkeypatch.setattr(WxrExporter, 'export_content', lambda self, post_type='any': False)
+    with pytest.raises(SystemExit) as excinfo:
+        run_main()
+    assert excinfo.value.code == 1
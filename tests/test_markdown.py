@@ -0,0 +1,80 @@
+"""HTML到Markdown转换器的测试：列表项内的块级内容、普通文本转义、行内代码和强调标记"""
+
+import pytest
+
+from wp_to_hugo_exporter import html_to_markdown
+
+
+def test_paragraphs_inside_list_item():
+    markdown = html_to_markdown('<ul><li><p>first para</p><p>second para</p></li><li>next</li></ul>')
+    assert markdown == '- first para\n\n  second para\n- next\n'
+
+
+def test_code_block_inside_ordered_list_item():
+    markdown = html_to_markdown(
+        '<ol><li>a</li><li>b<pre><code class="language-py">x = 1\nprint(x)</code></pre></li></ol>')
+    assert markdown == '1. a\n2. b\n\n   ```py\n   x = 1\n   print(x)\n   ```\n'
+
+
+def test_code_block_opening_list_item():
+    assert html_to_markdown('<ul><li><pre>code</pre></li></ul>') == '- ```\n  code\n  ```\n'
+
+
+def test_nested_list_indented_to_content_column():
+    markdown = html_to_markdown('<ol start="9"><li>nine</li><li>ten<p>para</p><ul><li>nested</li></ul></li></ol>')
+    assert markdown == '9. nine\n10. ten\n\n    para\n    - nested\n'
+
+
+def test_blockquote_inside_list_item():
+    markdown = html_to_markdown('<ul><li>a<blockquote><p>q1</p><p>q2</p></blockquote></li></ul>')
+    assert markdown == '- a\n\n  > q1\n  >\n  > q2\n'
+
+
+def test_code_fence_longer_than_backticks_in_code():
+    assert html_to_markdown('<pre>```\nx\n```</pre>') == '````\n```\nx\n```\n````\n'
+
+
+@pytest.mark.parametrize('html, markdown', [
+    ('<p>*x* and _y_ but snake_case</p>', '\\*x\\* and \\_y\\_ but snake_case\n'),
+    ('<p>[not](a link) `tick` ~~del~~ back\\slash</p>', '\\[not\\](a link) \\`tick\\` \\~\\~del\\~\\~ back\\\\slash\n'),
+    ('<p># not a heading</p>', '\\# not a heading\n'),
+    ('<p>1. not a list</p>', '1\\. not a list\n'),
+    ('<p>- not a list</p>', '\\- not a list\n'),
+    ('<p>&gt; not a quote</p>', '\\> not a quote\n'),
+    ('<p>a<br>===</p>', 'a  \n\\===\n'),
+    ('<p>&lt;div&gt; &amp;amp; Tom &amp; Jerry</p>', '\\<div> \\&amp; Tom & Jerry\n'),
+    ('<p>{{&lt; shortcode &gt;}} and {{% x %}}</p>', '&#123;&#123;< shortcode >}} and &#123;&#123;% x %}}\n'),
+    ('<p>in 2023. the year # 1</p>', 'in 2023. the year # 1\n'),
+])
+def test_literal_text_is_escaped(html, markdown):
+    assert html_to_markdown(html) == markdown
+
+
+def test_shortcode_output_is_not_escaped():
+    assert html_to_markdown('[embed]https://youtu.be/abcdefgh[/embed]') == '{{< youtube abcdefgh >}}\n'
+
+
+def test_code_text_is_not_escaped():
+    assert html_to_markdown('<p><code>*args</code></p><pre>a_b *c*</pre>') == '`*args`\n\n```\na_b *c*\n```\n'
+
+
+@pytest.mark.parametrize('html, markdown', [
+    ('<p>use <code>a`b</code></p>', 'use ``a`b``\n'),
+    ('<p><code>`x</code></p>', '`` `x ``\n'),
+    ('<p><code>x``</code></p>', '``` x`` ```\n'),
+    ('<p><code><b>bold</b></code></p>', '`bold`\n'),
+])
+def test_inline_code_with_backticks(html, markdown):
+    assert html_to_markdown(html) == markdown
+
+
+@pytest.mark.parametrize('html, markdown', [
+    ('<p>a<strong> bold </strong>b</p>', 'a **bold** b\n'),
+    ('<p>a <em>it </em>b</p>', 'a *it* b\n'),
+    ('<p>a<del> gone</del></p>', 'a ~~gone~~\n'),
+    ('<p>a<strong> </strong>b<em></em></p>', 'a b\n'),
+    ('<p><strong><a href="/u">link</a></strong></p>', '**[link](/u)**\n'),
+    ('<p><strong>a<br></strong>b</p>', '**a**  \nb\n'),
+])
+def test_emphasis_whitespace_outside_markers(html, markdown):
+    assert html_to_markdown(html) == markdown
@@ -0,0 +1,39 @@
+"""deploy.py预压缩阶段的测试：只压缩内容变化的文件，删除过期的压缩文件并清理不再使用的缓存"""
+
+import gzip
+
+import pytest
+
+pytest.importorskip('flask')
+pytest.importorskip('dotenv')
+
+import deploy  # noqa: E402
+
+PAGE = '<html>' + 'hello world ' * 100 + '</html>'
+
+
+def test_precompress_reuses_cache_and_removes_stale_files(tmp_path, monkeypatch):
+    monkeypatch.setattr(deploy, 'brotli', None)
+    public, cache = tmp_path / 'public', tmp_path / 'cache'
+    public.mkdir()
+    (public / 'a.html').write_text(PAGE)
+    (public / 'b.html').write_text(PAGE.replace('hello', 'other'))
+    (public / 'small.css').write_text('a{}')
+    (public / 'image.png').write_bytes(b'\0' * 1000)
+
+    stats = deploy.precompress_site(public, cache)
+    assert (stats['files'], stats['compressed'], stats['reused']) == (2, 2, 0)
+    assert gzip.decompress((public / 'a.html.gz').read_bytes()).decode() == PAGE
+    assert not (public / 'small.css.gz').exists() and not (public / 'image.png.gz').exists()
+    old_entry = {path.name for path in cache.iterdir()} - {f"{deploy.hash_file(public / 'a.html')}.gz"}
+
+    # 第二次构建：a不变，b被删除，新增c
+    (public / 'b.html').unlink()
+    (public / 'c.html').write_text(PAGE.replace('hello', 'third'))
+    stats = deploy.precompress_site(public, cache)
+    assert (stats['files'], stats['compressed'], stats['reused'], stats['removed']) == (2, 1, 1, 1)
+    assert not (public / 'b.html.gz').exists()
+    assert gzip.decompress((public / 'c.html.gz').read_bytes()).decode() == PAGE.replace('hello', 'third')
+    entries = {path.name for path in cache.iterdir()}
+    assert entries == {f"{deploy.hash_file(public / name)}.gz" for name in ('a.html', 'c.html')}
+    assert not entries & old_entry
@@ -0,0 +1,100 @@
+"""重定向表和别名的测试：每个目标都必须是Hugo按front matter中的slug实际生成的URL"""
+
+import json
+import re
+from pathlib import Path
+
+import pytest
+
+MAP_LINE_RE = re.compile(r'^\s+("(?:[^"\\]|\\.)*"|\d+) "((?:[^"\\]|\\.)*)";$')
+
+
+def _served_urls(exporter):
+    """Hugo为每篇导出的文章生成的URL：front matter中有url时用url，否则为/{类型目录}/{slug}/"""
+    served = {}
+    root = exporter.content_dir
+    for path in sorted(Path(root).rglob('*.md')):
+        text = path.read_text(encoding='utf-8')
+        document = json.JSONDecoder().raw_decode(text)[0]
+        section = path.relative_to(root).parts[0]
+        served[document['title']] = (document.get('url') or f"/{section}/{document['slug']}/", document)
+    return served
+
+
+def _read_map(path):
+    entries = {}
+    with open(path, encoding='utf-8') as f:
+        for line in f:
+            match = MAP_LINE_RE.match(line)
+            if match:
+                key = match.group(1).strip('"')
+                entries[key] = match.group(2)
+    return entries
+
+
+@pytest.fixture
+def export(tmp_path, wxr_item, export_wxr):
+    """导出一个小站点：同一slug的两篇文章（日期不同）、一个页面和一个附件，同时写入别名和重定向表"""
+    def item(post_id, slug, date, link, old_slugs=(), extra='', **fields):
+        for old_slug in old_slugs:
+            extra += (f"<wp:postmeta><wp:meta_key>_wp_old_slug</wp:meta_key>"
+                      f"<wp:meta_value>{old_slug}</wp:meta_value></wp:postmeta>")
+        return wxr_item(post_id, slug, date, link, extra=extra, **fields)
+    
+    site = [
+        item(1, 'hello', '2023-01-02 03:04:05', '/2023/01/hello/', old_slugs=['hi-there']),
+        # 不同日期的同一slug：Hugo中的slug必须加上ID
+        item(2, 'hello', '2023-02-03 03:04:05', '/2023/02/hello/', old_slugs=['hello-again']),
+        item(3, 'about', '2023-01-05 00:00:00', '/about/', post_type='page'),
+        item(4, 'pic', '2023-01-02 03:04:05', '/2023/01/hello/pic/', post_type='attachment', status='inherit',
+             parent=1, extra='<wp:attachment_url>https://example.com/wp-content/uploads/pic.jpg</wp:attachment_url>'),
+    ]
+    
+    def run(**options):
+        return export_wxr(site, front_matter='json', aliases=True,
+                          redirect_map=str(tmp_path / 'redirects.map'), **options)
+    return run
+
+
+def test_redirect_targets_are_served_urls(export):
+    exporter = export()
+    served = _served_urls(exporter)
+    urls = {url for url, _ in served.values()}
+    assert served['Title 1'][0] == '/posts/hello/'
+    assert served['Title 2'][0] == '/posts/hello-2/'
+    assert served['Title 2'][1]['slug'] == 'hello-2'
+    
+    entries = _read_map(exporter.redirect_map)
+    assert entries
+    for key, target in entries.items():
+        assert target in urls, (key, target)
+        # 不重定向Hugo实际提供的页面
+        assert key not in urls
+    
+    assert entries['/2023/01/hello/'] == '/posts/hello/'
+    assert entries['/2023/01/hi-there/'] == '/posts/hello/'
+    assert entries['/2023/02/hello/'] == '/posts/hello-2/'
+    assert entries['/2023/02/hello-again/'] == '/posts/hello-2/'
+    assert entries['/about/'] == '/pages/about/'
+    assert entries['/2023/01/hello/pic/'] == '/posts/hello/'
+    assert entries['2'] == '/posts/hello-2/'
+    assert entries['4'] == '/posts/hello/'
+
+
+def test_aliases_exclude_served_url(export):
+    exporter = export(layout='date')
+    for url, document in _served_urls(exporter).values():
+        assert url not in document.get('aliases', [])
+    document = _served_urls(exporter)['Title 1'][1]
+    assert document['url'] == '/posts/hello/'
+    assert document['aliases'] == ['/2023/01/hello/', '/2023/01/hi-there/']
+
+
+def test_custom_url_template(export):
+    exporter = export(url_template='/:year/:month/:slug/')
+    served = _served_urls(exporter)
+    # 按年月区分后URL不再冲突，slug保持不变
+    assert served['Title 2'][1]['url'] == '/2023/02/hello/'
+    assert served['Title 2'][1]['slug'] == 'hello'
+    for key, target in _read_map(exporter.redirect_map).items():
+        assert target in {url for url, _ in served.values()}, (key, target)
@@ -0,0 +1,94 @@
+"""deploy.py发布目录缓存和回滚的测试：淘汰时保留当前发布，按名称或输入哈希前缀查找发布，回滚到上一个发布"""
+
+import pytest
+
+pytest.importorskip('flask')
+pytest.importorskip('dotenv')
+
+import deploy  # noqa: E402
+
+
+@pytest.fixture
+def releases_dir(tmp_path):
+    releases_dir = tmp_path / deploy.RELEASES_DIR
+    for name in ('r1', 'r2', 'r3', 'r4'):
+        (releases_dir / name).mkdir(parents=True)
+    return releases_dir
+
+
+def make_cache(releases_dir, size):
+    cache = deploy.ArtifactCache(releases_dir, size)
+    for used, (name, key) in enumerate((('r1', 'aaaaaaa111'), ('r2', 'bbbbbbb222'),
+                                        ('r3', 'aaaaaaa333'), ('r4', None)), 1):
+        cache.add(name, key)
+        cache.releases[name]['last_used'] = used
+    return cache
+
+
+def test_eviction_keeps_the_active_release(releases_dir):
+    cache = make_cache(releases_dir, 2)
+    (releases_dir / deploy.RELEASE_MANIFEST.format('r2')).write_text('{}')
+    cache.history = ['r1', 'r2', 'r4']
+    cache.evict('r1')
+    assert sorted(path.name for path in releases_dir.iterdir()) == ['r1', 'r3', 'r4']
+    assert sorted(cache.releases) == ['r1', 'r3', 'r4']
+    assert cache.history == ['r1', 'r4']
+
+    cache.save()
+    reloaded = deploy.ArtifactCache(releases_dir, 2)
+    assert sorted(reloaded.releases) == ['r1', 'r3', 'r4'] and reloaded.history == ['r1', 'r4']
+
+
+def test_resolve_by_name_or_key_prefix(releases_dir):
+    cache = make_cache(releases_dir, 4)
+    assert cache.resolve('r2') == 'r2'
+    assert cache.resolve('bbbbbbb') == 'r2'
+    # 同一输入前缀有多个发布时取最新的
+    assert cache.resolve('aaaaaaa') == 'r3'
+    assert cache.resolve('aaaaaaa1') == 'r1'
+    # 少于7个字符的前缀不按输入哈希查找
+    assert cache.resolve('bbb') is None
+    assert cache.resolve('r9') is None
+    assert cache.lookup('aaaaaaa111') == 'r1' and cache.lookup(None) is None
+
+
+def test_previous_skips_the_active_release(releases_dir):
+    cache = make_cache(releases_dir, 4)
+    assert cache.previous(None) is None
+    for name in ('r1', 'r2', 'r3'):
+        cache.activated(name)
+    assert cache.previous('r3') == 'r2'
+    cache.activated('r2')
+    assert cache.history == ['r1', 'r3', 'r2']
+    assert cache.previous('r2') == 'r3'
+
+
+def test_rollback_release_toggles_between_the_last_two_releases(releases_dir, monkeypatch):
+    hugo_root = releases_dir.parent
+    synced = []
+    def sync_release(config, job, release_dir):
+        synced.append(release_dir.name)
+        return True, None
+    monkeypatch.setattr(deploy, 'sync_release', sync_release)
+    config = {'hugo_root': str(hugo_root), 'keep_releases': 4}
+    cache = make_cache(releases_dir, 4)
+    for name in ('r1', 'r2'):
+        cache.activated(name)
+        deploy.activate_release(hugo_root, releases_dir / name)
+    cache.save()
+
+    job = deploy.DeployJob()
+    job.kind = 'rollback'
+    assert deploy.rollback_release(config, job) == (True, 'Rolled back to release r1')
+    assert deploy.active_release(hugo_root) == 'r1' and synced == ['r1']
+    assert deploy.rollback_release(config, deploy.DeployJob())[1] == 'Rolled back to release r2'
+
+    job = deploy.DeployJob()
+    job.release = 'aaaaaaa3'
+    assert deploy.rollback_release(config, job) == (True, 'Rolled back to release r3')
+    assert deploy.active_release(hugo_root) == 'r3' and synced == ['r1', 'r2', 'r3']
+
+    job = deploy.DeployJob()
+    job.release = 'missing'
+    assert deploy.rollback_release(config, job) == (False, 'Unknown release: missing')
+    assert job.phases[0]['status'] == 'failed' and deploy.active_release(hugo_root) == 'r3'
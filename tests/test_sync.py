@@ -0,0 +1,77 @@
+"""deploy.py多目标同步的测试：一个目标失败时按法定数量判断同步是否成功，成功的目标收到全部文件"""
+
+import json
+import shutil
+
+import pytest
+
+pytest.importorskip('flask')
+pytest.importorskip('dotenv')
+
+import deploy  # noqa: E402
+
+
+@pytest.fixture
+def site(tmp_path):
+    public = tmp_path / 'public'
+    (public / 'posts').mkdir(parents=True)
+    (public / 'index.html').write_text('<html>home</html>')
+    (public / 'posts' / 'hello.html').write_text('<html>hello</html>')
+    return public
+
+
+@pytest.fixture
+def targets(tmp_path):
+    good = tmp_path / 'good'
+    # 目标路径被一个普通文件占用，创建目录时失败
+    bad = tmp_path / 'bad'
+    bad.write_text('not a directory')
+    return [str(good), str(bad)]
+
+
+def copy_site(public):
+    def sync_one(target):
+        shutil.copytree(public, deploy.nginx_target(target), dirs_exist_ok=True)
+        return True, 'copied'
+    return sync_one
+
+
+def synced_files(target):
+    return sorted(path.relative_to(target).as_posix() for path in target.rglob('*') if path.is_file())
+
+
+def test_quorum_defaults_to_all_targets(site, targets):
+    success, results = deploy.sync_fan_out(targets, copy_site(site))
+    assert not success
+    assert [result['status'] for result in results] == ['succeeded', 'failed']
+    assert 'File exists' in results[1]['output']
+
+
+def test_quorum_of_one_tolerates_a_failed_target(site, targets, tmp_path):
+    success, results = deploy.sync_fan_out(targets, copy_site(site), workers=2, quorum=1)
+    assert success
+    assert [result['target'] for result in results] == targets
+    assert [result['status'] for result in results] == ['succeeded', 'failed']
+    assert synced_files(tmp_path / 'good') == ['index.html', 'posts/hello.html']
+
+
+def test_sync_phase_reports_failed_targets(site, targets):
+    job = deploy.DeployJob()
+    config = {'nginx_targets': targets, 'sync_workers': 2, 'sync_quorum': None}
+    success, message = deploy.sync_phase(job, config, copy_site(site))
+    assert not success and message == f"Sync to Nginx failed for {targets[1]}"
+    assert job.phases[0]['status'] == 'failed'
+    assert [result['status'] for result in json.loads(job.phases[0]['output'])] == ['succeeded', 'failed']
+
+    config['sync_quorum'] = 1
+    job = deploy.DeployJob()
+    assert deploy.sync_phase(job, config, copy_site(site)) == (True, None)
+    assert job.phases[0]['status'] == 'succeeded'
+
+
+@pytest.mark.skipif(shutil.which('rsync') is None, reason='需要rsync')
+def test_rsync_to_local_targets(site, targets, tmp_path):
+    sync_one = lambda target: deploy.sync_to_nginx(str(site), target)  # noqa: E731
+    assert not deploy.sync_fan_out(targets, sync_one)[0]
+    assert deploy.sync_fan_out(targets, sync_one, quorum=1)[0]
+    assert synced_files(tmp_path / 'good') == ['index.html', 'posts/hello.html']
@@ -0,0 +1,42 @@
+"""WXR输入的测试：从检查点恢复时统计和产出的文章一致，同一个导出器连续导出时路径索引随清单更新"""
+
+import contextlib
+import io
+
+import pytest
+
+from wp_to_hugo_exporter import WxrExporter
+
+
+@pytest.fixture
+def exporter(tmp_path, write_wxr, wxr_item):
+    wxr = write_wxr([wxr_item(post_id) for post_id in (3, 1, 2)])
+    exporter = WxrExporter(str(tmp_path / 'out'), str(wxr))
+    exporter.batch_size = 2
+    return exporter
+
+
+def _resume(exporter, after_id):
+    with contextlib.redirect_stdout(io.StringIO()) as output:
+        total = exporter.count_posts(('post',), after_id=after_id)
+        ids = [post['ID'] for batch in exporter.iter_post_batches(('post',), after_id=after_id) for post in batch]
+    return total, ids, output.getvalue()
+
+
+def test_resume_after_committed_post(exporter):
+    total, ids, _ = _resume(exporter, 1)
+    assert (total, ids) == (1, [2])
+
+
+def test_resume_from_missing_post_exports_everything(exporter):
+    total, ids, output = _resume(exporter, 99)
+    assert (total, ids) == (3, [3, 1, 2])
+    assert '不在WXR文件中' in output
+
+
+def test_path_freed_by_removed_post_is_reused_by_the_same_exporter(export_wxr, wxr_item):
+    # 常驻模式中同一个导出器对象连续导出：1占用p1，随后被删除，之后同名的5应得到原来的路径
+    exporter = export_wxr([wxr_item(1)], incremental=True)
+    export_wxr([], exporter=exporter)
+    export_wxr([wxr_item(5, 'p1')], exporter=exporter)
+    assert exporter.manifest['posts']['5']['url'] == '/posts/p1/'
@@ -0,0 +1,583 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""WordPress到Hugo导出工具的基准测试
+
+生成指定规模的合成WordPress数据（文章、页面、WooCommerce产品、图库、分类和标签），
+写入内嵌的SQLite替身数据库或本地MariaDB/MySQL（--wxr时再转储为WXR文件，经WXR输入导出），
+然后对导出的查询、渲染、写文件阶段以及deploy.py的内容同步分别计时，
+结果以JSON输出，便于在不同提交之间比较。
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import sqlite3
+import argparse
+import platform
+import tempfile
+import datetime
+import contextlib
+import subprocess
+from pathlib import Path
+
+try:
+    import pymysql
+except ImportError:
+    # 使用内嵌SQLite或WXR输入时不需要pymysql
+    pymysql = None
+
+import wp_to_hugo_exporter
+from wp_to_hugo_exporter import DatabaseConnection, WpToHugoExporter, WxrExporter
+
+# 默认测试规模（文章数）
+DEFAULT_SCALES = (1000,)
+
+# MySQL模式下使用独立的表前缀，不影响同库中的其他表
+MYSQL_PREFIX = 'wpbench_'
+
+SCHEMA = """
+CREATE TABLE {prefix}posts (
+    ID BIGINT NOT NULL PRIMARY KEY,
+    post_author BIGINT NOT NULL DEFAULT 1,
+    post_date DATETIME NOT NULL,
+    post_modified DATETIME NOT NULL,
+    post_content LONGTEXT NOT NULL,
+    post_title TEXT NOT NULL,
+    post_excerpt TEXT NOT NULL,
+    post_status VARCHAR(20) NOT NULL,
+    post_name VARCHAR(200) NOT NULL,
+    post_parent BIGINT NOT NULL DEFAULT 0,
+    guid VARCHAR(255) NOT NULL,
+    menu_order INT NOT NULL DEFAULT 0,
+    post_type VARCHAR(20) NOT NULL,
+    post_mime_type VARCHAR(100) NOT NULL DEFAULT ''
+);
+CREATE INDEX {prefix}type_status_date ON {prefix}posts (post_type, post_status, post_date, ID);
+CREATE INDEX {prefix}post_modified ON {prefix}posts (post_modified);
+CREATE TABLE {prefix}postmeta (
+    meta_id BIGINT NOT NULL PRIMARY KEY,
+    post_id BIGINT NOT NULL,
+    meta_key VARCHAR(191),
+    meta_value LONGTEXT
+);
+CREATE INDEX {prefix}postmeta_post_id ON {prefix}postmeta (post_id);
+CREATE INDEX {prefix}postmeta_meta_key ON {prefix}postmeta (meta_key);
+CREATE TABLE {prefix}terms (
+    term_id BIGINT NOT NULL PRIMARY KEY,
+    name VARCHAR(200) NOT NULL,
+    slug VARCHAR(200) NOT NULL
+);
+CREATE TABLE {prefix}term_taxonomy (
+    term_taxonomy_id BIGINT NOT NULL PRIMARY KEY,
+    term_id BIGINT NOT NULL,
+    taxonomy VARCHAR(32) NOT NULL,
+    description LONGTEXT NOT NULL,
+    parent BIGINT NOT NULL DEFAULT 0,
+    count BIGINT NOT NULL DEFAULT 0
+);
+CREATE TABLE {prefix}term_relationships (
+    object_id BIGINT NOT NULL,
+    term_taxonomy_id BIGINT NOT NULL,
+    term_order INT NOT NULL DEFAULT 0,
+    PRIMARY KEY (object_id, term_taxonomy_id)
+);
+CREATE INDEX {prefix}term_taxonomy_id ON {prefix}term_relationships (term_taxonomy_id);
+CREATE TABLE {prefix}options (
+    option_id BIGINT NOT NULL PRIMARY KEY,
+    option_name VARCHAR(191) NOT NULL UNIQUE,
+    option_value LONGTEXT NOT NULL
+)
+"""
+
+TABLES = ('posts', 'postmeta', 'terms', 'term_taxonomy', 'term_relationships', 'options')
+
+# 合成站点的永久链接设置
+OPTIONS = {
+    'home': 'https://example.com',
+    'permalink_structure': '/%year%/%monthnum%/%postname%/',
+}
+
+# 转储WXR文件时使用的命名空间（与WordPress的WXR 1.2相同）
+WXR_HEADER = """<?xml version="1.0" encoding="UTF-8" ?>
+<rss version="2.0"
+    xmlns:excerpt="http://wordpress.org/export/1.2/excerpt/"
+    xmlns:content="http://purl.org/rss/1.0/modules/content/"
+    xmlns:wfw="http://wellformedweb.org/CommentAPI/"
+    xmlns:dc="http://purl.org/dc/elements/1.1/"
+    xmlns:wp="http://wordpress.org/export/1.2/">
+<channel>
+    <title>Synthetic</title>
+    <link>https://example.com</link>
+    <wp:wxr_version>1.2</wp:wxr_version>
+"""
+WXR_FOOTER = """</channel>
+</rss>
+"""
+
+
+class SQLiteConnection:
+    """用SQLite模拟导出工具使用的那部分pymysql连接接口
+
+    把%s占位符转换为?，以字典形式返回行，并把sqlite3.Error包装为pymysql.Error，
+    让导出工具的错误处理路径保持不变。
+    """
+
+    def __init__(self, path=':memory:'):
+        self.db = sqlite3.connect(path, check_same_thread=False)
+
+    def cursor(self, cursor_class=None):
+        return SQLiteCursor(self.db)
+
+    def commit(self):
+        self.db.commit()
+
+    def ping(self, reconnect=False):
+        pass
+
+    def close(self):
+        self.db.close()
+
+
+class SQLiteCursor:
+    """SQLiteConnection的游标"""
+
+    def __init__(self, db):
+        self._cursor = db.cursor()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self._cursor.close()
+
+    def execute(self, query, params=()):
+        try:
+            self._cursor.execute(query.replace('%s', '?'), tuple(params))
+        except sqlite3.Error as e:
+            if pymysql is None:
+                raise
+            raise pymysql.Error(str(e)) from e
+
+    def executemany(self, query, rows):
+        try:
+            self._cursor.executemany(query.replace('%s', '?'), rows)
+        except sqlite3.Error as e:
+            if pymysql is None:
+                raise
+            raise pymysql.Error(str(e)) from e
+
+    def fetchall(self):
+        columns = [column[0] for column in self._cursor.description]
+        return [dict(zip(columns, row)) for row in self._cursor.fetchall()]
+
+
+class SyntheticSite:
+    """合成WordPress数据生成器
+
+    按post:page:product约7:1:2的比例生成已发布内容，另有少量草稿；
+    每篇内容带Gutenberg区块、图片和列表，产品带SKU、购买链接和图库。
+    """
+
+    def __init__(self, posts, seed=42, content_kb=4):
+        self.posts = posts
+        self.random = random.Random(seed)
+        self.content_kb = content_kb
+        self.categories = [f'分类 {i}' for i in range(40)]
+        self.tags = [f'标签 {i}' for i in range(400)]
+        self.product_cats = [f'产品分类 {i}' for i in range(20)]
+        self.product_tags = [f'产品标签 {i}' for i in range(100)]
+
+    def load(self, connection, prefix):
+        """建表并批量写入数据"""
+        with connection.cursor() as cursor:
+            for statement in SCHEMA.format(prefix=prefix).split(';'):
+                if statement.strip():
+                    cursor.execute(statement)
+
+            cursor.executemany(f"INSERT INTO {prefix}options (option_id, option_name, option_value) "
+                               "VALUES (%s, %s, %s)",
+                               [(i, name, value) for i, (name, value) in enumerate(OPTIONS.items(), 1)])
+            term_ids = self._load_terms(cursor, prefix)
+
+            posts, meta, relationships = [], [], []
+            meta_id = 0
+            attachment_id = self.posts + 1
+            base_date = datetime.datetime(2015, 1, 1)
+            for post_id in range(1, self.posts + 1):
+                roll = self.random.random()
+                post_type = 'post' if roll < 0.7 else 'page' if roll < 0.8 else 'product'
+                status = 'draft' if self.random.random() < 0.05 else 'publish'
+                date = base_date + datetime.timedelta(minutes=post_id * 97)
+                posts.append((post_id, date, date, self._content(post_id), f'合成文章 "{post_id}"', '',
+                              status, f'synthetic-{post_id}', 0, f'https://example.com/?p={post_id}', post_type, ''))
+
+                # 特色图片
+                meta_id += 1
+                meta.append((meta_id, post_id, '_thumbnail_id', str(attachment_id)))
+                posts.append(self._attachment(attachment_id, post_id, date))
+                attachment_id += 1
+
+                if post_type == 'product':
+                    gallery = []
+                    for _ in range(self.random.randint(2, 6)):
+                        posts.append(self._attachment(attachment_id, post_id, date))
+                        gallery.append(str(attachment_id))
+                        attachment_id += 1
+                    for key, value in (('_sku', f'SKU-{post_id:06d}'),
+                                       ('_buy_link', f'https://shop.example.com/buy/{post_id}'),
+                                       ('_product_image_gallery', ','.join(gallery)),
+                                       ('_short_description', f'产品 {post_id} 的简短描述')):
+                        meta_id += 1
+                        meta.append((meta_id, post_id, key, value))
+                    taxonomies = (('product_cat', 1), ('product_tag', 3))
+                else:
+                    taxonomies = (('category', 2), ('post_tag', 5))
+
+                for taxonomy, count in taxonomies:
+                    for term_taxonomy_id in self.random.sample(term_ids[taxonomy], count):
+                        relationships.append((post_id, term_taxonomy_id))
+
+                if len(posts) >= 1000:
+                    self._flush(cursor, prefix, posts, meta, relationships)
+                    posts, meta, relationships = [], [], []
+            self._flush(cursor, prefix, posts, meta, relationships)
+        connection.commit()
+
+    def _load_terms(self, cursor, prefix):
+        term_ids = {}
+        terms, taxonomies = [], []
+        term_id = 0
+        for taxonomy, names in (('category', self.categories), ('post_tag', self.tags),
+                                ('product_cat', self.product_cats), ('product_tag', self.product_tags)):
+            term_ids[taxonomy] = []
+            for name in names:
+                term_id += 1
+                terms.append((term_id, name, f'term-{term_id}'))
+                taxonomies.append((term_id, term_id, taxonomy, ''))
+                term_ids[taxonomy].append(term_id)
+        cursor.executemany(f"INSERT INTO {prefix}terms (term_id, name, slug) VALUES (%s, %s, %s)", terms)
+        cursor.executemany(f"INSERT INTO {prefix}term_taxonomy (term_taxonomy_id, term_id, taxonomy, description) "
+                           "VALUES (%s, %s, %s, %s)", taxonomies)
+        return term_ids
+
+    def _flush(self, cursor, prefix, posts, meta, relationships):
+        if posts:
+            cursor.executemany(
+                f"INSERT INTO {prefix}posts (ID, post_date, post_modified, post_content, post_title, post_excerpt, "
+                "post_status, post_name, post_parent, guid, post_type, post_mime_type) "
+                "VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)", posts)
+        if meta:
+            cursor.executemany(
+                f"INSERT INTO {prefix}postmeta (meta_id, post_id, meta_key, meta_value) VALUES (%s, %s, %s, %s)", meta)
+        if relationships:
+            cursor.executemany(
+                f"INSERT INTO {prefix}term_relationships (object_id, term_taxonomy_id) VALUES (%s, %s)", relationships)
+
+    def _attachment(self, attachment_id, parent_id, date):
+        path = f"{date:%Y/%m}/image-{attachment_id}.jpg"
+        return (attachment_id, date, date, '', f'image-{attachment_id}', '', 'inherit', f'image-{attachment_id}',
+                parent_id, f'https://example.com/wp-content/uploads/{path}', 'attachment', 'image/jpeg')
+
+    def _content(self, post_id):
+        """生成约content_kb KB的Gutenberg风格HTML"""
+        blocks = []
+        size = 0
+        index = 0
+        while size < self.content_kb * 1024:
+            index += 1
+            kind = index % 5
+            if kind == 0:
+                block = (f'<!-- wp:heading --><h2>第 {index} 节 &amp; 小结</h2><!-- /wp:heading -->')
+            elif kind == 1:
+                block = (f'<!-- wp:image --><figure class="wp-block-image"><img src="https://example.com/wp-content/'
+                         f'uploads/2020/01/inline-{post_id}-{index}.jpg" alt="图 {index}"/></figure><!-- /wp:image -->')
+            elif kind == 2:
+                items = ''.join(f'<li>列表项 {i} <a href="https://example.com/p/{i}">链接</a></li>' for i in range(5))
+                block = f'<!-- wp:list --><ul>{items}</ul><!-- /wp:list -->'
+            else:
+                words = ' '.join(self.random.choice(('WordPress', 'Hugo', '导出', '静态', '性能', 'Markdown'))
+                                 for _ in range(60))
+                block = f'<!-- wp:paragraph --><p>{words} <strong>加粗</strong> <em>斜体</em></p><!-- /wp:paragraph -->'
+            blocks.append(block)
+            size += len(block.encode('utf-8'))
+        return '\n\n'.join(blocks)
+
+
+class PhaseTimer:
+    """累计各阶段耗时和调用次数"""
+
+    def __init__(self):
+        self.phases = {}
+
+    @contextlib.contextmanager
+    def measure(self, phase):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(phase, time.perf_counter() - start)
+
+    def add(self, phase, seconds):
+        entry = self.phases.setdefault(phase, {'seconds': 0.0, 'calls': 0})
+        entry['seconds'] += seconds
+        entry['calls'] += 1
+
+    def report(self):
+        return {phase: {'seconds': round(entry['seconds'], 4), 'calls': entry['calls']}
+                for phase, entry in self.phases.items()}
+
+
+class TimedExporter(WpToHugoExporter):
+    """按阶段计时的导出工具
+
+    query: 所有SQL查询（文章分页、计数和批量预取）
+    prepare: 组装渲染数据（禁用预取时包含逐篇查询的时间）
+    render: 渲染Markdown；并行模式下为等待进程池结果的时间
+    write: 写文件和更新清单
+    """
+
+    def __init__(self, wp_root, timer):
+        super().__init__(wp_root)
+        self.timer = timer
+
+    def _query_all(self, query, params=()):
+        with self.timer.measure('query'):
+            return super()._query_all(query, params)
+
+    def build_post_data(self, post):
+        with self.timer.measure('prepare'):
+            return super().build_post_data(post)
+
+    def write_batch(self, results):
+        super().write_batch(self._timed_results(results))
+
+    def _timed_results(self, results):
+        iterator = iter(results)
+        while True:
+            start = time.perf_counter()
+            try:
+                result = next(iterator)
+            except StopIteration:
+                return
+            self.timer.add('render', time.perf_counter() - start)
+            yield result
+
+    def write_post(self, data, md_content):
+        with self.timer.measure('write'):
+            return super().write_post(data, md_content)
+
+
+class TimedWxrExporter(TimedExporter, WxrExporter):
+    """按阶段计时的WXR输入导出工具（没有SQL查询，query为0）"""
+
+
+def cdata(text):
+    """把文本包装为CDATA节，与WordPress的wxr_cdata相同"""
+    return '<![CDATA[' + str(text).replace(']]>', ']]]]><![CDATA[>') + ']]>'
+
+
+def write_wxr(connection, prefix, path, batch_size=1000):
+    """把数据库中的内容按批转储为WXR文件"""
+    def format_date(value):
+        return value.strftime('%Y-%m-%d %H:%M:%S') if isinstance(value, datetime.datetime) else str(value)
+
+    cursor_class = pymysql.cursors.DictCursor if pymysql else None
+    permalinks = wp_to_hugo_exporter.PermalinkStructure(OPTIONS)
+    with connection.cursor(cursor_class) as cursor, open(path, 'w', encoding='utf-8') as f:
+        f.write(WXR_HEADER)
+        last_id = 0
+        while True:
+            cursor.execute(f"SELECT ID, post_type, post_title, post_name, post_date, post_modified, post_content, "
+                           f"post_status, post_parent, guid FROM {prefix}posts WHERE ID > %s ORDER BY ID LIMIT %s",
+                           (last_id, batch_size))
+            posts = cursor.fetchall()
+            if not posts:
+                break
+            ids = tuple(post['ID'] for post in posts)
+            placeholders = ', '.join(['%s'] * len(ids))
+            meta, terms = {}, {}
+            cursor.execute(f"SELECT post_id, meta_key, meta_value FROM {prefix}postmeta "
+                           f"WHERE post_id IN ({placeholders}) ORDER BY meta_id", ids)
+            for row in cursor.fetchall():
+                meta.setdefault(row['post_id'], []).append(row)
+            cursor.execute(f"SELECT tr.object_id, tt.taxonomy, t.name, t.slug FROM {prefix}terms t "
+                           f"JOIN {prefix}term_taxonomy tt ON t.term_id = tt.term_id "
+                           f"JOIN {prefix}term_relationships tr ON tt.term_taxonomy_id = tr.term_taxonomy_id "
+                           f"WHERE tr.object_id IN ({placeholders})", ids)
+            for row in cursor.fetchall():
+                terms.setdefault(row['object_id'], []).append(row)
+
+            for post in posts:
+                # 与WordPress导出一样，<link>是当前永久链接（合成数据没有多级页面）
+                link = permalinks.path(post)
+                lines = ['    <item>',
+                         f"        <title>{cdata(post['post_title'])}</title>",
+                         f"        <link>{OPTIONS['home']}{link}</link>",
+                         f"        <guid isPermaLink=\"false\">{cdata(post['guid'])}</guid>",
+                         f"        <content:encoded>{cdata(post['post_content'])}</content:encoded>",
+                         f"        <wp:post_id>{post['ID']}</wp:post_id>",
+                         f"        <wp:post_date>{cdata(format_date(post['post_date']))}</wp:post_date>",
+                         f"        <wp:post_modified>{cdata(format_date(post['post_modified']))}</wp:post_modified>",
+                         f"        <wp:post_name>{cdata(post['post_name'])}</wp:post_name>",
+                         f"        <wp:post_parent>{post['post_parent']}</wp:post_parent>",
+                         f"        <wp:status>{cdata(post['post_status'])}</wp:status>",
+                         f"        <wp:post_type>{cdata(post['post_type'])}</wp:post_type>"]
+                if post['post_type'] == 'attachment':
+                    lines.append(f"        <wp:attachment_url>{cdata(post['guid'])}</wp:attachment_url>")
+                for term in terms.get(post['ID'], []):
+                    lines.append(f"        <category domain=\"{term['taxonomy']}\" nicename=\"{term['slug']}\">"
+                                 f"{cdata(term['name'])}</category>")
+                for row in meta.get(post['ID'], []):
+                    lines.append(f"        <wp:postmeta><wp:meta_key>{cdata(row['meta_key'])}</wp:meta_key>"
+                                 f"<wp:meta_value>{cdata(row['meta_value'])}</wp:meta_value></wp:postmeta>")
+                lines.append('    </item>\n')
+                f.write('\n'.join(lines))
+            last_id = ids[-1]
+        f.write(WXR_FOOTER)
+
+
+def git_revision():
+    """当前提交，用于比较不同提交的结果"""
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=os.path.dirname(os.path.abspath(__file__)),
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def connect(args, scale):
+    """创建并填充测试数据库，返回(连接, 表前缀)"""
+    if args.mysql_host:
+        if pymysql is None:
+            sys.exit("使用MariaDB/MySQL需要安装pymysql (pip install pymysql)")
+        connection = pymysql.connect(host=args.mysql_host, user=args.mysql_user, password=args.mysql_password,
+                                     db=args.mysql_db, charset='utf8mb4')
+        with connection.cursor() as cursor:
+            for table in TABLES:
+                cursor.execute(f"DROP TABLE IF EXISTS {MYSQL_PREFIX}{table}")
+        prefix = MYSQL_PREFIX
+    else:
+        connection = SQLiteConnection()
+        prefix = 'wp_'
+    SyntheticSite(scale, seed=args.seed, content_kb=args.content_kb).load(connection, prefix)
+    return connection, prefix
+
+
+def run_export(connection, prefix, wp_root, args, wxr_file=None):
+    """执行一次导出并返回计时结果；指定wxr_file时从WXR文件导出"""
+    timer = PhaseTimer()
+    if wxr_file:
+        exporter = TimedWxrExporter(wp_root, timer)
+        exporter.wxr_file = wxr_file
+    else:
+        exporter = TimedExporter(wp_root, timer)
+        # 所有导出共用同一个连接，不设置超时和快照
+        exporter.db = DatabaseConnection(lambda: connection)
+        exporter.db_prefix = prefix
+    exporter.batch_size = args.batch_size
+    exporter.workers = args.workers
+    exporter.prefetch_enabled = not args.no_prefetch
+
+    start = time.perf_counter()
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        ok = exporter.export_content('any')
+    total = time.perf_counter() - start
+    exported = exporter.export_count + exporter.skipped_count
+    return {
+        'ok': ok,
+        'seconds': round(total, 4),
+        'exported': exported,
+        'written': exporter.export_count,
+        'skipped': exporter.skipped_count,
+        'errors': exporter.error_count,
+        'posts_per_second': round(exported / total, 1) if total else None,
+        'phases': timer.report(),
+    }
+
+
+def run_deploy_copy(wp_root):
+    """对deploy.py的内容同步计时（需要安装deploy.py的依赖）"""
+    try:
+        import deploy
+    except ImportError as e:
+        return {'skipped': f'deploy.py不可用: {e}'}
+    src = os.path.join(wp_root, 'wp-content', 'md', 'content')
+    dest = os.path.join(wp_root, 'hugo', 'content')
+    results = {}
+    for run in ('cold', 'warm'):
+        start = time.perf_counter()
+        with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+            stats = deploy.copy_markdown_files(src, dest)
+        results[run] = dict(stats, seconds=round(time.perf_counter() - start, 4))
+    return results
+
+
+def benchmark(scale, args):
+    """在一个规模下运行全部测试"""
+    print(f"生成 {scale} 篇合成文章...", file=sys.stderr)
+    start = time.perf_counter()
+    connection, prefix = connect(args, scale)
+    result = {'posts': scale, 'load_seconds': round(time.perf_counter() - start, 4)}
+
+    with tempfile.TemporaryDirectory(prefix='wp-bench-') as wp_root:
+        wxr_file = None
+        if args.wxr:
+            wxr_file = os.path.join(wp_root, 'export.xml')
+            start = time.perf_counter()
+            write_wxr(connection, prefix, wxr_file)
+            result['wxr_seconds'] = round(time.perf_counter() - start, 4)
+            result['wxr_bytes'] = os.path.getsize(wxr_file)
+        # cold: 空目录全量导出；warm: 内容未变化时再次导出
+        for run in ('cold', 'warm'):
+            print(f"导出 ({run})...", file=sys.stderr)
+            result[run] = run_export(connection, prefix, wp_root, args, wxr_file)
+        if not args.no_deploy:
+            result['deploy_copy'] = run_deploy_copy(wp_root)
+    connection.close()
+    return result
+
+
+def main():
+    """主函数"""
+    parser = argparse.ArgumentParser(description='WordPress到Hugo导出工具的基准测试')
+    parser.add_argument('--scale', default=','.join(map(str, DEFAULT_SCALES)),
+                        help='以逗号分隔的文章数量，例如 1000,10000,100000 (默认: 1000)')
+    parser.add_argument('--content-kb', type=int, default=4, help='每篇文章正文的大约大小 (KB)')
+    parser.add_argument('--seed', type=int, default=42, help='随机数种子')
+    parser.add_argument('--batch-size', type=int, default=wp_to_hugo_exporter.DEFAULT_BATCH_SIZE,
+                        help='导出批大小')
+    parser.add_argument('--workers', type=int, default=1, help='导出渲染进程数')
+    parser.add_argument('--no-prefetch', action='store_true', help='禁用批量预取')
+    parser.add_argument('--no-deploy', action='store_true', help='不测试deploy.py的内容同步')
+    parser.add_argument('--wxr', action='store_true', help='把合成数据转储为WXR文件，测试WXR输入')
+    parser.add_argument('--mysql-host', help='使用MariaDB/MySQL代替内嵌SQLite')
+    parser.add_argument('--mysql-user', default='root')
+    parser.add_argument('--mysql-password', default='')
+    parser.add_argument('--mysql-db', default='wpbench',
+                        help=f'MySQL数据库名，会重建其中以{MYSQL_PREFIX}开头的表')
+    parser.add_argument('--output', help='结果JSON文件 (默认输出到标准输出)')
+
+    args = parser.parse_args()
+
+    report = {
+        'revision': git_revision(),
+        'timestamp': datetime.datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'backend': 'wxr' if args.wxr else 'mysql' if args.mysql_host else 'sqlite',
+        'options': {'batch_size': args.batch_size, 'workers': args.workers,
+                    'prefetch': not args.no_prefetch, 'content_kb': args.content_kb},
+        'results': [benchmark(int(scale), args) for scale in args.scale.split(',') if scale.strip()],
+    }
+
+    output = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.output:
+        Path(args.output).write_text(output + '\n', encoding='utf-8')
+    else:
+        print(output)
+
+if __name__ == "__main__":
+    main()
@@ -4,29 +4,1901 @@
 import os
 import re
 import sys
-import pymysql
 import datetime
 import html
+import json
+import time
+import hashlib
 import argparse
+import collections
+import queue
+import shutil
+import signal
+import threading
+import http.client
+import urllib.parse
+import urllib.request
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from html.parser import HTMLParser
 from pathlib import Path
+from xml.etree import ElementTree
+
+try:
+    import pymysql
+    DB_ERRORS = (pymysql.Error,)
+except ImportError:
+    # 只从WXR文件导出时不需要pymysql
+    pymysql = None
+    DB_ERRORS = ()
+
+# 每批读取并预取的文章数量
+DEFAULT_BATCH_SIZE = 500
+
+# 导出时需要从posts表读取的列
+EXPORT_COLUMNS = ('ID', 'post_type', 'post_title', 'post_name', 'post_date', 'post_modified', 'post_content',
+                  'post_parent', 'post_author')
+
+# 并行导出时读库阶段最多领先写文件阶段的批数
+PIPELINE_DEPTH = 2
+
+# 数据库访问层：查询超时（秒）、可重试错误的重试次数和退避时间（秒）
+DEFAULT_QUERY_TIMEOUT = 300
+DEFAULT_DB_RETRIES = 3
+DB_RETRY_BACKOFF = 1.0
+DB_RETRY_MAX_DELAY = 30
+DB_CONNECT_TIMEOUT = 10
+# 空闲超过该秒数的连接取出时先ping
+DB_PING_INTERVAL = 60
+# 可以换一个连接重试的MySQL/MariaDB错误码：无法连接、连接断开、锁等待超时、
+# 查询超时（MySQL 3024、MariaDB 1969）、查询或连接被KILL
+RETRYABLE_DB_ERRORS = {2003, 2006, 2013, 2055, 1205, 3024, 1969, 1317, 1927, 4031}
+
+# 常驻模式：轮询间隔、定期增量检查间隔和发布防抖时间（秒）；持续有修改时，
+# 发布最多推迟防抖时间的PUBLISH_MAX_DELAY倍
+DEFAULT_WATCH_INTERVAL = 5
+DEFAULT_RESYNC_INTERVAL = 600
+DEFAULT_PUBLISH_DEBOUNCE = 30
+PUBLISH_MAX_DELAY = 5
+PUBLISH_TIMEOUT = 30
+
+# 输出目录布局：flat全部放在类型目录下，date按年/月分子目录，hash按文件名哈希的前几位分子目录
+CONTENT_LAYOUTS = ('flat', 'date', 'hash')
+DEFAULT_LAYOUT = 'flat'
+HASH_SHARD_WIDTH = 2
+# 非flat布局时front matter中url的默认模板，与flat布局下Hugo由路径生成的URL相同
+DEFAULT_URL_TEMPLATE = '/:section/:slug/'
+URL_TEMPLATE_RE = re.compile(r':(section|year|month|day|slug|name|id)\b')
+
+# WordPress永久链接：从wp_options读取的设置、结构中的%标签%、WooCommerce产品基础路径、
+# 没有分类项目时%category%的取值，以及记录旧slug和旧发布日期的postmeta（旧链接的来源）
+PERMALINK_OPTIONS = ('permalink_structure', 'home', 'show_on_front', 'page_on_front', 'woocommerce_permalinks')
+PERMALINK_TAG_RE = re.compile(r'%([a-z_]+)%')
+PERMALINK_DATE_TAGS = {'year': '%Y', 'monthnum': '%m', 'day': '%d', 'hour': '%H', 'minute': '%M', 'second': '%S'}
+WOOCOMMERCE_PRODUCT_BASE_RE = re.compile(r'"product_base";s:\d+:"([^"]*)"')
+DEFAULT_PRODUCT_BASE = 'product'
+DEFAULT_TERM_SLUG = 'uncategorized'
+REDIRECT_META_KEYS = ('_wp_old_slug', '_wp_old_date')
+# 页面祖先链的最大深度，防止post_parent成环
+MAX_PAGE_DEPTH = 32
+
+# 增量导出清单文件名（保存在wp-content/md下）
+MANIFEST_FILENAME = '.export-manifest.json'
+MANIFEST_VERSION = 2
+
+# 检查点日志：与清单同名的.checkpoint.jsonl，每写完一批追加一行
+# （版本2起变更记录的路径相对于站点目录）
+CHECKPOINT_SUFFIX = '.checkpoint.jsonl'
+CHECKPOINT_VERSION = 2
+
+# 页面包资源：识别为资源的扩展名、共享资源目录、下载线程数和超时（秒）
+ASSET_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.gif', '.webp', '.avif', '.svg', '.bmp', '.ico')
+ASSET_URL_RE = re.compile(r'(?:src|href)\s*=\s*["\']([^"\']+)["\']', re.IGNORECASE)
+ASSET_STORE_DIRNAME = '.assets'
+DEFAULT_ASSET_WORKERS = 8
+ASSET_TIMEOUT = 30
+
+# 跨文章共享的附件和分类项目查找缓存的容量（条目数）、预热时每个查询读取的附件数
+ATTACHMENT_CACHE_SIZE = 50000
+TERM_CACHE_SIZE = 50000
+WARM_UP_BATCH = 5000
+
+# 指标报告中列出的最慢查询和文章数量
+SLOWEST_LIMIT = 10
+
+# 内置内容类型，可以用--type-config配置文件覆盖或增加
+DEFAULT_TYPE_CONFIG = {
+    'post': {'layout': 'post', 'dir': 'posts'},
+    'page': {'layout': 'page', 'dir': 'pages'},
+    'product': {'layout': 'product', 'dir': 'products', 'woocommerce': True},
+}
+# 未配置taxonomies时的分类法 -> front matter字段
+DEFAULT_TAXONOMIES = {'category': 'categories', 'post_tag': 'tags'}
+# 所有内容类型都会读取的postmeta键（特色图片）
+BASE_META_KEYS = ('_thumbnail_id',)
+# WooCommerce产品字段使用的分类法和postmeta键
+WOOCOMMERCE_TAXONOMIES = ('product_cat', 'product_tag')
+WOOCOMMERCE_META_KEYS = ('_sku', '_buy_link', '_product_image_gallery', '_short_description')
+# 由导出工具生成、不能用作自定义字段名的front matter字段
+RESERVED_FIELDS = {'layout', 'title', 'slug', 'permalink', 'url', 'aliases', 'date', 'featureImage', 'image', 'sku',
+                   'product_categories', 'product_tags', 'buy_link', 'images', 'description'}
+
+# 搜索索引：状态文件名（保存在清单旁）、文档分片大小和分词规则
+INDEX_STATE_FILENAME = '.search-index-state.json'
+INDEX_STATE_VERSION = 1
+SEARCH_DOCS_BLOCK = 1000
+INDEX_MARKUP_RE = re.compile(r'<[^>]*>|\[/?[A-Za-z][\w-]*(?:\s[^\]]*)?\]')
+CJK_RUN_RE = re.compile(r'[\u3040-\u30ff\u3400-\u4dbf\u4e00-\u9fff\uac00-\ud7af\uf900-\ufaff]+')
+INDEX_WORD_RE = re.compile(r'[^\W_]+')
+INDEX_WORD_LENGTH = (2, 32)
+
+# ---------------------------------------------------------------------------
+# HTML到Markdown转换
+# ---------------------------------------------------------------------------
+
+# 预编译的正则表达式
+SHORTCODE_ATTR_RE = re.compile(
+    r'([\w-]+)\s*=\s*"([^"]*)"|([\w-]+)\s*=\s*\'([^\']*)\'|([\w-]+)\s*=\s*([^\s\'"]+)|"([^"]*)"|(\S+)')
+WHITESPACE_RE = re.compile(r'[ \t\r\n\f]+')
+BLANK_LINES_RE = re.compile(r'\n[ \t]*(?:\n[ \t]*)+\n')
+LANGUAGE_CLASS_RE = re.compile(r'(?:^|\s)(?:language|lang)-([\w+#-]+)')
+BACKTICK_RUN_RE = re.compile(r'`+')
+# 普通文本中需要转义的字符：Markdown语法字符、不在单词中间的_、可能被当作HTML标签或实体的<和&，
+# 以及会被Hugo当作短代码开头的{{<和{{%
+MARKDOWN_ESCAPE_RE = re.compile(r'[\\`*~\[\]]|(?<![^\W_])_|_(?![^\W_])|<(?=[A-Za-z/!?])|&(?=#?\w+;)|\{\{(?=[<%])')
+# 出现在行首时会被解析为有序列表、标题、无序列表、引用或Setext标题下划线的文本
+MARKDOWN_LINE_START_RE = re.compile(r'(\d{1,9})[.)](?:\s|$)|#{1,6}(?:\s|$)|[-+>]|=+\s*$')
+# 强调标签对应的Markdown标记
+EMPHASIS_MARKS = {'strong': '**', 'b': '**', 'em': '*', 'i': '*', 'del': '~~', 's': '~~', 'strike': '~~'}
+# 包围短代码处理函数输出的标记（Unicode私用区字符），转换器原样输出其中的文本
+SHORTCODE_OUTPUT_START = '\ue000'
+SHORTCODE_OUTPUT_END = '\ue001'
+SHORTCODE_OUTPUT_RE = re.compile('([\ue000\ue001])')
+
+# [embed]链接到Hugo内置短代码的映射
+EMBED_PROVIDERS = (
+    (re.compile(r'(?:youtube\.com/watch\?(?:.*&)?v=|youtu\.be/|youtube\.com/embed/)([\w-]{6,})'), 'youtube'),
+    (re.compile(r'vimeo\.com/(?:video/)?(\d+)'), 'vimeo'),
+)
+
+# 标题标签对应的Markdown前缀
+HEADING_TAGS = {f'h{level}': '#' * level for level in range(1, 7)}
+# 只作为块级分隔的容器标签
+BLOCK_TAGS = {'p', 'div', 'section', 'article', 'header', 'footer', 'aside', 'nav', 'main',
+              'figure', 'figcaption', 'address', 'center', 'dl', 'dt', 'dd'}
+# 原样保留的嵌入标签（Hugo启用unsafe渲染时可直接输出）
+RAW_HTML_TAGS = {'iframe', 'video', 'audio', 'object', 'embed', 'source', 'track', 'svg'}
+# 内容完全丢弃的标签
+DROP_TAGS = {'script', 'style', 'noscript', 'template'}
+VOID_TAGS = {'area', 'base', 'br', 'col', 'embed', 'hr', 'img', 'input', 'link', 'meta',
+             'source', 'track', 'wbr'}
+
+# 短代码处理函数注册表: 名称 -> handler(attrs, content) -> str
+SHORTCODE_HANDLERS = {}
+_shortcode_pattern = None
+
+
+def register_shortcode(name, handler=None):
+    """注册短代码处理函数，可作为装饰器使用
+    
+    handler接收(attrs, content)：attrs是属性字典（位置参数以0、1...为键），
+    content是包围型短代码的内部内容（自闭合时为None），返回替换后的HTML或Markdown。
+    返回值中的文本不做Markdown转义，因此可以直接输出Markdown或Hugo短代码。
+    handler为False时表示删除该短代码但保留其内容。
+    """
+    def decorator(func):
+        global _shortcode_pattern
+        SHORTCODE_HANDLERS[name] = func
+        _shortcode_pattern = None
+        return func
+    if handler is None:
+        return decorator
+    return decorator(handler)
+
+
+def _get_shortcode_pattern():
+    """根据已注册的短代码名称编译（并缓存）匹配正则"""
+    global _shortcode_pattern
+    if _shortcode_pattern is None:
+        names = '|'.join(sorted((re.escape(name) for name in SHORTCODE_HANDLERS), key=len, reverse=True))
+        _shortcode_pattern = re.compile(
+            r'\[(\[?)(' + names + r')(?![\w-])([^\]]*?)(?:/\]|\](?:(.*?)\[/\2\])?)(\]?)', re.DOTALL)
+    return _shortcode_pattern
+
+
+def parse_shortcode_attrs(text):
+    """解析短代码属性字符串"""
+    attrs = {}
+    position = 0
+    for match in SHORTCODE_ATTR_RE.finditer(html.unescape(text)):
+        if match.group(1):
+            attrs[match.group(1).lower()] = match.group(2)
+        elif match.group(3):
+            attrs[match.group(3).lower()] = match.group(4)
+        elif match.group(5):
+            attrs[match.group(5).lower()] = match.group(6)
+        else:
+            attrs[position] = match.group(7) if match.group(7) is not None else match.group(8)
+            position += 1
+    return attrs
+
+
+def expand_shortcodes(content):
+    """按注册表展开短代码，未注册的短代码原样保留"""
+    if not SHORTCODE_HANDLERS or '[' not in content:
+        return content
+    
+    def replace(match):
+        # [[name]]是转义写法，输出去掉一层方括号的原文
+        if match.group(1) == '[' and match.group(5) == ']':
+            return match.group(0)[1:-1]
+        inner = match.group(4)
+        if inner is not None:
+            inner = expand_shortcodes(inner)
+        handler = SHORTCODE_HANDLERS[match.group(2)]
+        if not handler:
+            return match.group(1) + (inner or '') + match.group(5)
+        result = handler(parse_shortcode_attrs(match.group(3)), inner)
+        return match.group(1) + SHORTCODE_OUTPUT_START + result + SHORTCODE_OUTPUT_END + match.group(5)
+    
+    return _get_shortcode_pattern().sub(replace, content)
+
+
+def _shortcode_caption(attrs, content):
+    """[caption]：图片加说明文字"""
+    content = content or ''
+    caption = attrs.get('caption', '')
+    # 旧版WordPress把说明文字放在图片后面的内容里
+    if not caption and '>' in content:
+        head, _, tail = content.rpartition('>')
+        if tail.strip():
+            content, caption = head + '>', tail.strip()
+    return f'<figure>{content}<figcaption>{caption}</figcaption></figure>' if caption else content
+
+
+def _shortcode_embed(attrs, content):
+    """[embed]：转换为Hugo内置的youtube/vimeo短代码，其他链接保留为普通链接"""
+    url = (content or attrs.get('src', '')).strip()
+    for pattern, hugo_shortcode in EMBED_PROVIDERS:
+        match = pattern.search(url)
+        if match:
+            return f'<p>{{{{< {hugo_shortcode} {match.group(1)} >}}}}</p>'
+    return f'<p><a href="{html.escape(url)}">{html.escape(url)}</a></p>' if url else ''
+
+
+def _shortcode_media(attrs, content):
+    """[video]/[audio]：保留为HTML5媒体标签"""
+    tag = 'audio' if any(key in attrs for key in ('mp3', 'ogg', 'wav', 'm4a')) else 'video'
+    src = attrs.get('src') or next((attrs[key] for key in ('mp4', 'webm', 'ogv', 'mp3', 'ogg', 'wav', 'm4a')
+                                    if attrs.get(key)), '')
+    return f'<{tag} controls src="{html.escape(src)}"></{tag}>' if src else ''
+
+
+register_shortcode('caption', _shortcode_caption)
+register_shortcode('wp_caption', _shortcode_caption)
+register_shortcode('embed', _shortcode_embed)
+register_shortcode('video', _shortcode_media)
+register_shortcode('audio', _shortcode_media)
+
+
+class MarkdownConverter(HTMLParser):
+    """基于流式HTML分词器的单遍HTML到Markdown转换器
+    
+    Gutenberg区块注释在分词时直接丢弃，其余注释（例如<!--more-->）原样保留。
+    引用、表格和行内代码通过输出缓冲区栈处理，不需要构建DOM树。列表项内的段落、
+    代码块和引用缩进到列表项内容所在的列。普通文本中的Markdown语法字符和Hugo短代码
+    开头会被转义，短代码处理函数的输出原样保留。
+    """
+    
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self._buffers = [[]]
+        # 每层列表: [标签, 下一个序号, 列表项标记的缩进, 列表项内容的缩进]
+        self._lists = []
+        # 每个外层缓冲区的行首状态，弹出缓冲区时恢复
+        self._line_starts = []
+        # 引用内的列表与外层列表无关，进入引用时保存外层的列表栈
+        self._contexts = []
+        self._links = []
+        # 已打开但还没有输出的强调标记，遇到第一个非空白字符时才输出
+        self._marks = []
+        self._pre = 0
+        self._pre_language = ''
+        self._code = 0
+        self._drop = 0
+        self._raw = 0
+        self._verbatim = 0
+        self._table = None
+        # 列表项内待补的段落分隔；当前输出位置是否在行首
+        self._list_break = False
+        self._line_start = True
+    
+    @classmethod
+    def convert(cls, content):
+        """把HTML片段转换为Markdown"""
+        converter = cls()
+        converter.feed(content)
+        converter.close()
+        return converter.result()
+    
+    def result(self):
+        """返回规整空行后的转换结果"""
+        # 没有闭合的引用、表格单元格和行内代码按原样并入外层
+        while len(self._buffers) > 1:
+            text = self._pop()
+            self._buffers[-1].append(text)
+        text = ''.join(self._buffers[0])
+        text = BLANK_LINES_RE.sub('\n\n', text)
+        return text.strip('\n') + '\n' if text.strip() else ''
+    
+    # 输出辅助方法
+    
+    def _emit(self, text):
+        if text.strip():
+            self._flush()
+            self._line_start = False
+        self._buffers[-1].append(text)
+    
+    def _flush(self):
+        """输出延迟的列表项段落分隔和强调标记"""
+        buffer = self._buffers[-1]
+        if self._list_break:
+            self._list_break = False
+            buffer.append('\n\n' + self._list_indent())
+        if self._marks:
+            buffer.append(''.join(self._marks))
+            self._marks = []
+    
+    def _block(self):
+        """保证接下来的输出从新段落开始
+        
+        列表项内的段落分隔推迟到下一次输出内容时才补上，并缩进到列表项内容所在的列，
+        这样列表项开头的段落不会产生空的列表项。
+        """
+        if not self._lists:
+            self._emit('\n\n')
+        elif not self._line_start:
+            self._list_break = True
+        self._line_start = True
+    
+    def _push(self):
+        self._flush()
+        self._buffers.append([])
+        self._line_starts.append(self._line_start)
+        self._line_start = True
+    
+    def _pop(self):
+        self._line_start = self._line_starts.pop()
+        return ''.join(self._buffers.pop())
+    
+    def _tail(self):
+        """当前缓冲区末尾的字符，用于判断是否需要补空格"""
+        for chunk in reversed(self._buffers[-1]):
+            if chunk:
+                return chunk[-1]
+        return '\n'
+    
+    # HTMLParser回调
+    
+    def handle_starttag(self, tag, attrs):
+        if self._drop:
+            if tag in DROP_TAGS:
+                self._drop += 1
+            return
+        if self._raw:
+            self._emit(self.get_starttag_text())
+            if tag not in VOID_TAGS:
+                self._raw += 1
+            return
+        attrs = dict(attrs)
+        
+        if tag in DROP_TAGS:
+            self._drop = 1
+        elif tag in RAW_HTML_TAGS:
+            self._block()
+            self._emit(self.get_starttag_text())
+            if tag not in VOID_TAGS:
+                self._raw = 1
+        elif self._pre:
+            if tag == 'br':
+                self._emit('\n')
+            elif tag == 'code' and not self._pre_language:
+                self._pre_language = self._language(attrs)
+        elif tag in HEADING_TAGS:
+            self._block()
+            self._emit(HEADING_TAGS[tag] + ' ')
+        elif tag in BLOCK_TAGS:
+            self._block()
+        elif tag in EMPHASIS_MARKS:
+            # 行内代码中的强调没有效果，不输出标记
+            if not self._code:
+                self._marks.append(EMPHASIS_MARKS[tag])
+        elif tag == 'code':
+            if not self._code:
+                self._push()
+            self._code += 1
+        elif tag == 'br':
+            self._emit('  \n' + self._list_indent())
+            self._line_start = True
+        elif tag == 'hr':
+            self._block()
+            self._emit('---')
+            self._block()
+        elif tag == 'a':
+            href = attrs.get('href')
+            self._links.append(href)
+            if href:
+                self._emit('[')
+        elif tag == 'img':
+            self._emit(self._image(attrs))
+        elif tag == 'pre':
+            self._pre = 1
+            self._pre_language = self._language(attrs)
+            self._push()
+        elif tag in ('ul', 'ol'):
+            if not self._lists:
+                self._block()
+            indent = self._list_indent()
+            self._lists.append([tag, int(attrs.get('start') or 1), indent, indent])
+        elif tag == 'li':
+            marker = self._list_marker()
+            indent = self._lists[-1][2] if self._lists else ''
+            if self._lists:
+                self._lists[-1][3] = indent + ' ' * len(marker)
+            self._list_break = False
+            self._emit('\n' + indent + marker)
+            self._line_start = True
+        elif tag == 'blockquote':
+            self._block()
+            self._push()
+            self._contexts.append(self._lists)
+            self._lists = []
+        elif tag == 'table':
+            self._block()
+            self._table = {'rows': [], 'header': False, 'outer': self._table}
+        elif tag == 'tr' and self._table is not None:
+            self._table['rows'].append([])
+        elif tag in ('td', 'th') and self._table is not None:
+            if tag == 'th' and len(self._table['rows']) <= 1:
+                self._table['header'] = True
+            self._push()
+    
+    def handle_startendtag(self, tag, attrs):
+        self.handle_starttag(tag, attrs)
+        if tag not in VOID_TAGS:
+            self.handle_endtag(tag)
+    
+    def handle_endtag(self, tag):
+        if self._drop:
+            if tag in DROP_TAGS:
+                self._drop -= 1
+            return
+        if self._raw:
+            self._emit(f'</{tag}>')
+            self._raw -= 1
+            if not self._raw:
+                self._block()
+            return
+        
+        if self._pre and tag != 'pre':
+            return
+        if tag in HEADING_TAGS or tag in BLOCK_TAGS:
+            self._block()
+        elif tag in EMPHASIS_MARKS:
+            if not self._code:
+                self._close_mark(EMPHASIS_MARKS[tag])
+        elif tag == 'code' and self._code:
+            self._code -= 1
+            if not self._code and len(self._buffers) > 1:
+                self._emit(self._code_span(self._pop()))
+        elif tag == 'a' and self._links:
+            href = self._links.pop()
+            if href:
+                self._emit(f']({href})')
+        elif tag == 'pre':
+            code = self._pop().strip('\n')
+            self._pre = 0
+            fence = '`' * max(3, self._longest_backtick_run(code) + 1)
+            self._block()
+            # 列表项内的代码块每一行都缩进到列表项内容所在的列
+            block = f'{fence}{self._pre_language}\n{code}\n{fence}'
+            self._emit(block.replace('\n', '\n' + self._list_indent()))
+            self._block()
+        elif tag in ('ul', 'ol') and self._lists:
+            self._lists.pop()
+            if not self._lists:
+                self._list_break = False
+                self._block()
+        elif tag == 'blockquote' and self._contexts and len(self._buffers) > 1:
+            quote = BLANK_LINES_RE.sub('\n\n', self._pop()).strip('\n')
+            self._lists = self._contexts.pop()
+            self._list_break = False
+            separator = '\n' + self._list_indent()
+            self._emit(separator.join(('> ' + line).rstrip() for line in quote.split('\n')))
+            self._block()
+        elif tag in ('td', 'th') and self._table is not None and len(self._buffers) > 1:
+            cell = WHITESPACE_RE.sub(' ', self._pop()).strip().replace('|', '\\|')
+            if not self._table['rows']:
+                self._table['rows'].append([])
+            self._table['rows'][-1].append(cell)
+        elif tag == 'table' and self._table is not None:
+            table = self._table
+            self._table = table['outer']
+            self._emit(self._render_table(table))
+            self._block()
+    
+    def handle_data(self, data):
+        if self._drop:
+            return
+        # 短代码处理函数的输出用标记字符包围，标记之间的文本不转义
+        for part in SHORTCODE_OUTPUT_RE.split(data):
+            if part == SHORTCODE_OUTPUT_START:
+                self._verbatim += 1
+            elif part == SHORTCODE_OUTPUT_END:
+                self._verbatim = max(self._verbatim - 1, 0)
+            elif part:
+                self._text(part)
+    
+    def handle_comment(self, data):
+        comment = data.strip()
+        # Gutenberg区块标记：<!-- wp:paragraph -->、<!-- /wp:paragraph -->
+        if comment.startswith(('wp:', '/wp:')):
+            return
+        if self._drop:
+            return
+        if comment == 'more':
+            self._block()
+            self._emit('<!--more-->')
+            self._block()
+        else:
+            self._emit(f'<!--{data}-->')
+    
+    # 转换辅助方法
+    
+    def _text(self, data):
+        """输出一段文本：折叠空白，普通文本转义Markdown语法字符"""
+        if self._raw or self._pre:
+            self._emit(data)
+            return
+        text = WHITESPACE_RE.sub(' ', data)
+        if self._code:
+            self._emit(text)
+            return
+        if text.startswith(' ') and (self._line_start or self._tail() in ' \n'):
+            text = text.lstrip(' ')
+        if text.startswith(' ') and self._marks:
+            # 强调标记放在开头的空白之后
+            self._buffers[-1].append(' ')
+            text = text[1:]
+        if text and not self._verbatim:
+            text = self._escape(text)
+            # 分词器在<前切分文本，{{和<或%可能分别出现在两段文本中
+            buffer = self._buffers[-1]
+            if text[0] in '<%' and buffer and buffer[-1].endswith('{{'):
+                buffer[-1] = buffer[-1][:-2] + '&#123;&#123;'
+        if text:
+            self._emit(text)
+    
+    def _escape(self, text):
+        text = MARKDOWN_ESCAPE_RE.sub(
+            lambda match: '&#123;&#123;' if match.group() == '{{' else '\\' + match.group(), text)
+        if self._line_start:
+            match = MARKDOWN_LINE_START_RE.match(text)
+            if match:
+                # 有序列表转义序号后的点号，其他转义开头的字符
+                position = match.end(1) if match.group(1) else 0
+                text = text[:position] + '\\' + text[position:]
+        return text
+    
+    def _close_mark(self, mark):
+        """闭合强调标记：没有内容时不输出，末尾的空白移到标记之后"""
+        for index in range(len(self._marks) - 1, -1, -1):
+            if self._marks[index] == mark:
+                del self._marks[index]
+                return
+        buffer = self._buffers[-1]
+        trailing = []
+        while buffer and not buffer[-1].strip():
+            trailing.append(buffer.pop())
+        if buffer and buffer[-1].endswith(' '):
+            buffer[-1] = buffer[-1].rstrip(' ')
+            trailing.append(' ')
+        buffer.append(mark)
+        buffer.extend(reversed(trailing))
+    
+    @staticmethod
+    def _longest_backtick_run(text):
+        return max((len(run) for run in BACKTICK_RUN_RE.findall(text)), default=0)
+    
+    def _code_span(self, code):
+        """行内代码：反引号串比内容中最长的反引号串多一个，内容以反引号开头或结尾时两边补空格"""
+        if not code.strip():
+            return code
+        fence = '`' * (self._longest_backtick_run(code) + 1)
+        if code[0] == '`' or code[-1] == '`' or (code[0] == ' ' and code[-1] == ' '):
+            code = f' {code} '
+        return fence + code + fence
+    
+    def _language(self, attrs):
+        language = LANGUAGE_CLASS_RE.search(attrs.get('class') or '')
+        return language.group(1) if language else ''
+    
+    def _list_indent(self):
+        return self._lists[-1][3] if self._lists else ''
+    
+    def _list_marker(self):
+        if not self._lists:
+            return '- '
+        current = self._lists[-1]
+        if current[0] == 'ol':
+            marker = f'{current[1]}. '
+            current[1] += 1
+            return marker
+        return '- '
+    
+    def _image(self, attrs):
+        src = attrs.get('src')
+        if not src:
+            return ''
+        alt = (attrs.get('alt') or '').replace(']', '\\]')
+        title = attrs.get('title')
+        if title:
+            title = title.replace('"', '\\"')
+            return f'![{alt}]({src} "{title}")'
+        return f'![{alt}]({src})'
+    
+    def _render_table(self, table):
+        rows = [row for row in table['rows'] if row]
+        if not rows:
+            return ''
+        width = max(len(row) for row in rows)
+        rows = [row + [''] * (width - len(row)) for row in rows]
+        # GFM表格必须有表头行，没有<th>时用空表头
+        header = rows.pop(0) if table['header'] else [''] * width
+        lines = ['| ' + ' | '.join(header) + ' |', '|' + '---|' * width]
+        lines.extend('| ' + ' | '.join(row) + ' |' for row in rows)
+        return '\n'.join(lines)
+
+
+def html_to_markdown(content):
+    """展开短代码并把WordPress文章HTML转换为Markdown"""
+    if not content:
+        return ''
+    # 去掉内容中原有的标记字符，以免与短代码输出的标记混淆
+    content = content.replace(SHORTCODE_OUTPUT_START, '').replace(SHORTCODE_OUTPUT_END, '')
+    return MarkdownConverter.convert(expand_shortcodes(content))
+
+
+# ---------------------------------------------------------------------------
+# Front matter输出
+# ---------------------------------------------------------------------------
+
+# 支持的front matter格式：YAML兼容性最好，Hugo解析JSON最快
+FRONT_MATTER_FORMATS = ('yaml', 'toml', 'json')
+DEFAULT_FRONT_MATTER = 'yaml'
+FRONT_MATTER_DELIMITERS = {'yaml': '---\n', 'toml': '+++\n'}
+# YAML和TOML都可以不加引号的键
+BARE_KEY_RE = re.compile(r'^[A-Za-z0-9_-]+$')
+
+
+def _escape_table(escapes, control_format, extra=()):
+    """生成str.translate使用的转义表：控制字符和extra中的字符按control_format转义
+    （超出0xFF的用\\uXXXX），escapes中的字符使用指定的转义"""
+    codes = list(range(0x20)) + [0x7f] + list(extra)
+    table = {code: (control_format if code <= 0xff else '\\u{:04X}').format(code) for code in codes}
+    table.update({ord(char): escape for char, escape in escapes.items()})
+    return table
+
+
+def _special_chars(table):
+    """匹配转义表中任一字符的正则；没有特殊字符的字符串跳过translate"""
+    return re.compile('[' + ''.join(re.escape(chr(code)) for code in sorted(table)) + ']')
+
+
+# YAML双引号字符串：C0/C1控制字符、YAML视为换行的NEL/LS/PS以及BOM都必须转义
+YAML_ESCAPES = _escape_table(
+    {'\\': '\\\\', '"': '\\"', '\0': '\\0', '\a': '\\a', '\b': '\\b', '\t': '\\t', '\n': '\\n',
+     '\v': '\\v', '\f': '\\f', '\r': '\\r', '\x1b': '\\e', '\x85': '\\N', '\u2028': '\\L', '\u2029': '\\P'},
+    '\\x{:02X}', extra=list(range(0x80, 0xa0)) + [0xfeff, 0xfffe, 0xffff])
+# TOML基本字符串
+TOML_ESCAPES = _escape_table(
+    {'\\': '\\\\', '"': '\\"', '\b': '\\b', '\t': '\\t', '\n': '\\n', '\f': '\\f', '\r': '\\r'},
+    '\\u{:04X}')
+YAML_SPECIAL_RE = _special_chars(YAML_ESCAPES)
+TOML_SPECIAL_RE = _special_chars(TOML_ESCAPES)
+
+
+def render_front_matter(fields, front_matter=DEFAULT_FRONT_MATTER):
+    """把[(字段, 值)]渲染为front matter，包括分隔符和其后的空行
+    
+    值为字符串、字符串列表或datetime。所有字符串都加引号，含特殊字符的用转义表一次完成转义，
+    标题中的反斜杠、冒号、开头的特殊字符和换行都能原样读回；datetime输出为日期时间。
+    JSON格式直接使用json.dumps。
+    """
+    if front_matter == 'json':
+        document = {}
+        for key, value in fields:
+            if isinstance(value, datetime.datetime):
+                value = value.isoformat(' ')
+            elif value is None:
+                value = ""
+            document[key] = value
+        return json.dumps(document, ensure_ascii=False, indent=2) + "\n\n"
+    
+    if front_matter == 'toml':
+        table, special, separator, date_separator = TOML_ESCAPES, TOML_SPECIAL_RE, ' = ', 'T'
+    else:
+        table, special, separator, date_separator = YAML_ESCAPES, YAML_SPECIAL_RE, ': ', ' '
+    
+    def quote(text):
+        text = '' if text is None else str(text)
+        if special.search(text):
+            text = text.translate(table)
+        return '"' + text + '"'
+    
+    delimiter = FRONT_MATTER_DELIMITERS[front_matter]
+    parts = [delimiter]
+    for key, value in fields:
+        if not BARE_KEY_RE.match(key):
+            key = quote(key)
+        if isinstance(value, datetime.datetime):
+            text = value.isoformat(date_separator)
+        elif isinstance(value, (list, tuple)):
+            text = '[' + ', '.join([quote(item) for item in value]) + ']'
+        else:
+            text = quote(value)
+        parts.extend((key, separator, text, '\n'))
+    parts.append(delimiter)
+    parts.append('\n')
+    return ''.join(parts)
+
+
+# ---------------------------------------------------------------------------
+# 内容类型配置
+# ---------------------------------------------------------------------------
+
+def load_type_config(path):
+    """读取内容类型配置文件并与内置类型合并
+    
+    文件为JSON，安装了PyYAML时也可以是.yml/.yaml，格式：
+    
+        {"post_types": {"event": {"layout": "event", "dir": "events",
+                                  "taxonomies": {"event_cat": "categories", "venue": "venues"},
+                                  "meta": {"_event_start": "event_start"}}}}
+    
+    taxonomies把分类法映射到front matter字段（categories和tags之外的字段输出为列表），
+    meta把postmeta键映射到字符串字段，woocommerce为true时输出产品字段。
+    permalink是该类型在WordPress中的永久链接结构（如"/events/%postname%/"），
+    默认为/{类型}/%postname%/，产品默认使用WooCommerce的产品基础路径。
+    配置错误时抛出ValueError。
+    """
+    with open(path, 'r', encoding='utf-8') as f:
+        if path.endswith(('.yml', '.yaml')):
+            try:
+                import yaml
+            except ImportError:
+                raise ValueError("读取YAML配置需要安装PyYAML (pip install pyyaml)")
+            try:
+                config = yaml.safe_load(f)
+            except yaml.YAMLError as e:
+                raise ValueError(f"YAML格式错误: {e}")
+        else:
+            config = json.load(f)
+    if not isinstance(config, dict) or not isinstance(config.get('post_types'), dict):
+        raise ValueError("配置文件必须包含post_types映射")
+    
+    type_config = dict(DEFAULT_TYPE_CONFIG)
+    for post_type, options in config['post_types'].items():
+        if options is None:
+            # 设为null表示不导出这个内置类型
+            type_config.pop(post_type, None)
+        else:
+            type_config[post_type] = options
+    return normalize_type_config(type_config)
+
+
+def normalize_type_config(type_config):
+    """补全内容类型配置的默认值并检查字段名"""
+    normalized = {}
+    for post_type, options in type_config.items():
+        if not isinstance(options, dict):
+            raise ValueError(f"内容类型 {post_type} 的配置必须是映射")
+        taxonomies = options.get('taxonomies', DEFAULT_TAXONOMIES)
+        meta = options.get('meta', {})
+        if not isinstance(taxonomies, dict) or not isinstance(meta, dict):
+            raise ValueError(f"内容类型 {post_type} 的taxonomies和meta必须是映射")
+        fields = list(taxonomies.values()) + list(meta.values())
+        for field in fields:
+            if not isinstance(field, str) or not re.match(r'^[A-Za-z_][\w-]*$', field) or field in RESERVED_FIELDS:
+                raise ValueError(f"内容类型 {post_type} 的字段名无效或与内置字段冲突: {field}")
+        if len(set(fields)) != len(fields):
+            raise ValueError(f"内容类型 {post_type} 的字段名重复")
+        permalink = options.get('permalink')
+        if permalink is not None and (not isinstance(permalink, str) or '%postname%' not in permalink):
+            raise ValueError(f"内容类型 {post_type} 的permalink必须是包含%postname%的字符串")
+        normalized[post_type] = {
+            'layout': str(options.get('layout', post_type)),
+            'dir': str(options.get('dir', post_type)),
+            'taxonomies': dict(taxonomies),
+            'meta': dict(meta),
+            'woocommerce': bool(options.get('woocommerce', False)),
+            'permalink': permalink,
+        }
+    return normalized
+
+
+# ---------------------------------------------------------------------------
+# 永久链接与重定向
+# ---------------------------------------------------------------------------
+
+class PermalinkStructure:
+    """WordPress的永久链接设置，把文章解析为原站点上的路径
+    
+    与WordPress的get_permalink相同：文章按permalink_structure替换%标签%，页面为
+    祖先页面slug加自身slug，静态首页为/，产品使用WooCommerce的product_base，
+    其他类型使用类型配置中的permalink或/{类型}/%postname%/；永久链接结构为空
+    （朴素链接）时为/?p=ID或/?page_id=ID。站点装在子目录时路径包含home的路径。
+    """
+    
+    def __init__(self, options=None, type_config=None):
+        options = options or {}
+        self.structure = options.get('permalink_structure') or ''
+        self.home = urllib.parse.urlsplit(options.get('home') or '').path.rstrip('/')
+        front_page = str(options.get('page_on_front') or '')
+        self.front_page = int(front_page) if options.get('show_on_front') == 'page' and front_page.isdigit() else None
+        match = WOOCOMMERCE_PRODUCT_BASE_RE.search(options.get('woocommerce_permalinks') or '')
+        product_base = (match.group(1) if match else '').strip('/') or DEFAULT_PRODUCT_BASE
+        self.templates = {'post': self.structure, 'product': f"/{product_base}/%postname%/"}
+        for post_type, config in (type_config or {}).items():
+            if config.get('permalink'):
+                self.templates[post_type] = config['permalink']
+    
+    def signature(self):
+        """影响永久链接的全部设置，记录在清单中，变化时全量导出"""
+        return [self.structure, self.home, self.front_page, dict(sorted(self.templates.items()))]
+    
+    def template(self, post_type):
+        return self.templates.get(post_type, f"/{post_type}/%postname%/")
+    
+    def tags(self, post_type):
+        """该类型的永久链接用到的%标签%"""
+        if not self.structure or post_type == 'page':
+            return set()
+        return set(PERMALINK_TAG_RE.findall(self.template(post_type)))
+    
+    def taxonomies(self, post_type=None):
+        """永久链接中作为%标签%使用的分类法（如%category%、%product_cat%）"""
+        post_types = [post_type] if post_type else self.templates
+        return sorted({tag for name in post_types for tag in self.tags(name)
+                       if tag not in PERMALINK_DATE_TAGS and tag not in ('post_id', 'postname', 'pagename', 'author')})
+    
+    def path(self, post, slug=None, date=None, ancestors=(), terms=None, author=''):
+        """文章的永久链接路径；slug和date用于生成旧slug、旧日期对应的旧链接"""
+        post_id, post_type = post['ID'], post['post_type']
+        slug = post['post_name'] if slug is None else slug
+        if post_type == 'page' and post_id == self.front_page and slug == post['post_name']:
+            return self.home + '/'
+        if not self.structure:
+            return f"{self.home}/?{'page_id' if post_type == 'page' else 'p'}={post_id}"
+        trailing = '/' if self.structure.endswith('/') else ''
+        if post_type == 'page':
+            return self.home + '/' + '/'.join(list(ancestors) + [slug]) + trailing
+        
+        date = date or post['post_date']
+        if not isinstance(date, datetime.datetime):
+            # _wp_old_date只有日期，时间沿用发布时间
+            date = str(date)
+            published = str(post['post_date'])
+            date = datetime.datetime.fromisoformat(date[:10] + published[10:19] if len(date) == 10 else date[:19])
+        values = {tag: date.strftime(code) for tag, code in PERMALINK_DATE_TAGS.items()}
+        values.update(post_id=str(post_id), postname=slug, pagename=slug, author=author)
+        path = PERMALINK_TAG_RE.sub(
+            lambda match: values.get(match.group(1)) or (terms or {}).get(match.group(1)) or DEFAULT_TERM_SLUG,
+            self.template(post_type))
+        path = '/' + path.strip('/') + trailing if path.strip('/') else '/'
+        return self.home + path
+    
+    def attachment_path(self, parent_link, slug):
+        """附件页面的路径：所属文章的永久链接加附件slug（与get_attachment_link相同）"""
+        if not self.structure or '?' in parent_link or not slug:
+            return None
+        name = f"attachment/{slug}" if slug.isdigit() or '%category%' in self.structure else slug
+        return parent_link.rstrip('/') + '/' + name + ('/' if self.structure.endswith('/') else '')
+
+
+def _nginx_quote(value):
+    """nginx配置中的双引号字符串"""
+    return '"' + value.replace('\\', '\\\\').replace('"', '\\"') + '"'
+
+
+def render_redirect_map(paths, ids, live=()):
+    """生成nginx map文件：$uri按旧路径、?p=/?page_id=/?attachment_id=按文章ID映射到新URL
+    
+    nginx的$uri是解码后的路径，百分号编码的slug先解码再作为键；指向现有页面或
+    指向自身的旧路径会被跳过，包含$的URL会被nginx当作变量，同样跳过。
+    """
+    live = {urllib.parse.unquote(url) for url in live}
+    lines = ["# 由wp_to_hugo_exporter.py生成，请勿手动修改", "map $uri $wp_redirect {", '    default "";']
+    keys = set()
+    for path, url in sorted(paths.items()):
+        key = urllib.parse.unquote(path)
+        if '?' in path or '$' in url or key in live or key in keys:
+            continue
+        keys.add(key)
+        lines.append(f"    {_nginx_quote(key)} {_nginx_quote(url)};")
+    lines += ["}", "", 'map "$arg_p$arg_page_id$arg_attachment_id" $wp_redirect_id {', '    default "";']
+    lines.extend(f"    {post_id} {_nginx_quote(url)};" for post_id, url in sorted(ids.items()) if '$' not in url)
+    lines.append("}")
+    return '\n'.join(lines) + '\n'
+
+
+# ---------------------------------------------------------------------------
+# 变更集
+# ---------------------------------------------------------------------------
+
+class ChangeSet:
+    """一次导出中新增、修改和删除的文件
+    
+    路径相对于站点目录（内容目录的上一级），如content/posts/a.md、static/search/index.json，
+    内容文件和内容目录旁的搜索索引、分类法索引使用同一个基准。deploy.py的流水线模式和
+    常驻模式用它判断是否需要构建和发布，并在任务中报告变化的文件，不必重新扫描内容目录。
+    写文件阶段和资源线程会并发记录，更新在锁内完成。
+    """
+    
+    def __init__(self):
+        self.added = set()
+        self.modified = set()
+        self.deleted = set()
+        # 上次drain之后的变更记录，写入检查点
+        self._log = []
+        self._lock = threading.Lock()
+    
+    def record(self, path, change):
+        """记录一次变更，change为added、modified或deleted；同一路径的多次变更会合并"""
+        with self._lock:
+            self._log.append((path, change))
+            if change == 'added':
+                if path in self.deleted:
+                    self.deleted.discard(path)
+                    self.modified.add(path)
+                else:
+                    self.added.add(path)
+            elif change == 'modified':
+                if path not in self.added:
+                    self.modified.add(path)
+            elif change == 'deleted':
+                self.modified.discard(path)
+                if path in self.added:
+                    self.added.discard(path)
+                else:
+                    self.deleted.add(path)
+    
+    def drain(self):
+        """返回并清空上次调用之后记录的变更"""
+        with self._lock:
+            log, self._log = self._log, []
+            return log
+    
+    def __bool__(self):
+        return bool(self.added or self.modified or self.deleted)
+    
+    def to_dict(self):
+        with self._lock:
+            return {'added': sorted(self.added), 'modified': sorted(self.modified), 'deleted': sorted(self.deleted)}
+
+
+# ---------------------------------------------------------------------------
+# 页面包资源
+# ---------------------------------------------------------------------------
+
+class AssetBundler:
+    """把文章引用的图片放进Hugo页面包
+    
+    本地wp-content/uploads中存在的文件直接复制，其余通过有界线程池下载，
+    每个线程按主机复用HTTP连接。所有资源先按内容哈希保存到共享目录，
+    再硬链接（不支持时复制）到各个页面包中，同一URL只获取一次，
+    内容相同的不同URL只保存一份。读库阶段用fetch提前提交获取任务，
+    写文件阶段用place等待结果并放入页面包，只有放入成功的资源才改写链接。
+    """
+    
+    def __init__(self, uploads_dir, store_dir, workers=DEFAULT_ASSET_WORKERS, timeout=ASSET_TIMEOUT):
+        self.uploads_dir = os.path.realpath(uploads_dir)
+        self.store_dir = store_dir
+        self.workers = workers
+        self.timeout = timeout
+        self.copied = 0
+        self.downloaded = 0
+        self.failed = 0
+        self._pool = None
+        self._lock = threading.Lock()
+        self._fetches = {}
+        self._local = threading.local()
+        self._connections = []
+        # 附件URL -> _wp_attached_file路径（相对于上传目录），URL与文件位置不一致时使用
+        self.local_files = {}
+        # 资源放入页面包后的回调: on_change(路径, 'added'或'modified')
+        self.on_change = None
+    
+    def start(self):
+        """启动资源线程池"""
+        os.makedirs(self.store_dir, exist_ok=True)
+        self._pool = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='asset')
+    
+    def close(self):
+        """等待所有资源任务完成并关闭HTTP连接"""
+        if self._pool is not None:
+            self._pool.shutdown(wait=True)
+            self._pool = None
+        for connection in self._connections:
+            connection.close()
+        self._connections = []
+        self._fetches = {}
+    
+    def fetch(self, url):
+        """提交获取url的任务，返回结果为共享目录中路径的Future；同一URL只获取一次"""
+        with self._lock:
+            future = self._fetches.get(url)
+            if future is None:
+                future = self._fetches[url] = self._pool.submit(self._store, url)
+        return future
+    
+    def place(self, url, dest):
+        """等待url获取完成并放到dest，返回是否成功；失败时输出警告并计数"""
+        try:
+            change = self._place(self.fetch(url).result(), dest)
+        except Exception as e:
+            print(f"警告: 无法获取资源 {url}: {e}")
+            with self._lock:
+                self.failed += 1
+            return False
+        if change and self.on_change:
+            self.on_change(dest, change)
+        return True
+    
+    def _store(self, url):
+        """把资源按内容哈希保存到共享目录"""
+        ext = os.path.splitext(urllib.parse.urlsplit(url).path)[1].lower()
+        local_path = self.local_path(url)
+        if local_path:
+            digest = hashlib.sha1()
+            with open(local_path, 'rb') as f:
+                for chunk in iter(lambda: f.read(1 << 20), b''):
+                    digest.update(chunk)
+            store_path = os.path.join(self.store_dir, digest.hexdigest() + ext)
+            if not os.path.exists(store_path):
+                tmp_path = f"{store_path}.{threading.get_ident()}.tmp"
+                shutil.copyfile(local_path, tmp_path)
+                os.replace(tmp_path, store_path)
+            with self._lock:
+                self.copied += 1
+            return store_path
+        
+        body = self._download(url)
+        store_path = os.path.join(self.store_dir, hashlib.sha1(body).hexdigest() + ext)
+        if not os.path.exists(store_path):
+            tmp_path = f"{store_path}.{threading.get_ident()}.tmp"
+            with open(tmp_path, 'wb') as f:
+                f.write(body)
+            os.replace(tmp_path, store_path)
+        with self._lock:
+            self.downloaded += 1
+        return store_path
+    
+    def local_path(self, url):
+        """把上传目录的URL映射到本地文件，文件不存在时返回None"""
+        relative = self.local_files.get(url)
+        if relative:
+            candidate = self._uploads_file(relative)
+            if candidate:
+                return candidate
+        path = urllib.parse.unquote(urllib.parse.urlsplit(url).path)
+        marker = '/wp-content/uploads/'
+        if marker not in path:
+            return None
+        return self._uploads_file(path.split(marker, 1)[1])
+    
+    def _uploads_file(self, relative):
+        """上传目录中的文件路径，不存在时返回None"""
+        candidate = os.path.realpath(os.path.join(self.uploads_dir, relative))
+        # 防止../跳出上传目录
+        if not candidate.startswith(self.uploads_dir + os.sep) or not os.path.isfile(candidate):
+            return None
+        return candidate
+    
+    def _download(self, url, redirects=5):
+        """用当前线程的长连接下载资源，跟随重定向"""
+        parts = urllib.parse.urlsplit(url)
+        if parts.scheme not in ('http', 'https') or not parts.netloc:
+            raise OSError("不是可下载的URL")
+        path = parts.path or '/'
+        if parts.query:
+            path += '?' + parts.query
+        
+        for attempt in range(2):
+            connection = self._connection(parts.scheme, parts.netloc, fresh=attempt > 0)
+            try:
+                connection.request('GET', path, headers={'User-Agent': 'wp-to-hugo-exporter'})
+                response = connection.getresponse()
+                body = response.read()
+                break
+            except (http.client.HTTPException, ConnectionError):
+                # 复用的连接可能已被服务器关闭，重建一次连接后重试
+                connection.close()
+                if attempt:
+                    raise
+        
+        if response.status in (301, 302, 303, 307, 308) and redirects:
+            return self._download(urllib.parse.urljoin(url, response.getheader('Location', '')), redirects - 1)
+        if response.status != 200:
+            raise OSError(f"HTTP {response.status}")
+        return body
+    
+    def _connection(self, scheme, netloc, fresh=False):
+        connections = getattr(self._local, 'connections', None)
+        if connections is None:
+            connections = self._local.connections = {}
+        key = (scheme, netloc)
+        if fresh or key not in connections:
+            cls = http.client.HTTPSConnection if scheme == 'https' else http.client.HTTPConnection
+            connections[key] = cls(netloc, timeout=self.timeout)
+            with self._lock:
+                self._connections.append(connections[key])
+        return connections[key]
+    
+    def _place(self, store_path, dest):
+        """把共享目录中的资源硬链接（或复制）到页面包，返回added、modified或None（未变化）"""
+        change = 'added'
+        if os.path.exists(dest):
+            if os.path.samefile(store_path, dest):
+                return None
+            change = 'modified'
+            os.remove(dest)
+        try:
+            os.link(store_path, dest)
+        except OSError:
+            shutil.copyfile(store_path, dest)
+        return change
+
+
+# ---------------------------------------------------------------------------
+# 检查点
+# ---------------------------------------------------------------------------
+
+class ExportCheckpoint:
+    """可恢复导出的检查点日志（JSON Lines）
+    
+    第一行是本次导出的参数，之后每写完一批追加一行：该批最后的文章ID、
+    高水位线、失败文章、清单条目、索引条目和文件变更。导出中断后，
+    参数相同的下一次导出回放这些记录，从最后提交的ID之后继续；
+    导出成功后删除日志。每行写入后fsync，中断时最多留下一行不完整的记录，读取时忽略。
+    """
+    
+    def __init__(self, path):
+        self.path = path
+        self._file = None
+    
+    def resume(self, header):
+        """打开检查点日志，返回与header一致的已提交记录；不存在或参数不同时从头开始"""
+        records = []
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                lines = f.read().split('\n')
+            if json.loads(lines[0]) == header:
+                for line in lines[1:]:
+                    try:
+                        records.append(json.loads(line))
+                    except ValueError:
+                        break
+            else:
+                print("警告: 检查点与本次导出的参数不同，已丢弃并从头开始")
+        except FileNotFoundError:
+            pass
+        except (OSError, ValueError, IndexError) as e:
+            print(f"警告: 无法读取检查点，将从头开始: {e}")
+        
+        # 重写日志，去掉不完整的末行
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        content = ''.join(json.dumps(item, ensure_ascii=False) + '\n' for item in [header] + records)
+        write_file_if_changed(self.path, content.encode('utf-8'))
+        self._file = open(self.path, 'a', encoding='utf-8')
+        return records
+    
+    def commit(self, record):
+        """追加一批的记录并落盘"""
+        self._file.write(json.dumps(record, ensure_ascii=False) + '\n')
+        self._file.flush()
+        os.fsync(self._file.fileno())
+    
+    def close(self):
+        """关闭日志文件，保留检查点供下次恢复"""
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+    
+    def finish(self):
+        """导出成功，删除检查点"""
+        self.close()
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+
+# ---------------------------------------------------------------------------
+# 查找缓存
+# ---------------------------------------------------------------------------
+
+class LruCache:
+    """有界的LRU查找缓存，记录命中和未命中次数
+    
+    maxsize为None时不限容量；complete为True表示缓存已预热为全集，
+    未命中的键不存在，不必再查询。
+    """
+    
+    def __init__(self, maxsize):
+        self.maxsize = maxsize
+        self.complete = False
+        self.hits = 0
+        self.misses = 0
+        self._items = collections.OrderedDict()
+    
+    def __len__(self):
+        return len(self._items)
+    
+    def get_many(self, keys):
+        """返回(已缓存的{键: 值}, 未缓存的键列表)"""
+        found, missing = {}, []
+        for key in keys:
+            if key in self._items:
+                self._items.move_to_end(key)
+                found[key] = self._items[key]
+                self.hits += 1
+            else:
+                missing.append(key)
+                self.misses += 1
+        return found, missing
+    
+    def put(self, key, value):
+        self._items[key] = value
+        self._items.move_to_end(key)
+        if self.maxsize is not None and len(self._items) > self.maxsize:
+            self._items.popitem(last=False)
+    
+    def reset_stats(self):
+        self.hits = 0
+        self.misses = 0
+    
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {'hits': self.hits, 'misses': self.misses, 'size': len(self._items),
+                'hit_rate': round(self.hits / lookups, 4) if lookups else None}
+
+
+# ---------------------------------------------------------------------------
+# 导出指标
+# ---------------------------------------------------------------------------
+
+class ExportMetrics:
+    """导出过程的指标：SQL查询次数与耗时、各阶段耗时、写入字节数和按类型的吞吐量
+    
+    读库阶段和写文件阶段可能在不同线程中记录，所有更新都在锁内完成。
+    """
+    
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.finished = None
+        self.queries = 0
+        self.query_seconds = 0.0
+        self.phases = {}
+        self.bytes_written = 0
+        self.types = {}
+        self.slowest_queries = []
+        self.slowest_posts = []
+        # 数据库访问层事件：retry、disconnect、failure
+        self.db_events = {}
+        # 查找缓存的命中统计: 名称 -> LruCache.stats()
+        self.caches = {}
+        self._lock = threading.Lock()
+    
+    def record_query(self, query, seconds):
+        """记录一次SQL查询"""
+        with self._lock:
+            self.queries += 1
+            self.query_seconds += seconds
+            self._keep_slowest(self.slowest_queries, (seconds, ' '.join(query.split())[:200]))
+    
+    def record_db_event(self, event):
+        """记录一次数据库重试、连接断开或查询最终失败"""
+        with self._lock:
+            self.db_events[event] = self.db_events.get(event, 0) + 1
+    
+    def record_cache(self, name, stats):
+        """记录查找缓存的命中统计"""
+        with self._lock:
+            self.caches[name] = stats
+    
+    def record_phase(self, phase, seconds):
+        """累计某个阶段的耗时"""
+        with self._lock:
+            self.phases[phase] = self.phases.get(phase, 0.0) + seconds
+    
+    def record_render(self, post, timings):
+        """记录一篇文章在渲染阶段各部分的耗时"""
+        with self._lock:
+            for phase, seconds in timings.items():
+                self.phases[phase] = self.phases.get(phase, 0.0) + seconds
+            self._keep_slowest(self.slowest_posts, (timings.get('render', 0.0), post['ID'], post['post_type']))
+    
+    def record_post(self, post_type, result, size=0):
+        """记录一篇文章的结果：written、skipped或failed"""
+        with self._lock:
+            counts = self.types.setdefault(post_type, {'written': 0, 'skipped': 0, 'failed': 0})
+            counts[result] += 1
+            if result == 'written':
+                self.bytes_written += size
+    
+    def finish(self):
+        self.finished = time.perf_counter()
+    
+    def _keep_slowest(self, items, item):
+        items.append(item)
+        if len(items) > SLOWEST_LIMIT * 4:
+            items.sort(reverse=True)
+            del items[SLOWEST_LIMIT:]
+    
+    @property
+    def elapsed(self):
+        return (self.finished or time.perf_counter()) - self.started
+    
+    def to_dict(self):
+        """转换为可序列化为JSON的报告"""
+        elapsed = self.elapsed
+        with self._lock:
+            return {
+                'elapsed_seconds': round(elapsed, 4),
+                'queries': {
+                    'count': self.queries,
+                    'seconds': round(self.query_seconds, 4),
+                    'slowest': [{'seconds': round(seconds, 4), 'query': query}
+                                for seconds, query in sorted(self.slowest_queries, reverse=True)[:SLOWEST_LIMIT]],
+                },
+                'database': {event: self.db_events.get(event, 0) for event in ('retry', 'disconnect', 'failure')},
+                'caches': {name: dict(stats) for name, stats in sorted(self.caches.items())},
+                'phases': {phase: round(seconds, 4) for phase, seconds in sorted(self.phases.items())},
+                'bytes_written': self.bytes_written,
+                'types': {
+                    post_type: dict(counts, items_per_second=round(sum(counts.values()) / elapsed, 2) if elapsed else None)
+                    for post_type, counts in sorted(self.types.items())
+                },
+                'slowest_posts': [{'id': post_id, 'type': post_type, 'render_seconds': round(seconds, 4)}
+                                  for seconds, post_id, post_type in sorted(self.slowest_posts, reverse=True)[:SLOWEST_LIMIT]],
+            }
+    
+    def to_prometheus(self):
+        """转换为Prometheus文本格式"""
+        report = self.to_dict()
+        lines = []
+        
+        def metric(name, metric_type, help_text, samples):
+            lines.append(f"# HELP wp2hugo_{name} {help_text}")
+            lines.append(f"# TYPE wp2hugo_{name} {metric_type}")
+            for labels, value in samples:
+                label_text = ','.join(f'{key}="{value}"' for key, value in labels.items())
+                lines.append(f"wp2hugo_{name}{{{label_text}}} {value}" if label_text else f"wp2hugo_{name} {value}")
+        
+        metric('export_duration_seconds', 'gauge', 'Wall clock time of the export.',
+               [({}, report['elapsed_seconds'])])
+        metric('queries_total', 'counter', 'SQL queries executed.', [({}, report['queries']['count'])])
+        metric('query_seconds_total', 'counter', 'Time spent in SQL queries.', [({}, report['queries']['seconds'])])
+        metric('db_events_total', 'counter', 'Database retries, dropped connections and failed queries.',
+               [({'event': event}, count) for event, count in report['database'].items()])
+        metric('cache_lookups_total', 'counter', 'Attachment and term lookups by cache result.',
+               [({'cache': name, 'result': result}, stats[key])
+                for name, stats in report['caches'].items() for result, key in (('hit', 'hits'), ('miss', 'misses'))])
+        metric('phase_seconds_total', 'counter', 'Time spent per export phase.',
+               [({'phase': phase}, seconds) for phase, seconds in report['phases'].items()])
+        metric('bytes_written_total', 'counter', 'Bytes of Markdown written.', [({}, report['bytes_written'])])
+        metric('posts_total', 'counter', 'Exported items by post type and result.',
+               [({'type': post_type, 'result': result}, counts[result])
+                for post_type, counts in report['types'].items() for result in ('written', 'skipped', 'failed')])
+        return '\n'.join(lines) + '\n'
+    
+    def write(self, path):
+        """写出报告，.prom/.txt文件使用Prometheus文本格式，其余为JSON"""
+        if path.endswith(('.prom', '.txt')):
+            content = self.to_prometheus()
+        else:
+            content = json.dumps(self.to_dict(), ensure_ascii=False, indent=2) + '\n'
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(content)
+
+
+# ---------------------------------------------------------------------------
+# 搜索索引与分类法索引
+# ---------------------------------------------------------------------------
+
+def index_terms(text):
+    """把文章文本切分为索引词：去掉HTML标签和短代码后小写，
+    中日韩文字按二元组切分，其余按单词切分并忽略过短或过长的词"""
+    text = html.unescape(INDEX_MARKUP_RE.sub(' ', text)).lower()
+    terms = set()
+    for run in CJK_RUN_RE.findall(text):
+        if len(run) == 1:
+            terms.add(run)
+        else:
+            terms.update(run[i:i + 2] for i in range(len(run) - 1))
+    shortest, longest = INDEX_WORD_LENGTH
+    terms.update(word for word in INDEX_WORD_RE.findall(CJK_RUN_RE.sub(' ', text))
+                 if shortest <= len(word) <= longest)
+    return terms
+
+
+def index_shard(term):
+    """索引词所在的分片：ASCII字母数字按首字符，其余按首字符的Unicode区块（256个码位）"""
+    first = term[0]
+    if first.isascii() and first.isalnum():
+        return first
+    return f"u{ord(first) >> 8:x}"
+
+
+class SearchIndexer:
+    """导出时生成搜索索引和分类法索引，Hugo构建时不必再计算
+    
+    - static/search/terms/{分片}.json：倒排索引{索引词: [文章ID]}，按index_shard分片
+    - static/search/docs/{ID // SEARCH_DOCS_BLOCK}.json：{文章ID: [标题, 链接, 类型, 日期]}
+    - static/search/index.json：分片列表和文章数量
+    - data/taxonomies/categories.json、tags.json：{分类或标签: [文章ID]}
+    
+    每篇文章的索引词和元数据保存在状态文件中。增量导出时只读取并改写
+    变化文章涉及的分片，全量导出时从状态文件重建全部分片并删除多余的分片。
+    """
+    
+    def __init__(self, state_file, site_dir):
+        self.state_file = state_file
+        self.search_dir = os.path.join(site_dir, 'static', 'search')
+        self.taxonomy_dir = os.path.join(site_dir, 'data', 'taxonomies')
+        self.posts = {}
+        # 本次导出中变化的文章: {文章ID: 变化前的条目（新文章为None）}
+        self._previous = {}
+        self.written = 0
+        self.on_change = None
+    
+    def load(self, high_water):
+        """读取索引状态，文件不存在、无效或与清单的高水位线不一致时
+        （期间有未生成索引的导出）返回False，需要全量导出重建索引"""
+        self.posts = {}
+        self._previous = {}
+        if not os.path.exists(self.state_file):
+            return False
+        try:
+            with open(self.state_file, 'r', encoding='utf-8') as f:
+                state = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"警告: 无法读取搜索索引状态: {e}")
+            return False
+        if state.get('version') != INDEX_STATE_VERSION:
+            return False
+        self.posts = state['posts']
+        return state.get('high_water') == high_water
+    
+    def update(self, data, content_hash):
+        """记录一篇已导出文章的索引数据；Markdown内容哈希未变化时沿用上次的索引词"""
+        key = str(data['ID'])
+        previous = self.posts.get(key)
+        date = data['date']
+        entry = {
+            'hash': content_hash,
+            'title': data['title'],
+            'url': data['public_url'],
+            'type': data['post_type'],
+            'date': date.strftime('%Y-%m-%d') if isinstance(date, datetime.datetime) else str(date)[:10],
+            'categories': list(data['categories']),
+            'tags': list(data['tags']),
+        }
+        if previous and previous['hash'] == content_hash:
+            entry['terms'] = previous['terms']
+        else:
+            text = ' '.join([data['title'], data['content']] + entry['categories'] + entry['tags'])
+            entry['terms'] = ' '.join(sorted(index_terms(text)))
+        if entry == previous:
+            return
+        self._previous.setdefault(key, previous)
+        self.posts[key] = entry
+    
+    def restore(self, key, entry):
+        """回放检查点中的索引条目"""
+        self._previous.setdefault(key, self.posts.get(key))
+        if entry is None:
+            self.posts.pop(key, None)
+        else:
+            self.posts[key] = entry
+    
+    def remove(self, post_id):
+        """从索引中移除不再发布的文章"""
+        key = str(post_id)
+        if key in self.posts:
+            self._previous.setdefault(key, self.posts.pop(key))
+    
+    def save(self, high_water, rebuild=False):
+        """写出变化的索引文件和索引状态（记录清单的高水位线），返回写入的索引文件数"""
+        self.written = 0
+        # 索引文件被删除时即使是增量导出也从状态重建
+        rebuild = rebuild or not os.path.exists(os.path.join(self.search_dir, 'index.json'))
+        if rebuild:
+            self._rebuild_shards()
+        elif self._previous:
+            self._patch_shards()
+        
+        if rebuild or self._previous:
+            categories, tags = {}, {}
+            for key, entry in self.posts.items():
+                for name in entry['categories']:
+                    categories.setdefault(name, []).append(int(key))
+                for name in entry['tags']:
+                    tags.setdefault(name, []).append(int(key))
+            self._write(os.path.join(self.taxonomy_dir, 'categories.json'), self._sorted_postings(categories))
+            self._write(os.path.join(self.taxonomy_dir, 'tags.json'), self._sorted_postings(tags))
+            
+            terms_dir = os.path.join(self.search_dir, 'terms')
+            docs_dir = os.path.join(self.search_dir, 'docs')
+            self._write(os.path.join(self.search_dir, 'index.json'), {
+                'version': INDEX_STATE_VERSION,
+                'docs_block': SEARCH_DOCS_BLOCK,
+                'count': len(self.posts),
+                'terms': sorted(name[:-5] for name in os.listdir(terms_dir)) if os.path.isdir(terms_dir) else [],
+                'docs': sorted(int(name[:-5]) for name in os.listdir(docs_dir)) if os.path.isdir(docs_dir) else [],
+            })
+        
+        os.makedirs(os.path.dirname(self.state_file), exist_ok=True)
+        state = {'version': INDEX_STATE_VERSION, 'high_water': high_water, 'posts': self.posts}
+        write_file_if_changed(self.state_file, json.dumps(state, ensure_ascii=False, separators=(',', ':'),
+                                                          sort_keys=True).encode('utf-8'))
+        self._previous = {}
+        return self.written
+    
+    def _rebuild_shards(self):
+        """从索引状态重建全部分片"""
+        shards, blocks = {}, {}
+        for key, entry in self.posts.items():
+            post_id = int(key)
+            for term in entry['terms'].split():
+                shards.setdefault(index_shard(term), {}).setdefault(term, []).append(post_id)
+            blocks.setdefault(post_id // SEARCH_DOCS_BLOCK, {})[key] = self._doc(entry)
+        self._replace_dir(os.path.join(self.search_dir, 'terms'),
+                          {shard: self._sorted_postings(postings) for shard, postings in shards.items()})
+        self._replace_dir(os.path.join(self.search_dir, 'docs'), blocks)
+    
+    def _patch_shards(self):
+        """只改写变化文章涉及的倒排分片和文档分片"""
+        changes = {}
+        blocks = set()
+        for key, previous in self._previous.items():
+            old_terms = set(previous['terms'].split()) if previous else set()
+            current = self.posts.get(key)
+            new_terms = set(current['terms'].split()) if current else set()
+            post_id = int(key)
+            for term in old_terms - new_terms:
+                changes.setdefault(index_shard(term), []).append((term, post_id, False))
+            for term in new_terms - old_terms:
+                changes.setdefault(index_shard(term), []).append((term, post_id, True))
+            blocks.add(post_id // SEARCH_DOCS_BLOCK)
+        
+        terms_dir = os.path.join(self.search_dir, 'terms')
+        for shard, shard_changes in changes.items():
+            path = os.path.join(terms_dir, f"{shard}.json")
+            postings = {term: set(ids) for term, ids in self._read(path).items()}
+            for term, post_id, added in shard_changes:
+                if added:
+                    postings.setdefault(term, set()).add(post_id)
+                elif term in postings:
+                    postings[term].discard(post_id)
+            postings = self._sorted_postings(postings)
+            if postings:
+                self._write(path, postings)
+            else:
+                self._remove(path)
+        
+        docs_dir = os.path.join(self.search_dir, 'docs')
+        docs = {block: {} for block in blocks}
+        for key, entry in self.posts.items():
+            block = int(key) // SEARCH_DOCS_BLOCK
+            if block in docs:
+                docs[block][key] = self._doc(entry)
+        for block, block_docs in docs.items():
+            path = os.path.join(docs_dir, f"{block}.json")
+            if block_docs:
+                self._write(path, block_docs)
+            else:
+                self._remove(path)
+    
+    @staticmethod
+    def _doc(entry):
+        return [entry['title'], entry['url'], entry['type'], entry['date']]
+    
+    @staticmethod
+    def _sorted_postings(postings):
+        return {term: sorted(ids) for term, ids in postings.items() if ids}
+    
+    @staticmethod
+    def _read(path):
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+    
+    def _write(self, path, value):
+        """写入一个索引文件，内容未变化时不改动文件"""
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        content = json.dumps(value, ensure_ascii=False, separators=(',', ':'), sort_keys=True)
+        written = write_file_if_changed(path, content.encode('utf-8'))
+        if written:
+            self._changed(path, written)
+    
+    def _replace_dir(self, directory, files):
+        """写入目录下的全部分片，并删除不再存在的分片"""
+        for name, value in files.items():
+            self._write(os.path.join(directory, f"{name}.json"), value)
+        if os.path.isdir(directory):
+            expected = {f"{name}.json" for name in files}
+            for name in os.listdir(directory):
+                if name.endswith('.json') and name not in expected:
+                    self._remove(os.path.join(directory, name))
+    
+    def _remove(self, path):
+        if os.path.exists(path):
+            os.remove(path)
+            self._changed(path, 'deleted')
+    
+    def _changed(self, path, change):
+        self.written += 1
+        if self.on_change is not None:
+            self.on_change(path, change)
+
+
+class DatabaseConnection:
+    """导出工具的数据库访问层：单个复用的连接、断线重连重试、查询超时和只读一致性快照
+    
+    导出的查询都在读库线程上依次执行，因此只使用一个连接：多个连接各自开启的快照
+    不是同一时刻的，分到不同连接上的查询读到的数据可能不一致。连接按需创建并一直复用，
+    查询在锁内执行，另一个线程同时查询时等待；空闲超过DB_PING_INTERVAL秒的连接使用
+    前先ping。导出只执行幂等的只读查询，连接断开、查询超时等可重试的错误会丢弃出错的
+    连接，等待后换一个新连接重试，最多retries次，等待时间每次加倍。
+    query_timeout为每个查询的服务器端超时，snapshot为True时连接建立后开启
+    READ ONLY的一致性快照事务，导出读到的是同一时刻的数据；重连后开始新的快照。
+    重试、断开和最终失败通过on_event回调计数，最终失败的错误照常抛出。
+    """
+    
+    def __init__(self, connect, retries=DEFAULT_DB_RETRIES, query_timeout=None, snapshot=False):
+        self._connect = connect
+        self.retries = max(0, retries)
+        self.query_timeout = query_timeout
+        self.snapshot = snapshot
+        self.on_event = None
+        self._connection = None
+        self._last_used = 0.0
+        self._lock = threading.Lock()
+        self._warned = set()
+    
+    def query(self, query, params=()):
+        """执行只读查询并返回全部结果，可重试的错误换一个连接重试"""
+        attempt = 0
+        with self._lock:
+            while True:
+                try:
+                    connection = self._current()
+                    with connection.cursor(pymysql.cursors.DictCursor if pymysql else None) as cursor:
+                        cursor.execute(query, params)
+                        rows = cursor.fetchall()
+                except DB_ERRORS as e:
+                    retryable = self._retryable(e)
+                    if retryable:
+                        self._discard()
+                    if not retryable or attempt >= self.retries:
+                        self._event('failure')
+                        raise
+                    attempt += 1
+                    delay = min(DB_RETRY_BACKOFF * 2 ** (attempt - 1), DB_RETRY_MAX_DELAY)
+                    self._event('retry')
+                    print(f"数据库查询出错，{delay:g}秒后重试 ({attempt}/{self.retries}): {e}")
+                    time.sleep(delay)
+                except BaseException:
+                    # 查询被中断时连接上可能还有未读完的结果，不再复用
+                    self._discard()
+                    raise
+                else:
+                    self._last_used = time.monotonic()
+                    return rows
+    
+    def close(self):
+        """关闭连接，结束只读事务"""
+        with self._lock:
+            connection, self._connection = self._connection, None
+        if connection is not None:
+            self._close(connection)
+    
+    def _current(self):
+        """返回当前连接，空闲太久时先ping；没有连接或ping失败时新建"""
+        if self._connection is not None and time.monotonic() - self._last_used >= DB_PING_INTERVAL:
+            try:
+                self._connection.ping(reconnect=False)
+            except DB_ERRORS:
+                self._discard()
+        if self._connection is None:
+            self._connection = self._open()
+        return self._connection
+    
+    def _discard(self):
+        """关闭出错的连接，下次查询时新建"""
+        connection, self._connection = self._connection, None
+        if connection is not None:
+            self._close(connection)
+            self._event('disconnect')
+    
+    def _open(self):
+        """新建连接并设置查询超时和只读快照"""
+        connection = self._connect()
+        try:
+            with connection.cursor() as cursor:
+                if self.query_timeout:
+                    self._setup(cursor, 'timeout', "设置查询超时", (
+                        # MySQL 5.7.8+（毫秒，只作用于SELECT）和MariaDB 10.1+（秒）
+                        ("SET SESSION max_execution_time = %s", (int(self.query_timeout * 1000),)),
+                        ("SET SESSION max_statement_time = %s", (self.query_timeout,)),
+                    ))
+                if self.snapshot:
+                    self._begin(cursor)
+        except BaseException:
+            self._close(connection)
+            raise
+        return connection
+    
+    def _begin(self, cursor):
+        self._setup(cursor, 'snapshot', "开启只读快照事务", (
+            ("SET SESSION TRANSACTION ISOLATION LEVEL REPEATABLE READ", ()),
+            ("START TRANSACTION WITH CONSISTENT SNAPSHOT, READ ONLY", ()),
+        ), all_required=True)
+    
+    def renew(self):
+        """结束连接上的事务并重新开始快照，之后的查询读到最新的数据
+        
+        常驻模式每轮轮询前调用；没有开启快照时同样需要结束InnoDB隐式开始的事务。
+        """
+        with self._lock:
+            if self._connection is None:
+                return
+            try:
+                self._connection.rollback()
+                if self.snapshot:
+                    with self._connection.cursor() as cursor:
+                        self._begin(cursor)
+            except DB_ERRORS:
+                self._discard()
+    
+    def _setup(self, cursor, name, description, statements, all_required=False):
+        """执行连接的会话设置；服务器不支持时只警告一次，导出照常进行
+        
+        all_required为False时依次尝试各语句，有一条成功即可。
+        """
+        error = None
+        for statement, params in statements:
+            try:
+                cursor.execute(statement, params)
+            except DB_ERRORS as e:
+                if self._retryable(e):
+                    raise
+                error = e
+                if all_required:
+                    break
+            else:
+                if not all_required:
+                    return
+                error = None
+        if error is not None and name not in self._warned:
+            self._warned.add(name)
+            print(f"警告: 数据库不支持{description}，将不使用该设置: {error}")
+    
+    def _close(self, connection):
+        try:
+            connection.close()
+        except DB_ERRORS:
+            pass
+    
+    def _retryable(self, error):
+        """连接断开、超时和被KILL的错误可以换一个连接重试"""
+        if pymysql is not None and isinstance(error, pymysql.err.InterfaceError):
+            return True
+        return bool(error.args) and error.args[0] in RETRYABLE_DB_ERRORS
+    
+    def _event(self, event):
+        if self.on_event is not None:
+            self.on_event(event)
+
 
 class WpToHugoExporter:
     """WordPress到Hugo导出工具"""
     
+    # 读取输入时会中断导出、但保留已写入进度的异常
+    input_errors = DB_ERRORS
+    
     def __init__(self, wp_root):
         """初始化导出工具"""
         self.wp_root = wp_root
         self.config_file = os.path.join(wp_root, 'wp-config.php')
         self.base_export_dir = os.path.join(wp_root, 'wp-content', 'md')
+        # Markdown输出目录；流水线模式下可以直接指向Hugo的content目录
+        self.content_dir = os.path.join(self.base_export_dir, 'content')
         self.db_config = {}
         self.db_prefix = 'wp_'
-        self.type_config = {
-            'post': {'layout': 'post', 'dir': 'posts'},
-            'page': {'layout': 'page', 'dir': 'pages'},
-            'product': {'layout': 'product', 'dir': 'products'}
-        }
+        # 数据库访问层：连接、查询超时、重试次数和只读一致性快照
+        self.db = None
+        self.query_timeout = DEFAULT_QUERY_TIMEOUT
+        self.db_retries = DEFAULT_DB_RETRIES
+        self.snapshot = True
+        self.type_config = normalize_type_config(DEFAULT_TYPE_CONFIG)
         self.export_count = 0
+        self.skipped_count = 0
         self.error_count = 0
+        # 批量预取模式：按分块一次性加载分类、postmeta和附件URL
+        self.prefetch_enabled = True
+        self.batch_size = DEFAULT_BATCH_SIZE
+        self._term_cache = {}
+        self._meta_cache = {}
+        self._attachment_cache = {}
+        # 跨文章共享的查找缓存：附件ID -> (URL, _wp_attached_file)，term_taxonomy_id -> (分类法, 名称)；
+        # warm_cache为True时导出开始前一次性读取全部附件和分类项目
+        self.attachment_lookup = LruCache(ATTACHMENT_CACHE_SIZE)
+        self.term_lookup = LruCache(TERM_CACHE_SIZE)
+        self.warm_cache = False
+        self._warmed = False
+        # 增量导出：清单记录每篇文章的post_modified、输出路径和内容哈希
+        self.incremental = False
+        self.manifest_file = os.path.join(self.base_export_dir, MANIFEST_FILENAME)
+        self.manifest = {'version': MANIFEST_VERSION, 'high_water': None, 'posts': {}}
+        self._manifest_stat = None
+        # 常驻模式：post_modified未变、但新增了postmeta的文章，增量导出时一并导出
+        self.touched_ids = set()
+        # 并行导出：渲染进程数，1表示在主进程中串行渲染
+        self.workers = 1
+        self._stats_lock = threading.Lock()
+        self._processed = 0
+        self._high_water = None
+        self._failed_modified = []
+        # 页面包模式：导出为{slug}/index.md，并把图片放进同一目录
+        self.bundle = False
+        # front matter格式：yaml、toml或json
+        self.front_matter = DEFAULT_FRONT_MATTER
+        # 输出目录布局；非flat布局或自定义url_template时用url_template生成front matter中的url，
+        # 默认模板与Hugo按slug生成的URL相同，切换布局时公开URL保持不变
+        self.layout = DEFAULT_LAYOUT
+        self.url_template = DEFAULT_URL_TEMPLATE
+        # 永久链接：aliases为True时把旧链接写入front matter的aliases，redirect_map为nginx map
+        # 文件的路径；页面祖先、分类项目slug和作者slug每次导出时按需读取并缓存
+        self.aliases = False
+        self.redirect_map = None
+        self.permalinks = PermalinkStructure()
+        self._page_parents = {}
+        self._term_slugs = {}
+        self._author_slugs = None
+        self._post_term_ids = {}
+        self._redirects_changed = False
+        # 输出路径（小写） -> 文章ID，同名文件加文章ID区分
+        self._path_owners = {}
+        self._path_owners_manifest = None
+        self._made_dirs = set()
+        self.assets = AssetBundler(os.path.join(wp_root, 'wp-content', 'uploads'),
+                                   os.path.join(self.base_export_dir, ASSET_STORE_DIRNAME))
+        # 输出模式：normal逐个文件输出，quiet只输出汇总和错误，progress输出进度行
+        self.output_mode = 'normal'
+        self.metrics = ExportMetrics()
+        self._total = 0
+        # 本次导出的变更集
+        self.changes = ChangeSet()
+        # 搜索索引：在内容目录旁的static/search和data/taxonomies生成索引
+        self.search_index = False
+        self.indexer = None
+        # 分片导出：shard为(序号, 分片数)，按ID取模；id_range为(最小ID, 最大ID)，任一端可为None
+        self.shard = None
+        self.id_range = None
+        self.checkpoint = None
+        self._resumed = False
     
     def read_wp_config(self):
         """读取WordPress配置文件获取数据库信息"""
@@ -74,332 +1946,1740 @@ class WpToHugoExporter:
     
     def connect_db(self):
         """连接到WordPress数据库"""
+        if pymysql is None:
+            print("错误: 连接数据库需要安装pymysql (pip install pymysql)，或使用--wxr从WXR文件导出")
+            return False
+        connect_options = dict(self.db_config, connect_timeout=DB_CONNECT_TIMEOUT)
+        if self.query_timeout:
+            # 客户端读超时略长于服务器端查询超时，网络中断时查询不会一直挂起
+            connect_options['read_timeout'] = self.query_timeout + DB_CONNECT_TIMEOUT
+            connect_options['write_timeout'] = self.query_timeout + DB_CONNECT_TIMEOUT
+        self.db = DatabaseConnection(lambda: pymysql.connect(**connect_options), retries=self.db_retries,
+                                     query_timeout=self.query_timeout, snapshot=self.snapshot)
+        self.db.on_event = lambda event: self.metrics.record_db_event(event)
         try:
-            self.connection = pymysql.connect(**self.db_config)
+            self.db.query("SELECT 1")
             print("成功连接到数据库")
             return True
         except pymysql.Error as e:
             print(f"数据库连接失败: {e}")
+            self.close_db()
             return False
     
+    def close_db(self):
+        """关闭数据库连接"""
+        if self.db is not None:
+            self.db.close()
+            self.db = None
+    
     def export_content(self, post_type='any'):
         """导出指定类型的内容"""
         print(f"开始导出内容 (类型: {post_type})...")
         
         # 确保导出目录存在
-        content_dir = os.path.join(self.base_export_dir, 'content')
         for config in self.type_config.values():
-            os.makedirs(os.path.join(content_dir, config['dir']), exist_ok=True)
+            os.makedirs(os.path.join(self.content_dir, config['dir']), exist_ok=True)
+        
+        # 构建查询条件
+        if post_type != 'any':
+            post_types = (post_type,)
+        else:
+            # 只查询已配置的内容类型
+            post_types = tuple(self.type_config)
+        
+        self.load_manifest()
+        modified_since = self.manifest['high_water'] if self.incremental else None
+        self._page_parents, self._term_slugs, self._author_slugs = {}, {}, None
+        self.metrics = ExportMetrics()
+        try:
+            self.permalinks = self.load_permalinks()
+        except self.input_errors as e:
+            print(f"读取内容出错: {e}")
+            return False
+        self.indexer = None
+        if self.search_index:
+            self.indexer = SearchIndexer(
+                os.path.join(os.path.dirname(self.manifest_file), INDEX_STATE_FILENAME),
+                os.path.dirname(os.path.abspath(self.content_dir)))
+            if not self.indexer.load(self.manifest['high_water']) and modified_since:
+                # 增量导出看不到未修改的文章，没有索引状态时只能全量导出一次
+                print("搜索索引状态不存在，本次全量导出以建立索引")
+                modified_since = None
+        if modified_since and self.manifest.get('front_matter') != self.front_matter:
+            # 清单中没有格式时是旧版本的输出，未修改的文章也要重新生成
+            print(f"front matter格式已变化，本次全量导出为{self.front_matter}")
+            modified_since = None
+        if modified_since and (self.manifest.get('layout', DEFAULT_LAYOUT), self.manifest.get('url_template')) != \
+                (self.layout, self.url_template):
+            # 布局变化后所有文章都要移动到新路径，旧文件随之删除；URL模板变化后url和slug都要重新生成
+            print(f"目录布局或URL模板已变化，本次全量导出为{self.layout}")
+            modified_since = None
+        if modified_since and self.manifest.get('permalinks') != self.permalink_signature():
+            # 永久链接写入了每篇文章的front matter和清单，设置变化后都要重新生成
+            print("永久链接设置或重定向选项已变化，本次全量导出")
+            modified_since = None
+        if modified_since:
+            print(f"增量模式: 只导出 {modified_since} 之后修改的项目")
+        if self.slice_name():
+            print(f"分片导出: {self.slice_name()}")
+        
+        self._processed = 0
+        self.export_count = self.skipped_count = self.error_count = 0
+        self._made_dirs = set()
+        # 常驻模式各轮复用同一个清单对象，路径索引每次导出都按清单重建，
+        # 已删除或改名的文章不再占用原来的路径和URL
+        self._path_owners_manifest = None
+        self._redirects_changed = False
+        self._high_water = None
+        self._failed_modified = []
+        self.changes = ChangeSet()
+        # 查找缓存跨导出保留（常驻模式），命中率按每次导出统计
+        self.attachment_lookup.reset_stats()
+        self.term_lookup.reset_stats()
+        self.assets.on_change = self._record_change
+        if self.indexer is not None:
+            self.indexer.on_change = self._record_change
         
+        # 参数相同的上次导出中断时，从检查点继续
+        self.checkpoint = ExportCheckpoint(os.path.splitext(self.manifest_file)[0] + CHECKPOINT_SUFFIX)
+        after_id = 0
+        for record in self.checkpoint.resume(self.checkpoint_header(post_types, modified_since)):
+            self.restore_batch(record)
+            after_id = record['last_id']
+        self._resumed = bool(after_id)
+        if after_id:
+            print(f"从检查点恢复: ID {after_id} 及之前的文章已导出")
         try:
-            with self.connection.cursor(pymysql.cursors.DictCursor) as cursor:
-                # 构建查询条件
-                where_clause = ""
-                if post_type != 'any':
-                    where_clause = f"AND post_type = '{post_type}'"
+            if self.warm_cache and not self._warmed:
+                start = time.perf_counter()
+                self.warm_lookups()
+                self.metrics.record_phase('warm_up', time.perf_counter() - start)
+            total = self._total = self.count_posts(post_types, modified_since, after_id)
+            print(f"找到 {total} 个可导出的项目")
+            
+            if self.bundle:
+                self.assets.start()
+            try:
+                jobs = self.iter_render_jobs(post_types, modified_since, after_id)
+                if self.workers > 1:
+                    print(f"并行导出: {self.workers} 个渲染进程")
+                    self._export_parallel(jobs)
                 else:
-                    # 只查询post, page, product类型
-                    where_clause = "AND post_type IN ('post', 'page', 'product')"
-                
-                # 查询文章
-                query = f"""
-                SELECT * FROM {self.db_prefix}posts 
-                WHERE post_status = 'publish' {where_clause}
-                ORDER BY post_date DESC
-                """
-                cursor.execute(query)
-                posts = cursor.fetchall()
-                
-                print(f"找到 {len(posts)} 个可导出的项目")
-                
-                for post in posts:
-                    try:
-                        self.export_post(post)
-                    except Exception as e:
-                        print(f"处理文章 ID {post['ID']} 时出错: {e}")
-                        self.error_count += 1
+                    for last_id, batch in jobs:
+                        self.write_batch((data, *_render_job(data)) for data in batch)
+                        self.commit_batch(last_id, batch)
+            finally:
+                # 等待仍在复制或下载的资源
+                self.assets.close()
+            
+            removed = self.remove_unpublished(post_types)
+            if self.redirect_map and (self._redirects_changed or removed or not modified_since
+                                      or not os.path.exists(self.redirect_map)):
+                start = time.perf_counter()
+                self.write_redirect_map()
+                self.metrics.record_phase('redirects', time.perf_counter() - start)
         
-        except pymysql.Error as e:
-            print(f"数据库查询错误: {e}")
+        except self.input_errors as e:
+            print(f"读取内容出错: {e}")
+            # 已写入的文件仍记录到清单中，但不推进高水位线；保留检查点供下次恢复
+            self.save_manifest()
             return False
+        finally:
+            self.checkpoint.close()
+        
+        # 导出失败的文章下次仍需重试，高水位线不能越过它们
+        high_water = self._high_water
+        if self._failed_modified:
+            high_water = min([high_water] + self._failed_modified)
+        if high_water and (not self.manifest['high_water'] or high_water > self.manifest['high_water']):
+            self.manifest['high_water'] = high_water
+        self.manifest['front_matter'] = self.front_matter
+        self.manifest['layout'] = self.layout
+        self.manifest['url_template'] = self.url_template
+        self.manifest['permalinks'] = self.permalink_signature()
+        
+        if self.indexer is not None:
+            start = time.perf_counter()
+            indexed = self.indexer.save(self.manifest['high_water'], rebuild=not modified_since)
+            self.metrics.record_phase('index', time.perf_counter() - start)
+        self.save_manifest()
+        self.checkpoint.finish()
         
-        print(f"导出完成！共处理 {len(posts)} 个项目，成功导出 {self.export_count} 个，失败 {self.error_count} 个。")
+        lookups = [(name, cache.stats()) for name, cache in (('attachments', self.attachment_lookup),
+                                                              ('terms', self.term_lookup))]
+        for name, stats in lookups:
+            self.metrics.record_cache(name, stats)
+        self.metrics.finish()
+        if self.output_mode == 'progress':
+            sys.stderr.write('\n')
+        
+        print(f"导出完成！共处理 {self._processed} 个项目，写入 {self.export_count} 个，"
+              f"未变化跳过 {self.skipped_count} 个，失败 {self.error_count} 个，删除 {removed} 个。")
+        if self.metrics.db_events:
+            events = self.metrics.db_events
+            print(f"数据库: 重试 {events.get('retry', 0)} 次，连接断开 {events.get('disconnect', 0)} 次，"
+                  f"查询失败 {events.get('failure', 0)} 次")
+        lookups = [(label, stats) for label, (_, stats) in zip(('附件', '分类项目'), lookups)
+                   if stats['hits'] + stats['misses']]
+        if lookups:
+            print("查找缓存命中率: " + "，".join(
+                f"{label} {stats['hit_rate']:.1%} ({stats['hits']}/{stats['hits'] + stats['misses']})"
+                for label, stats in lookups))
+        if self.indexer is not None:
+            print(f"搜索索引: {len(self.indexer.posts)} 篇文章，更新 {indexed} 个索引文件")
+        if self.bundle:
+            print(f"资源: 本地复制 {self.assets.copied} 个，下载 {self.assets.downloaded} 个，失败 {self.assets.failed} 个")
         return True
     
+    def _export_parallel(self, jobs):
+        """流水线导出：读库阶段、进程池渲染阶段和写文件阶段同时进行
+        
+        主线程读取下一批文章并预取元数据时，进程池渲染上一批，写线程按批写入
+        已渲染的文件。渲染阶段只处理已预取的数据，工作进程不需要数据库连接。
+        队列有界，读库阶段最多领先写入阶段PIPELINE_DEPTH批，内存占用保持稳定。
+        """
+        write_queue = queue.Queue(maxsize=PIPELINE_DEPTH)
+        writer_errors = []
+        
+        def writer():
+            while True:
+                item = write_queue.get()
+                if item is None:
+                    break
+                if writer_errors:
+                    # 写线程已失败：丢弃剩余批次，不再提交检查点
+                    continue
+                last_id, batch, rendered = item
+                try:
+                    self.write_batch((data, *result) for data, result in zip(batch, rendered))
+                    self.commit_batch(last_id, batch)
+                except BaseException as e:
+                    writer_errors.append(e)
+        
+        # 先提交第一批任务让进程池启动工作进程，再启动写线程，避免在多线程状态下fork
+        writer_thread = None
+        try:
+            with ProcessPoolExecutor(max_workers=self.workers) as pool:
+                for last_id, batch in jobs:
+                    if writer_errors:
+                        break
+                    chunksize = max(1, len(batch) // (self.workers * 4))
+                    rendered = pool.map(_render_job, batch, chunksize=chunksize)
+                    if writer_thread is None:
+                        writer_thread = threading.Thread(target=writer, name='export-writer')
+                        writer_thread.start()
+                    write_queue.put((last_id, batch, rendered))
+        finally:
+            if writer_thread is not None:
+                write_queue.put(None)
+                writer_thread.join()
+        if writer_errors:
+            raise writer_errors[0]
+    
+    def iter_render_jobs(self, post_types, modified_since=None, after_id=0):
+        """读库阶段：流式读取文章并预取元数据，按批产出(该批最后的文章ID, 渲染所需的文章数据)"""
+        for batch in self.iter_post_batches(post_types, modified_since, after_id):
+            if self.prefetch_enabled:
+                start = time.perf_counter()
+                self.prefetch_posts([post['ID'] for post in batch])
+                self.metrics.record_phase('prefetch', time.perf_counter() - start)
+            
+            start = time.perf_counter()
+            jobs = []
+            for post in batch:
+                modified = self._format_datetime(post['post_modified'])
+                if self._high_water is None or modified > self._high_water:
+                    self._high_water = modified
+                try:
+                    data = self.build_post_data(post)
+                except Exception as e:
+                    self.record_failure(post, e)
+                    continue
+                if data is not None:
+                    jobs.append(data)
+                    # 页面包资源在渲染期间并发获取，写文件阶段再等待
+                    for url in data['assets']:
+                        self.assets.fetch(url)
+            self.metrics.record_phase('prepare', time.perf_counter() - start)
+            
+            self._processed += len(batch)
+            self.clear_prefetch()
+            yield batch[-1]['ID'], jobs
+    
+    def checkpoint_header(self, post_types, modified_since):
+        """检查点的第一行：只有参数完全相同的导出才能从检查点继续"""
+        return {
+            'version': CHECKPOINT_VERSION,
+            'post_types': list(post_types),
+            'modified_since': modified_since,
+            'slice': self.slice_name(),
+            'bundle': self.bundle,
+            'front_matter': self.front_matter,
+            'layout': self.layout,
+            'url_template': self.url_template,
+            'permalinks': self.permalink_signature(),
+            'touched': sorted(self.touched_ids),
+            'search_index': self.indexer is not None,
+            'content_dir': os.path.abspath(self.content_dir),
+        }
+    
+    def commit_batch(self, last_id, batch):
+        """写文件阶段写完一批后记录检查点（页面包的资源已在写入文章时放好）"""
+        keys = [str(data['ID']) for data in batch]
+        record = {
+            'last_id': last_id,
+            'high_water': self._high_water,
+            'failed': list(self._failed_modified),
+            'posts': {key: self.manifest['posts'][key] for key in keys if key in self.manifest['posts']},
+            'changes': self.changes.drain(),
+        }
+        if self.indexer is not None:
+            record['index'] = {key: self.indexer.posts.get(key) for key in keys}
+        self.checkpoint.commit(record)
+    
+    def restore_batch(self, record):
+        """回放检查点中已提交的一批"""
+        self.manifest['posts'].update(record['posts'])
+        if self.indexer is not None:
+            for key, entry in record['index'].items():
+                self.indexer.restore(key, entry)
+        for path, change in record['changes']:
+            self.changes.record(path, change)
+        self.changes.drain()
+        self._high_water = record['high_water']
+        self._failed_modified = record['failed']
+    
+    def slice_name(self):
+        """分片导出的名称，用于区分各分片的清单和检查点；未分片时为空字符串"""
+        parts = []
+        if self.shard:
+            parts.append(f"shard-{self.shard[0]}-of-{self.shard[1]}")
+        if self.id_range:
+            low, high = self.id_range
+            parts.append(f"ids-{'min' if low is None else low}-{'max' if high is None else high}")
+        return '.'.join(parts)
+    
+    def _post_filter(self, post_types, modified_since=None):
+        """构建已发布文章的WHERE条件及其参数"""
+        where = f"post_status = 'publish' AND post_type IN ({self._placeholders(post_types)})"
+        params = tuple(post_types)
+        if modified_since and self.touched_ids:
+            touched = tuple(sorted(self.touched_ids))
+            where += f" AND (post_modified >= %s OR ID IN ({self._placeholders(touched)}))"
+            params += (modified_since,) + touched
+        elif modified_since:
+            # 使用>=避免漏掉与高水位线同一秒内修改的文章
+            where += " AND post_modified >= %s"
+            params += (modified_since,)
+        if self.shard:
+            where += " AND MOD(ID, %s) = %s"
+            params += (self.shard[1], self.shard[0] - 1)
+        if self.id_range:
+            low, high = self.id_range
+            if low is not None:
+                where += " AND ID >= %s"
+                params += (low,)
+            if high is not None:
+                where += " AND ID <= %s"
+                params += (high,)
+        return where, params
+    
+    def change_signature(self):
+        """常驻模式轮询用的变更签名：posts、postmeta和term_taxonomy的最大主键（新文章、修订版本、
+        新增的postmeta和分类项目）；只读主键索引，可以频繁执行"""
+        query = f"""
+        SELECT (SELECT MAX(ID) FROM {self.db_prefix}posts) AS last_id,
+               (SELECT MAX(meta_id) FROM {self.db_prefix}postmeta) AS last_meta_id,
+               (SELECT MAX(term_taxonomy_id) FROM {self.db_prefix}term_taxonomy) AS last_term_id
+        """
+        return dict(self._query_all(query)[0])
+    
+    def touched_posts(self, after_meta_id):
+        """meta_id大于after_meta_id的已配置postmeta所属的文章；新增postmeta不会更新post_modified"""
+        _, meta_keys = self.loader_keys()
+        query = f"""
+        SELECT DISTINCT post_id FROM {self.db_prefix}postmeta
+        WHERE meta_id > %s AND meta_key IN ({self._placeholders(meta_keys)})
+        """
+        return {row['post_id'] for row in self._query_all(query, (after_meta_id,) + meta_keys)}
+    
+    def count_posts(self, post_types, modified_since=None, after_id=0):
+        """统计可导出的文章数量"""
+        where, params = self._post_filter(post_types, modified_since)
+        query = f"SELECT COUNT(*) AS total FROM {self.db_prefix}posts WHERE {where} AND ID > %s"
+        return self._query_all(query, params + (after_id,))[0]['total']
+    
+    def iter_post_batches(self, post_types, modified_since=None, after_id=0):
+        """按ID键集分页流式读取文章
+        
+        每批最多读取batch_size行，只选择导出需要的列。与一次性fetchall相比，
+        内存占用只与批大小有关，而与站点内容总量无关；分页之间连接空闲，
+        可以穿插执行预取查询。指定modified_since时只读取在此之后修改的文章，
+        指定after_id时从该ID之后开始（从检查点恢复）。
+        """
+        columns = ", ".join(EXPORT_COLUMNS)
+        where, params = self._post_filter(post_types, modified_since)
+        query = f"""
+        SELECT {columns} FROM {self.db_prefix}posts
+        WHERE {where}
+        AND ID > %s
+        ORDER BY ID
+        LIMIT %s
+        """
+        last_id = after_id
+        while True:
+            batch = self._query_all(query, params + (last_id, self.batch_size))
+            if not batch:
+                break
+            yield batch
+            if len(batch) < self.batch_size:
+                break
+            last_id = batch[-1]['ID']
+    
     def export_post(self, post):
         """导出单个文章"""
+        data = self.build_post_data(post)
+        if data is not None:
+            self.write_post(data, self.render_post(data))
+    
+    def build_post_data(self, post):
+        """收集渲染单个文章所需的全部数据
+        
+        类型配置中的分类法、postmeta字段、图片和产品元数据在这里从预取缓存
+        （或数据库）读取，返回的字典可以直接交给渲染进程，不再依赖数据库连接。
+        """
         post_id = post['ID']
         post_type = post['post_type']
         
         # 跳过未知类型
         if post_type not in self.type_config:
             print(f"警告: 未知内容类型 '{post_type}'，已跳过")
-            return
+            return None
         
         config = self.type_config[post_type]
-        layout = config['layout']
-        type_dir = config['dir']
-        
-        # 构建导出目录
-        export_dir = os.path.join(self.base_export_dir, 'content', type_dir)
-        
-        # 获取文章基本信息
-        title = post['post_title']
-        slug = post['post_name']
-        date = post['post_date']
-        content = post['post_content']
-        permalink = f"/{slug}/"  # 简化的永久链接
         
         # 格式化日期
         # 检查date是否已经是datetime对象
+        date = post['post_date']
         if isinstance(date, datetime.datetime):
             date_str = date.strftime('%Y-%m-%d')
         else:
             date_obj = datetime.datetime.strptime(date, '%Y-%m-%d %H:%M:%S')
             date_str = date_obj.strftime('%Y-%m-%d')
         
-        # 生成文件名
-        filename = f"{date_str}-{slug}.md"
-        file_path = os.path.join(export_dir, filename)
+        # 生成文件名，页面包模式下为{slug}/index.md；按布局放进子目录。
+        # 文件名或URL冲突时slug也加上文章ID，Hugo按slug生成的URL随之唯一
+        slug = post['post_name']
+        name = slug if self.bundle else f"{date_str}-{slug}"
+        filename, slug, url = self.output_filename(config['dir'], name, slug, date_str, post_id)
         
-        # 获取分类
-        categories = self.get_categories(post_id)
+        terms = {field: self.get_terms(post_id, taxonomy) for taxonomy, field in config['taxonomies'].items()}
+        permalink, old_links = self.post_permalinks(post)
         
-        # 获取标签
-        tags = self.get_tags(post_id)
+        data = {
+            'ID': post_id,
+            'post_type': post_type,
+            'post_modified': post['post_modified'],
+            'layout': config['layout'],
+            'title': post['post_title'],
+            'slug': slug,
+            'permalink': permalink,
+            'date': date,
+            'content': post['post_content'],
+            'filename': filename,
+            'file_path': os.path.join(self.content_dir, config['dir'], filename),
+            'url': url if self.layout != DEFAULT_LAYOUT or self.url_template != DEFAULT_URL_TEMPLATE else None,
+            'public_url': url,
+            'redirects': old_links,
+            'aliases': self.post_aliases(permalink, old_links, url) if self.aliases else [],
+            'categories': terms.pop('categories', []),
+            'tags': terms.pop('tags', []),
+            'taxonomies': terms,
+            'meta': {field: self.get_post_meta(post_id, meta_key) for meta_key, field in config['meta'].items()},
+            'featured_image': self.get_featured_image(post_id),
+            'product': None,
+            'assets': {},
+            'front_matter': self.front_matter,
+        }
         
-        # 获取特色图片
-        featured_image = self.get_featured_image(post_id)
+        # WooCommerce产品类型添加额外的产品字段
+        if config['woocommerce']:
+            data['product'] = self.get_product_data(post_id, data['featured_image'])
         
-        # 构建Markdown文件内容
-        md_content = "---\n"
-        md_content += f"layout: {layout}\n"
-        md_content += f"title: \"{self.escape_yaml_string(title)}\"\n"
-        md_content += f"slug: \"{slug}\"\n"
-        md_content += f"permalink: \"{permalink}\"\n"
-        md_content += f"date: {date}\n"
+        if self.bundle:
+            data['assets'] = self.collect_assets(data)
         
-        # 分类
-        if categories:
-            md_content += "categories:\n"
-            for category in categories:
-                md_content += f"- {self.escape_yaml_string(category)}\n"
+        return data
+    
+    def output_filename(self, section, name, slug, date_str, post_id):
+        """返回(相对于类型目录的文件名, 最终使用的slug, 公开URL)
+        
+        date布局放在{年}/{月}下，hash布局放在名称哈希前HASH_SHARD_WIDTH位的目录下。
+        路径或URL已被清单或本次导出中的另一篇文章占用时（同一天同一slug、不同日期的
+        同一slug，或大小写不敏感的文件系统上只差大小写），在名称和slug后都加文章ID，
+        文件不会互相覆盖，Hugo生成的页面也不会互相覆盖。
+        """
+        if self.layout == 'date':
+            subdir = os.path.join(date_str[:4], date_str[5:7])
+        elif self.layout == 'hash':
+            subdir = hashlib.md5(name.encode('utf-8')).hexdigest()[:HASH_SHARD_WIDTH]
         else:
-            md_content += "categories: []\n"
+            subdir = ''
+        
+        if self._path_owners_manifest is not self.manifest:
+            # 文件路径和URL共用一个索引（URL以/开头，不会与相对路径混淆）
+            self._path_owners = {}
+            for key, entry in self.manifest['posts'].items():
+                for owned in (entry['path'], entry.get('url')):
+                    if owned:
+                        self._path_owners[owned.lower()] = int(key)
+            self._path_owners_manifest = self.manifest
+        for suffix in ('', f"-{post_id}"):
+            filename = os.path.join(subdir, f"{name}{suffix}/index.md" if self.bundle else f"{name}{suffix}.md")
+            url = self.page_url(section, name + suffix, date_str, slug + suffix, post_id)
+            keys = (os.path.join(section, filename).lower(), url.lower())
+            if all(self._path_owners.get(key, post_id) == post_id for key in keys):
+                for key in keys:
+                    self._path_owners[key] = post_id
+                return filename, slug + suffix, url
+        print(f"警告: 文章 ID {post_id} 的输出路径 {filename} 或URL {url} 与其他文章冲突，将被覆盖")
+        return filename, slug + suffix, url
+    
+    def page_url(self, section, name, date_str, slug, post_id):
+        """页面在Hugo站点上的公开URL，也是别名和重定向的目标
         
-        # 特色图片
-        md_content += f"featureImage: {featured_image}\n"
-        md_content += f"image: {featured_image}\n"
+        默认模板/:section/:slug/与Hugo按front matter中的slug生成的URL相同；非flat布局或
+        自定义模板时写入front matter的url。:name是不带扩展名的文件名（含日期前缀）。
+        """
+        values = {'section': section, 'year': date_str[:4], 'month': date_str[5:7], 'day': date_str[8:10],
+                  'slug': slug, 'name': name, 'id': str(post_id)}
+        return URL_TEMPLATE_RE.sub(lambda match: values[match.group(1)], self.url_template)
+    
+    def load_permalinks(self):
+        """用一个查询从wp_options读取永久链接设置"""
+        query = f"""
+        SELECT option_name, option_value FROM {self.db_prefix}options
+        WHERE option_name IN ({self._placeholders(PERMALINK_OPTIONS)})
+        """
+        options = {row['option_name']: row['option_value'] for row in self._query_all(query, PERMALINK_OPTIONS)}
+        return PermalinkStructure(options, self.type_config)
+    
+    def permalink_signature(self):
+        """清单中记录的永久链接设置和重定向选项；重定向目标取决于url_template"""
+        return {
+            'structure': self.permalinks.signature(),
+            'aliases': self.aliases,
+            'redirects': bool(self.redirect_map),
+            'url_template': self.url_template if self.aliases or self.redirect_map else None,
+        }
+    
+    def post_permalinks(self, post):
+        """返回(WordPress永久链接, 旧链接列表)
         
-        # 标签
-        if tags:
-            md_content += "tags: [" + ", ".join([f'"{self.escape_yaml_string(tag)}"' for tag in tags]) + "]\n"
-        else:
-            md_content += "tags: []\n"
+        旧链接是_wp_old_slug、_wp_old_date（WordPress修改slug或发布日期时记录）与
+        当前slug、日期的组合按同一结构生成的路径，只在输出别名或重定向表时计算。
+        """
+        post_id, post_type = post['ID'], post['post_type']
+        tags = self.permalinks.tags(post_type)
+        ancestors = self.page_ancestors(post) if post_type == 'page' and self.permalinks.structure else ()
+        terms = {taxonomy: self.term_slug_path(post_id, taxonomy) for taxonomy in self.permalinks.taxonomies(post_type)}
+        author = self.author_slug(post) if 'author' in tags else ''
+        permalink = self.permalinks.path(post, ancestors=ancestors, terms=terms, author=author)
+        old_links = []
+        if self.aliases or self.redirect_map:
+            self._ensure_loaded(post_id)
+            meta = self._meta_cache[post_id]
+            for slug in [post['post_name']] + list(meta.get('_wp_old_slug') or []):
+                for date in [None] + list(meta.get('_wp_old_date') or []):
+                    try:
+                        link = self.permalinks.path(post, slug, date, ancestors, terms, author)
+                    except ValueError:
+                        # 格式不正确的_wp_old_date不生成旧链接
+                        continue
+                    if link != permalink and link not in old_links:
+                        old_links.append(link)
+        return permalink, old_links
+    
+    def post_aliases(self, permalink, old_links, url):
+        """front matter中的aliases：不同于公开URL的原永久链接和旧链接
+        
+        Hugo别名不能带查询参数；静态首页的永久链接是站点根路径，不作为别名。
+        """
+        aliases = []
+        for link in [permalink] + old_links:
+            link = urllib.parse.unquote(link)
+            if '?' not in link and link != url and link != self.permalinks.home + '/' and link not in aliases:
+                aliases.append(link)
+        return aliases
+    
+    def page_ancestors(self, post):
+        """页面的祖先页面slug，从顶层页面开始；缺少的父页面每层一个查询，结果在本次导出中缓存"""
+        slugs = []
+        parent = int(post.get('post_parent') or 0)
+        while parent and len(slugs) < MAX_PAGE_DEPTH:
+            if parent not in self._page_parents:
+                query = f"SELECT ID, post_name, post_parent FROM {self.db_prefix}posts WHERE ID = %s"
+                rows = self._query_all(query, (parent,))
+                self._page_parents[parent] = (rows[0]['post_name'], int(rows[0]['post_parent'] or 0)) if rows else None
+            if self._page_parents[parent] is None:
+                break
+            slug, parent = self._page_parents[parent]
+            slugs.append(slug)
+        return slugs[::-1]
+    
+    def term_slug_path(self, post_id, taxonomy):
+        """永久链接中分类法标签的值：term_id最小的项目的slug，前面加上父项目的slug"""
+        ids = self._post_term_ids.get(post_id, {}).get(taxonomy)
+        if not ids:
+            return DEFAULT_TERM_SLUG
+        if taxonomy not in self._term_slugs:
+            query = f"""
+            SELECT tt.term_taxonomy_id, tt.term_id, tt.parent, t.slug
+            FROM {self.db_prefix}term_taxonomy tt
+            JOIN {self.db_prefix}terms t ON t.term_id = tt.term_id
+            WHERE tt.taxonomy = %s
+            """
+            rows = self._query_all(query, (taxonomy,))
+            self._term_slugs[taxonomy] = ({row['term_taxonomy_id']: row['term_id'] for row in rows},
+                                          {row['term_id']: (row['slug'], row['parent']) for row in rows})
+        term_ids, terms = self._term_slugs[taxonomy]
+        term_id = min((term_ids[term] for term in ids if term in term_ids), default=None)
+        slugs = []
+        while term_id in terms and len(slugs) < MAX_PAGE_DEPTH:
+            slug, term_id = terms[term_id]
+            slugs.append(slug)
+        return '/'.join(reversed(slugs)) or DEFAULT_TERM_SLUG
+    
+    def author_slug(self, post):
+        """%author%的值：作者的user_nicename，首次使用时一次读取全部用户"""
+        if self._author_slugs is None:
+            rows = self._query_all(f"SELECT ID, user_nicename FROM {self.db_prefix}users")
+            self._author_slugs = {row['ID']: row['user_nicename'] for row in rows}
+        return self._author_slugs.get(post.get('post_author'), '')
+    
+    def write_redirect_map(self):
+        """由清单生成nginx重定向表：旧路径和文章ID -> 公开URL
         
-        # 如果是产品类型，添加额外的产品字段
-        if post_type == 'product':
-            md_content += self.get_product_metadata(post_id)
+        现有文章的永久链接优先于其他文章的旧链接；附件页面重定向到所属文章。
+        nginx的map用哈希表查找，条目再多每个请求也只需一次查找，Hugo不必为每个
+        旧链接生成别名页面。内容不变时不改写文件。
+        """
+        posts = {int(key): entry for key, entry in self.manifest['posts'].items() if 'permalink' in entry}
+        paths, ids = {}, {}
+        # 静态首页的永久链接是站点根路径，不重定向
+        paths[self.permalinks.home + '/'] = None
+        for post_id, entry in sorted(posts.items()):
+            paths.setdefault(entry['permalink'], entry['url'])
+            ids[post_id] = entry['url']
+        for post_id, entry in sorted(posts.items()):
+            for link in entry['redirects']:
+                paths.setdefault(link, entry['url'])
+        for attachment_id, link, parent_id in self.attachment_pages(posts):
+            ids.setdefault(attachment_id, posts[parent_id]['url'])
+            if link:
+                paths.setdefault(link, posts[parent_id]['url'])
         
-        md_content += "---\n\n"
+        paths = {path: url for path, url in paths.items() if url is not None}
+        live = [entry['url'] for entry in self.manifest['posts'].values() if entry.get('url')]
+        content = render_redirect_map(paths, ids, live)
+        directory = os.path.dirname(os.path.abspath(self.redirect_map))
+        os.makedirs(directory, exist_ok=True)
+        if write_file_if_changed(self.redirect_map, content.encode('utf-8')):
+            print(f"重定向表已更新: {self.redirect_map} ({len(paths)} 个路径，{len(ids)} 个ID)")
+    
+    def attachment_pages(self, posts):
+        """按ID键集分页读取已导出文章的附件，产出(附件ID, 附件页面路径, 所属文章ID)"""
+        query = f"""
+        SELECT ID, post_name, post_parent FROM {self.db_prefix}posts
+        WHERE post_type = 'attachment' AND post_parent > 0 AND ID > %s
+        ORDER BY ID
+        LIMIT %s
+        """
+        last_id = 0
+        while True:
+            batch = self._query_all(query, (last_id, self.batch_size))
+            for row in batch:
+                parent = posts.get(row['post_parent'])
+                if parent is not None:
+                    yield row['ID'], self.permalinks.attachment_path(parent['permalink'], row['post_name']), row['post_parent']
+            if len(batch) < self.batch_size:
+                break
+            last_id = batch[-1]['ID']
+    
+    def collect_assets(self, data):
+        """收集文章引用的图片，返回{URL: 页面包内文件名}
+        
+        包括特色图片、产品图片和正文中src/href指向的图片；
+        不同URL的文件名相同时追加URL哈希区分。
+        """
+        urls = [data['featured_image']]
+        if data['product']:
+            urls.extend(data['product']['images'])
+        urls.extend(html.unescape(url) for url in ASSET_URL_RE.findall(data['content']))
+        
+        assets = {}
+        names = set()
+        for url in urls:
+            if not url or url in assets:
+                continue
+            parts = urllib.parse.urlsplit(url)
+            name = os.path.basename(urllib.parse.unquote(parts.path))
+            stem, ext = os.path.splitext(name)
+            if ext.lower() not in ASSET_EXTENSIONS or not (parts.netloc or parts.path.startswith('/')):
+                continue
+            if name in names or name == 'index.md':
+                name = f"{stem}-{hashlib.sha1(url.encode('utf-8')).hexdigest()[:8]}{ext}"
+            names.add(name)
+            assets[url] = name
+        return assets
+    
+    @staticmethod
+    def front_matter_fields(data):
+        """文章的front matter字段列表[(字段, 值)]，顺序即输出顺序"""
+        date = data['date']
+        if not isinstance(date, datetime.datetime):
+            try:
+                date = datetime.datetime.fromisoformat(date)
+            except (TypeError, ValueError):
+                pass
+        fields = [
+            ('layout', data['layout']),
+            ('title', data['title']),
+            ('slug', data['slug']),
+            ('permalink', data['permalink']),
+        ]
+        if data.get('url'):
+            fields.append(('url', data['url']))
+        if data.get('aliases'):
+            fields.append(('aliases', data['aliases']))
+        fields += [
+            ('date', date),
+            ('categories', data['categories']),
+            ('featureImage', data['featured_image']),
+            ('image', data['featured_image']),
+            ('tags', data['tags']),
+        ]
+        # 类型配置中的其他分类法和postmeta字段
+        fields.extend(data['taxonomies'].items())
+        fields.extend(data['meta'].items())
+        # WooCommerce产品的额外字段
+        if data['product'] is not None:
+            fields.extend(WpToHugoExporter.product_fields(data['product']))
+        return fields
+    
+    @staticmethod
+    def render_post(data, timings=None):
+        """将文章数据渲染为Markdown文件内容（不访问数据库，可在工作进程中执行）
+        
+        传入timings字典时记录process_content的耗时。
+        """
+        md_content = render_front_matter(WpToHugoExporter.front_matter_fields(data),
+                                         data.get('front_matter', DEFAULT_FRONT_MATTER))
         
         # 处理内容
-        content = self.process_content(content)
-        md_content += content
+        start = time.perf_counter()
+        md_content += WpToHugoExporter.process_content(data['content'])
+        if timings is not None:
+            timings['process_content'] = time.perf_counter() - start
+        return md_content
+    
+    def write_batch(self, results):
+        """写文件阶段：按批写入渲染结果，(数据, 内容, 错误, 渲染耗时)四元组"""
+        for data, md_content, error, timings in results:
+            self.metrics.record_render(data, timings)
+            if error is not None:
+                self.record_failure(data, error)
+                continue
+            start = time.perf_counter()
+            try:
+                self.write_post(data, md_content)
+            except Exception as e:
+                self.record_failure(data, e)
+            self.metrics.record_phase('write', time.perf_counter() - start)
         
-        # 写入文件
-        with open(file_path, 'w', encoding='utf-8') as f:
-            f.write(md_content)
+        if self.output_mode == 'progress':
+            done = self.export_count + self.skipped_count + self.error_count
+            sys.stderr.write(f"\r进度: {done}/{self._total}")
+            sys.stderr.flush()
+    
+    def write_post(self, data, md_content):
+        """写入单个文章的Markdown文件并更新清单；内容未变化时不改动文件"""
+        # 页面包和分子目录的布局需要先创建目录
+        directory = os.path.dirname(data['file_path'])
+        if directory not in self._made_dirs:
+            os.makedirs(directory, exist_ok=True)
+            self._made_dirs.add(directory)
+        if self.bundle:
+            md_content = self.write_assets(data, md_content)
         
-        print(f"已导出: {filename} (类型: {post_type})")
-        self.export_count += 1
+        content = md_content.encode('utf-8')
+        content_hash = hashlib.sha1(content).hexdigest()
+        previous = self.manifest['posts'].get(str(data['ID']))
+        known_hash = previous['hash'] if previous and previous['path'] == self._relative_path(data['file_path']) else None
+        written = write_file_if_changed(data['file_path'], content, content_hash, known_hash)
+        
+        self.record_manifest(data, data['file_path'], content_hash)
+        if self.indexer is not None:
+            self.indexer.update(data, content_hash)
+        
+        if not written and previous is None and self._resumed:
+            # 中断前已写入但未提交检查点的新文件，仍计入变更集
+            self._record_change(data['file_path'], 'added')
+        if written:
+            self._record_change(data['file_path'], written)
+            self.log_file(f"已导出: {data['filename']} (类型: {data['post_type']})")
+            self.export_count += 1
+            self.metrics.record_post(data['post_type'], 'written', len(content))
+        else:
+            self.skipped_count += 1
+            self.metrics.record_post(data['post_type'], 'skipped')
+    
+    def log_file(self, message):
+        """输出单个文件的处理结果，quiet和progress模式下不输出"""
+        if self.output_mode == 'normal':
+            print(message)
+    
+    def write_assets(self, data, md_content):
+        """把资源放进页面包，返回改写了资源链接的内容，并删除页面包中不再引用的旧资源
+        
+        只改写已放入页面包的资源（获取失败但页面包中已有上次放入的文件时沿用该文件），
+        其余保留原URL，页面不会引用不存在的文件；之后的全量导出会再次尝试获取。
+        """
+        bundle_dir = os.path.dirname(data['file_path'])
+        placed = {}
+        for url, name in data['assets'].items():
+            dest = os.path.join(bundle_dir, name)
+            if self.assets.place(url, dest) or os.path.isfile(dest):
+                placed[url] = name
+        expected = set(placed.values())
+        for name in os.listdir(bundle_dir):
+            if name != 'index.md' and name not in expected:
+                path = os.path.join(bundle_dir, name)
+                if os.path.isfile(path):
+                    os.remove(path)
+                    self._record_change(path, 'deleted')
+        
+        # 资源链接改写为相对文件名（长URL优先，避免前缀互相干扰）
+        for url in sorted(placed, key=len, reverse=True):
+            md_content = md_content.replace(url, placed[url])
+        return md_content
     
-    def get_categories(self, post_id):
-        """获取文章分类"""
-        categories = []
+    def record_failure(self, post, error):
+        """记录导出失败的文章；读库阶段和写文件阶段可能并发调用"""
+        with self._stats_lock:
+            print(f"处理文章 ID {post['ID']} 时出错: {error}")
+            self.error_count += 1
+            self._failed_modified.append(self._format_datetime(post['post_modified']))
+        self.metrics.record_post(post['post_type'], 'failed')
+    
+    def load_manifest(self):
+        """读取增量导出清单，文件不存在或损坏时从空清单开始
+        
+        清单文件自上次读写后没有变化时（常驻模式）直接使用内存中的清单。
+        """
+        stat = self._manifest_file_stat()
+        if stat is not None and stat == self._manifest_stat:
+            return
+        self.manifest = {'version': MANIFEST_VERSION, 'high_water': None, 'posts': {}}
+        if not os.path.exists(self.manifest_file):
+            return
         try:
-            with self.connection.cursor(pymysql.cursors.DictCursor) as cursor:
-                query = f"""
-                SELECT t.name 
-                FROM {self.db_prefix}terms t
-                JOIN {self.db_prefix}term_taxonomy tt ON t.term_id = tt.term_id
-                JOIN {self.db_prefix}term_relationships tr ON tt.term_taxonomy_id = tr.term_taxonomy_id
-                WHERE tr.object_id = %s AND tt.taxonomy = 'category'
-                """
-                cursor.execute(query, (post_id,))
-                results = cursor.fetchall()
-                categories = [result['name'] for result in results]
-        except pymysql.Error:
-            pass
-        return categories
+            with open(self.manifest_file, 'r', encoding='utf-8') as f:
+                manifest = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"警告: 无法读取导出清单，将重新全量导出: {e}")
+            return
+        if manifest.get('version') == 1:
+            # 版本1的路径相对于wp-content/md，版本2改为相对于内容目录
+            prefix = 'content' + os.sep
+            for entry in manifest['posts'].values():
+                if entry['path'].startswith(prefix):
+                    entry['path'] = entry['path'][len(prefix):]
+            manifest['version'] = MANIFEST_VERSION
+        if manifest.get('version') != MANIFEST_VERSION:
+            print("警告: 导出清单版本不匹配，将重新全量导出")
+            return
+        self.manifest = manifest
+        self._manifest_stat = stat
     
-    def get_tags(self, post_id):
-        """获取文章标签"""
-        tags = []
+    def save_manifest(self):
+        """原子地写入增量导出清单"""
+        os.makedirs(os.path.dirname(self.manifest_file), exist_ok=True)
+        content = json.dumps(self.manifest, ensure_ascii=False, indent=1, sort_keys=True)
+        write_file_if_changed(self.manifest_file, content.encode('utf-8'))
+        self._manifest_stat = self._manifest_file_stat()
+    
+    def _manifest_file_stat(self):
         try:
-            with self.connection.cursor(pymysql.cursors.DictCursor) as cursor:
-                query = f"""
-                SELECT t.name 
-                FROM {self.db_prefix}terms t
-                JOIN {self.db_prefix}term_taxonomy tt ON t.term_id = tt.term_id
-                JOIN {self.db_prefix}term_relationships tr ON tt.term_taxonomy_id = tr.term_taxonomy_id
-                WHERE tr.object_id = %s AND tt.taxonomy = 'post_tag'
-                """
-                cursor.execute(query, (post_id,))
-                results = cursor.fetchall()
-                tags = [result['name'] for result in results]
-        except pymysql.Error:
-            pass
-        return tags
+            stat = os.stat(self.manifest_file)
+        except OSError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+    
+    def record_manifest(self, post, file_path, content_hash):
+        """记录文章的导出状态；输出路径变化时删除旧文件"""
+        key = str(post['ID'])
+        path = self._relative_path(file_path)
+        previous = self.manifest['posts'].get(key)
+        if previous and previous['path'] != path:
+            self._remove_export_file(previous['path'])
+        entry = self.manifest['posts'][key] = {
+            'type': post['post_type'],
+            'modified': self._format_datetime(post['post_modified']),
+            'path': path,
+            'url': post['public_url'],
+            'hash': content_hash,
+        }
+        if self.redirect_map:
+            # 重定向表由清单生成，增量导出时未修改的文章不必重新读取
+            entry.update(permalink=post['permalink'], redirects=post['redirects'])
+            if not previous or any(previous.get(field) != entry[field] for field in ('url', 'permalink', 'redirects')):
+                self._redirects_changed = True
+    
+    def _relative_path(self, file_path):
+        """导出文件相对于内容目录的路径，用作清单中的路径"""
+        return os.path.relpath(file_path, self.content_dir)
+    
+    def _record_change(self, file_path, change):
+        """把文件变更记录到本次导出的变更集（路径相对于站点目录）"""
+        path = os.path.relpath(file_path, os.path.dirname(os.path.abspath(self.content_dir)))
+        self.changes.record(path.replace(os.sep, '/'), change)
+    
+    def remove_unpublished(self, post_types):
+        """删除清单中已不再发布（草稿、私密、回收站或已删除）的文章文件"""
+        known_ids = sorted(int(key) for key, entry in self.manifest['posts'].items()
+                           if entry['type'] in post_types)
+        removed = 0
+        for start in range(0, len(known_ids), self.batch_size):
+            chunk = known_ids[start:start + self.batch_size]
+            published = self.published_ids(chunk, post_types)
+            for post_id in chunk:
+                if post_id in published:
+                    continue
+                entry = self.manifest['posts'].pop(str(post_id))
+                self._remove_export_file(entry['path'])
+                if self.indexer is not None:
+                    self.indexer.remove(post_id)
+                self.log_file(f"已删除: {entry['path']} (文章 ID {post_id} 已不再发布)")
+                removed += 1
+        return removed
+    
+    def published_ids(self, post_ids, post_types):
+        """返回post_ids中仍以post_types之一发布的ID"""
+        query = f"""
+        SELECT ID FROM {self.db_prefix}posts
+        WHERE ID IN ({self._placeholders(post_ids)})
+        AND post_status = 'publish' AND post_type IN ({self._placeholders(post_types)})
+        """
+        return {row['ID'] for row in self._query_all(query, tuple(post_ids) + tuple(post_types))}
+    
+    def _remove_export_file(self, path):
+        """删除导出目录下的文件，文件不存在时忽略；页面包连同资源整个删除"""
+        path = os.path.join(self.content_dir, path)
+        if os.path.basename(path) == 'index.md':
+            bundle_dir = os.path.dirname(path)
+            if os.path.isdir(bundle_dir):
+                for name in os.listdir(bundle_dir):
+                    self._record_change(os.path.join(bundle_dir, name), 'deleted')
+            shutil.rmtree(bundle_dir, ignore_errors=True)
+            self._made_dirs.discard(bundle_dir)
+            path = bundle_dir
+        else:
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                return
+            self._record_change(path, 'deleted')
+        self._prune_empty_dirs(os.path.dirname(path))
+    
+    def _prune_empty_dirs(self, directory):
+        """删除文件后逐级删除空的子目录（date和hash布局），直到类型目录"""
+        content_dir = os.path.abspath(self.content_dir)
+        directory = os.path.abspath(directory)
+        while os.path.dirname(directory) != content_dir and directory.startswith(content_dir + os.sep):
+            try:
+                os.rmdir(directory)
+            except OSError:
+                return
+            self._made_dirs.discard(directory)
+            directory = os.path.dirname(directory)
+    
+    def _format_datetime(self, value):
+        """将数据库中的日期时间统一格式化为字符串"""
+        if isinstance(value, datetime.datetime):
+            return value.strftime('%Y-%m-%d %H:%M:%S')
+        return str(value)
+    
+    def _query_all(self, query, params=()):
+        """执行查询并返回全部结果"""
+        start = time.perf_counter()
+        try:
+            return self.db.query(query, params)
+        finally:
+            self.metrics.record_query(query, time.perf_counter() - start)
+    
+    def _placeholders(self, values):
+        """生成IN (...)查询的占位符"""
+        return ", ".join(["%s"] * len(values))
+    
+    def loader_keys(self):
+        """所有已配置内容类型需要的分类法和postmeta键"""
+        taxonomies, meta_keys = set(), set(BASE_META_KEYS)
+        for config in self.type_config.values():
+            taxonomies.update(config['taxonomies'])
+            meta_keys.update(config['meta'])
+            if config['woocommerce']:
+                taxonomies.update(WOOCOMMERCE_TAXONOMIES)
+                meta_keys.update(WOOCOMMERCE_META_KEYS)
+        # 永久链接中的分类法标签和旧链接用到的postmeta随同一批预取查询读取
+        taxonomies.update(self.permalinks.taxonomies())
+        if self.aliases or self.redirect_map:
+            meta_keys.update(REDIRECT_META_KEYS)
+        return tuple(sorted(taxonomies)), tuple(sorted(meta_keys))
+    
+    def prefetch_posts(self, post_ids):
+        """批量预取一组文章的分类、postmeta和附件URL
+        
+        使用IN (...)查询一次性加载整个分块的数据，导出每篇文章时不再需要额外的SQL查询。
+        """
+        self.clear_prefetch()
+        if not post_ids:
+            return
+        try:
+            self.load_posts(post_ids)
+        except DB_ERRORS as e:
+            # 预取失败时回退到逐篇查询
+            print(f"批量预取失败，回退到逐篇查询: {e}")
+            self.clear_prefetch()
+    
+    def load_posts(self, post_ids):
+        """通用加载器：用一个查询读取所有已配置分类法的项目，一个查询读取所有postmeta键，
+        再读取引用的附件URL，结果放入缓存；批量预取和逐篇读取都经过这里"""
+        taxonomies, meta_keys = self.loader_keys()
+        for post_id in post_ids:
+            self._term_cache[post_id] = {taxonomy: [] for taxonomy in taxonomies}
+            self._meta_cache[post_id] = {}
+        
+        if taxonomies:
+            # 只读取文章与项目的关系，项目名称经跨文章的查找缓存解析
+            query = f"""
+            SELECT tr.object_id, tr.term_taxonomy_id
+            FROM {self.db_prefix}term_relationships tr
+            JOIN {self.db_prefix}term_taxonomy tt ON tt.term_taxonomy_id = tr.term_taxonomy_id
+            WHERE tr.object_id IN ({self._placeholders(post_ids)})
+            AND tt.taxonomy IN ({self._placeholders(taxonomies)})
+            """
+            rows = self._query_all(query, tuple(post_ids) + taxonomies)
+            terms = self.resolve_terms(sorted({row['term_taxonomy_id'] for row in rows}))
+            permalink_taxonomies = self.permalinks.taxonomies()
+            for row in rows:
+                term = terms.get(row['term_taxonomy_id'])
+                if term:
+                    taxonomy, name = term
+                    self._term_cache[row['object_id']][taxonomy].append(name)
+                    if taxonomy in permalink_taxonomies:
+                        self._post_term_ids.setdefault(row['object_id'], {}).setdefault(
+                            taxonomy, []).append(row['term_taxonomy_id'])
+        
+        query = f"""
+        SELECT post_id, meta_key, meta_value
+        FROM {self.db_prefix}postmeta
+        WHERE post_id IN ({self._placeholders(post_ids)})
+        AND meta_key IN ({self._placeholders(meta_keys)})
+        ORDER BY meta_id
+        """
+        for row in self._query_all(query, tuple(post_ids) + meta_keys):
+            if row['meta_key'] in REDIRECT_META_KEYS:
+                # 每次修改slug或发布日期都会新增一条，全部保留
+                self._meta_cache[row['post_id']].setdefault(row['meta_key'], []).append(row['meta_value'])
+            else:
+                self._meta_cache[row['post_id']].setdefault(row['meta_key'], row['meta_value'])
+        
+        # 特色图片和产品图库引用的附件
+        attachment_ids = set()
+        for post_id in post_ids:
+            meta = self._meta_cache[post_id]
+            attachment_ids.update(self._parse_id_list(meta.get('_thumbnail_id')))
+            attachment_ids.update(self._parse_id_list(meta.get('_product_image_gallery')))
+        attachment_ids = sorted(attachment_ids - set(self._attachment_cache))
+        for attachment_id, attachment in self.resolve_attachments(attachment_ids).items():
+            if attachment:
+                self._attachment_cache[attachment_id] = attachment[0]
+    
+    def resolve_terms(self, term_taxonomy_ids):
+        """把term_taxonomy_id解析为(分类法, 名称)，缓存中没有的用一个查询读取"""
+        resolved, missing = self.term_lookup.get_many(term_taxonomy_ids)
+        if missing and not self.term_lookup.complete:
+            query = f"""
+            SELECT tt.term_taxonomy_id, tt.taxonomy, t.name
+            FROM {self.db_prefix}term_taxonomy tt
+            JOIN {self.db_prefix}terms t ON t.term_id = tt.term_id
+            WHERE tt.term_taxonomy_id IN ({self._placeholders(missing)})
+            """
+            for row in self._query_all(query, tuple(missing)):
+                resolved[row['term_taxonomy_id']] = (row['taxonomy'], row['name'])
+                self.term_lookup.put(row['term_taxonomy_id'], resolved[row['term_taxonomy_id']])
+        for term_taxonomy_id in missing:
+            if term_taxonomy_id not in resolved:
+                resolved[term_taxonomy_id] = None
+                self.term_lookup.put(term_taxonomy_id, None)
+        return resolved
+    
+    def resolve_attachments(self, attachment_ids):
+        """把附件ID解析为(URL, _wp_attached_file路径)，缓存中没有的用一个查询读取；
+        不存在的附件解析为None，同样缓存，不会重复查询"""
+        resolved, missing = self.attachment_lookup.get_many(attachment_ids)
+        if missing and not self.attachment_lookup.complete:
+            query = f"""
+            SELECT p.ID, p.guid, m.meta_value AS attached_file
+            FROM {self.db_prefix}posts p
+            LEFT JOIN {self.db_prefix}postmeta m ON m.post_id = p.ID AND m.meta_key = '_wp_attached_file'
+            WHERE p.ID IN ({self._placeholders(missing)})
+            """
+            for row in self._query_all(query, tuple(missing)):
+                if row['ID'] not in resolved:
+                    resolved[row['ID']] = self._remember_attachment(row)
+        for attachment_id in missing:
+            if attachment_id not in resolved:
+                resolved[attachment_id] = None
+                self.attachment_lookup.put(attachment_id, None)
+        return resolved
+    
+    def _remember_attachment(self, row):
+        """缓存一行附件；页面包模式下把_wp_attached_file路径交给资源打包器"""
+        attachment = (row['guid'], row['attached_file'] or "")
+        self.attachment_lookup.put(row['ID'], attachment)
+        if self.bundle and attachment[1]:
+            self.assets.local_files[attachment[0]] = attachment[1]
+        return attachment
+    
+    def warm_lookups(self):
+        """预热查找缓存：按ID分页读取全部附件的URL和_wp_attached_file路径，
+        再一次读取已配置分类法的全部项目；预热后的缓存不限容量，未命中即不存在"""
+        self.attachment_lookup.maxsize = None
+        last_id = 0
+        while True:
+            query = f"""
+            SELECT p.ID, p.guid, m.meta_value AS attached_file
+            FROM {self.db_prefix}posts p
+            LEFT JOIN {self.db_prefix}postmeta m ON m.post_id = p.ID AND m.meta_key = '_wp_attached_file'
+            WHERE p.post_type = 'attachment' AND p.ID > %s
+            ORDER BY p.ID
+            LIMIT %s
+            """
+            rows = self._query_all(query, (last_id, WARM_UP_BATCH))
+            for row in rows:
+                self._remember_attachment(row)
+            if len(rows) < WARM_UP_BATCH:
+                break
+            last_id = rows[-1]['ID']
+        self.attachment_lookup.complete = True
+        
+        taxonomies, _ = self.loader_keys()
+        self.term_lookup.maxsize = None
+        if taxonomies:
+            query = f"""
+            SELECT tt.term_taxonomy_id, tt.taxonomy, t.name
+            FROM {self.db_prefix}term_taxonomy tt
+            JOIN {self.db_prefix}terms t ON t.term_id = tt.term_id
+            WHERE tt.taxonomy IN ({self._placeholders(taxonomies)})
+            """
+            for row in self._query_all(query, taxonomies):
+                self.term_lookup.put(row['term_taxonomy_id'], (row['taxonomy'], row['name']))
+        self.term_lookup.complete = True
+        self._warmed = True
+        print(f"查找缓存已预热: {len(self.attachment_lookup)} 个附件，{len(self.term_lookup)} 个分类项目")
+    
+    def clear_prefetch(self):
+        """清空预取缓存"""
+        self._term_cache = {}
+        self._meta_cache = {}
+        self._attachment_cache = {}
+        self._post_term_ids = {}
+    
+    def _parse_id_list(self, value):
+        """解析以逗号分隔的附件ID列表"""
+        ids = []
+        for item in (value or "").split(','):
+            item = item.strip()
+            if item.isdigit():
+                ids.append(int(item))
+        return ids
+    
+    def _ensure_loaded(self, post_id):
+        """未预取的文章逐篇经通用加载器读取"""
+        if post_id not in self._term_cache:
+            self.load_posts([post_id])
+    
+    def get_terms(self, post_id, taxonomy):
+        """获取文章在指定分类法下的项目名称"""
+        self._ensure_loaded(post_id)
+        return list(self._term_cache[post_id].get(taxonomy, []))
+    
+    def get_post_meta(self, post_id, meta_key):
+        """获取文章的postmeta值"""
+        self._ensure_loaded(post_id)
+        return self._meta_cache[post_id].get(meta_key) or ""
+    
+    def get_attachment_url(self, attachment_id):
+        """获取附件URL"""
+        try:
+            attachment_id = int(attachment_id)
+        except (TypeError, ValueError):
+            return ""
+        if attachment_id in self._attachment_cache:
+            return self._attachment_cache[attachment_id]
+        
+        # 查询出错时抛出，由调用方把文章记为失败，而不是输出缺少图片的front matter
+        attachment = self.resolve_attachments([attachment_id])[attachment_id]
+        return attachment[0] if attachment else ""
     
     def get_featured_image(self, post_id):
         """获取特色图片URL"""
-        try:
-            with self.connection.cursor(pymysql.cursors.DictCursor) as cursor:
-                # 获取特色图片ID
-                query = f"SELECT meta_value FROM {self.db_prefix}postmeta WHERE post_id = %s AND meta_key = '_thumbnail_id'"
-                cursor.execute(query, (post_id,))
-                result = cursor.fetchone()
-                
-                if result and result['meta_value']:
-                    thumbnail_id = result['meta_value']
-                    # 获取图片URL
-                    query = f"SELECT guid FROM {self.db_prefix}posts WHERE ID = %s"
-                    cursor.execute(query, (thumbnail_id,))
-                    img_result = cursor.fetchone()
-                    if img_result:
-                        return img_result['guid']
-        except pymysql.Error:
-            pass
+        thumbnail_id = self.get_post_meta(post_id, '_thumbnail_id')
+        if thumbnail_id:
+            return self.get_attachment_url(thumbnail_id)
         return ""
     
-    def get_product_metadata(self, post_id):
+    def get_product_data(self, post_id, featured_image=None):
         """获取产品元数据"""
-        metadata = ""
-        try:
-            with self.connection.cursor(pymysql.cursors.DictCursor) as cursor:
-                # 获取SKU
-                query = f"SELECT meta_value FROM {self.db_prefix}postmeta WHERE post_id = %s AND meta_key = '_sku'"
-                cursor.execute(query, (post_id,))
-                result = cursor.fetchone()
-                sku = result['meta_value'] if result else ""
-                metadata += f"sku: \"{self.escape_yaml_string(sku)}\"\n"
-                
-                # 获取产品分类
-                query = f"""
-                SELECT t.name 
-                FROM {self.db_prefix}terms t
-                JOIN {self.db_prefix}term_taxonomy tt ON t.term_id = tt.term_id
-                JOIN {self.db_prefix}term_relationships tr ON tt.term_taxonomy_id = tr.term_taxonomy_id
-                WHERE tr.object_id = %s AND tt.taxonomy = 'product_cat'
-                """
-                cursor.execute(query, (post_id,))
-                results = cursor.fetchall()
-                product_cats = [result['name'] for result in results]
-                
-                metadata += "product_categories:\n"
-                for cat in product_cats:
-                    metadata += f"- {self.escape_yaml_string(cat)}\n"
-                
-                # 获取产品标签
-                query = f"""
-                SELECT t.name 
-                FROM {self.db_prefix}terms t
-                JOIN {self.db_prefix}term_taxonomy tt ON t.term_id = tt.term_id
-                JOIN {self.db_prefix}term_relationships tr ON tt.term_taxonomy_id = tr.term_taxonomy_id
-                WHERE tr.object_id = %s AND tt.taxonomy = 'product_tag'
-                """
-                cursor.execute(query, (post_id,))
-                results = cursor.fetchall()
-                product_tags = [result['name'] for result in results]
-                
-                metadata += "product_tags:\n"
-                for tag in product_tags:
-                    metadata += f"- {self.escape_yaml_string(tag)}\n"
-                
-                # 获取购买链接
-                query = f"SELECT meta_value FROM {self.db_prefix}postmeta WHERE post_id = %s AND meta_key = '_buy_link'"
-                cursor.execute(query, (post_id,))
-                result = cursor.fetchone()
-                buy_link = result['meta_value'] if result else ""
-                
-                if buy_link:
-                    metadata += f"buy_link: {self.escape_yaml_string(buy_link)}\n"
-                
-                # 获取产品图片
-                query = f"SELECT meta_value FROM {self.db_prefix}postmeta WHERE post_id = %s AND meta_key = '_product_image_gallery'"
-                cursor.execute(query, (post_id,))
-                result = cursor.fetchone()
-                gallery_ids = result['meta_value'].split(',') if result and result['meta_value'] else []
-                
-                metadata += "images:\n"
-                
-                # 先添加特色图片
-                featured_image = self.get_featured_image(post_id)
-                if featured_image:
-                    metadata += f"- {featured_image}\n"
-                
-                # 再添加产品图库图片
-                for img_id in gallery_ids:
-                    if img_id:
-                        try:
-                            query = f"SELECT guid FROM {self.db_prefix}posts WHERE ID = %s"
-                            cursor.execute(query, (img_id,))
-                            img_result = cursor.fetchone()
-                            if img_result:
-                                metadata += f"- {img_result['guid']}\n"
-                        except pymysql.Error:
-                            pass
-                
-                # 获取产品简短描述
-                query = f"SELECT meta_value FROM {self.db_prefix}postmeta WHERE post_id = %s AND meta_key = '_short_description'"
-                cursor.execute(query, (post_id,))
-                result = cursor.fetchone()
-                short_description = result['meta_value'] if result else ""
-                
-                if short_description:
-                    escaped_description = self.escape_yaml_string(short_description)
-                    metadata += f"description: >\n  {escaped_description}\n"
-                
-        except pymysql.Error:
-            pass
+        # 先添加特色图片，再添加产品图库图片
+        if featured_image is None:
+            featured_image = self.get_featured_image(post_id)
+        images = [featured_image] if featured_image else []
+        for img_id in self.get_post_meta(post_id, '_product_image_gallery').split(','):
+            if img_id:
+                img_url = self.get_attachment_url(img_id)
+                if img_url:
+                    images.append(img_url)
         
-        return metadata
+        return {
+            'sku': self.get_post_meta(post_id, '_sku'),
+            'product_categories': self.get_terms(post_id, 'product_cat'),
+            'product_tags': self.get_terms(post_id, 'product_tag'),
+            'buy_link': self.get_post_meta(post_id, '_buy_link'),
+            'images': images,
+            'short_description': self.get_post_meta(post_id, '_short_description'),
+        }
     
-    def process_content(self, content):
-        """处理文章内容"""
-        # 这里可以添加更多内容处理逻辑
-        # 例如将WordPress的短代码转换为Markdown等
+    @staticmethod
+    def product_fields(product):
+        """产品元数据的front matter字段"""
+        fields = [
+            ('sku', product['sku']),
+            ('product_categories', product['product_categories']),
+            ('product_tags', product['product_tags']),
+        ]
+        if product['buy_link']:
+            fields.append(('buy_link', product['buy_link']))
+        fields.append(('images', product['images']))
+        if product['short_description']:
+            fields.append(('description', product['short_description']))
+        return fields
+    
+    @staticmethod
+    def process_content(content):
+        """处理文章内容：展开短代码，去掉Gutenberg区块标记并转换为Markdown"""
+        return html_to_markdown(content)
+
+# ---------------------------------------------------------------------------
+# WXR输入
+# ---------------------------------------------------------------------------
+
+def _split_tag(tag):
+    """把ElementTree的{命名空间}名称拆分为(命名空间, 名称)"""
+    if tag.startswith('{'):
+        namespace, _, name = tag[1:].partition('}')
+        return namespace, name
+    return '', tag
+
+
+class WxrExporter(WpToHugoExporter):
+    """从WordPress导出的WXR文件（工具 -> 导出）导出，不需要数据库
+    
+    WXR用iterparse流式解析，每个<item>处理完立即从树中移除，不会把整个文件读入内存。
+    第一遍扫描在流式解析中直接统计可导出的文章数、找到检查点的恢复位置，不保存item
+    列表；只保留已发布文章的ID到类型和附件ID到URL的映射，删除已取消发布的文章、
+    解析特色图片和产品图库时要按ID查找。这两个映射的大小与文章和附件数量成正比，
+    每项只是一个整数和一个短字符串。第二遍按批产出文章，分类、标签和postmeta直接
+    取自item。之后的组装、渲染和写入与数据库输入相同。文章按文件中的顺序导出，
+    检查点记录的是文件中最后提交的文章ID。
+    """
+    
+    input_errors = DB_ERRORS + (ElementTree.ParseError, OSError)
+    
+    def __init__(self, wp_root, wxr_file=None):
+        super().__init__(wp_root)
+        self.wxr_file = wxr_file
+        # 第一遍扫描的结果：已发布文章的类型、附件URL和附件页面，在文件中找到的检查点文章ID
+        self._published = {}
+        self._attachments = {}
+        self._attachment_pages = {}
+        self._resume_id = None
+        # 第二遍已读取、尚未交给组装阶段的分类和postmeta
+        self._pending = {}
+    
+    def iter_items(self):
+        """流式解析WXR文件，逐个产出item"""
+        channel = None
+        for event, elem in ElementTree.iterparse(self.wxr_file, events=('start', 'end')):
+            if event == 'start':
+                if channel is None and elem.tag == 'channel':
+                    channel = elem
+                continue
+            if elem.tag != 'item':
+                continue
+            item = self._parse_item(elem)
+            # 释放已处理的item，树中只保留当前正在解析的元素
+            elem.clear()
+            if channel is not None:
+                channel.remove(elem)
+            if item is not None:
+                yield item
+    
+    def _parse_item(self, elem):
+        """把<item>元素转换为与posts表列同名的字典，附带分类和postmeta"""
+        fields = {}
+        terms = {}
+        meta = {}
+        content = ''
+        for child in elem:
+            namespace, name = _split_tag(child.tag)
+            if name == 'category':
+                taxonomy = child.get('domain')
+                if taxonomy and child.text:
+                    terms.setdefault(taxonomy, []).append(child.text)
+            elif name == 'postmeta':
+                values = {_split_tag(node.tag)[1]: node.text or '' for node in child}
+                if values.get('meta_key') in REDIRECT_META_KEYS:
+                    meta.setdefault(values['meta_key'], []).append(values.get('meta_value', ''))
+                elif values.get('meta_key'):
+                    meta.setdefault(values['meta_key'], values.get('meta_value', ''))
+            elif name == 'encoded':
+                if namespace.endswith('/content/'):
+                    content = child.text or ''
+            else:
+                fields[name] = child.text or ''
         
-        # 简单地转义HTML实体
-        content = html.unescape(content)
+        if not fields.get('post_id', '').strip().isdigit():
+            return None
+        return {
+            'ID': int(fields['post_id']),
+            'post_type': fields.get('post_type', 'post'),
+            'post_status': fields.get('status', ''),
+            'post_title': fields.get('title', ''),
+            'post_name': fields.get('post_name', ''),
+            'post_date': fields.get('post_date', ''),
+            # 较早版本的WXR没有post_modified，用发布时间代替
+            'post_modified': fields.get('post_modified') or fields.get('post_date', ''),
+            'post_content': content,
+            'post_parent': int(fields['post_parent']) if fields.get('post_parent', '').strip().isdigit() else 0,
+            'post_author': 0,
+            'link': fields.get('link', ''),
+            'attachment_url': fields.get('attachment_url', ''),
+            'terms': terms,
+            'meta': meta,
+        }
+    
+    def scan(self, post_types=(), modified_since=None, after_id=0):
+        """第一遍扫描：统计可导出的文章，记录已发布的文章和附件URL
         
-        return content
+        返回(可导出的文章数, 检查点最后提交的文章之后可导出的文章数)，
+        after_id不在文件中时后者为None。
+        """
+        start = time.perf_counter()
+        published, attachments, attachment_pages = {}, {}, {}
+        total, after = 0, None
+        for item in self.iter_items():
+            if item['post_type'] == 'attachment':
+                attachments[item['ID']] = item['attachment_url']
+                if item['post_parent']:
+                    attachment_pages[item['ID']] = (self._link_path(item['link']), item['post_parent'])
+                continue
+            if item['post_status'] == 'publish':
+                published[item['ID']] = item['post_type']
+            matched = self._matches(item['ID'], item['post_type'], item['post_status'],
+                                    self._format_datetime(item['post_modified']), post_types, modified_since)
+            total += matched
+            if after is not None:
+                after += matched
+            elif after_id and item['ID'] == after_id:
+                after = 0
+        self._published, self._attachments = published, attachments
+        self._attachment_pages = attachment_pages
+        self._resume_id = after_id if after is not None else None
+        self.metrics.record_phase('scan', time.perf_counter() - start)
+        return total, after
     
-    def escape_yaml_string(self, string):
-        """转义YAML字符串"""
-        if not string:
-            return ""
+    def _matches(self, post_id, post_type, status, modified, post_types, modified_since):
+        """与数据库输入的_post_filter相同的筛选条件"""
+        if status != 'publish' or post_type not in post_types:
+            return False
+        if modified_since and modified < modified_since:
+            return False
+        if self.shard and post_id % self.shard[1] != self.shard[0] - 1:
+            return False
+        if self.id_range:
+            low, high = self.id_range
+            if (low is not None and post_id < low) or (high is not None and post_id > high):
+                return False
+        return True
+    
+    def count_posts(self, post_types, modified_since=None, after_id=0):
+        """扫描WXR文件并统计可导出的文章数量"""
+        total, after = self.scan(post_types, modified_since, after_id)
+        if not after_id:
+            return total
+        if after is None:
+            print(f"警告: 检查点中的文章 ID {after_id} 不在WXR文件中，从头导出")
+            return total
+        return after
+    
+    def iter_post_batches(self, post_types, modified_since=None, after_id=0):
+        """第二遍：按文件顺序流式产出符合条件的文章，每批最多batch_size篇
         
-        # 替换双引号
-        string = string.replace('"', '\\"')
+        检查点中的文章是否在文件中由之前count_posts的扫描确定；不在时与count_posts一样
+        从头导出，而不是跳过所有item。
+        """
+        skipping = bool(after_id) and self._resume_id == after_id
+        batch = []
+        for item in self.iter_items():
+            if item['post_type'] == 'attachment':
+                continue
+            if skipping:
+                # 从检查点恢复：跳过最后提交的文章及其之前的item
+                skipping = item['ID'] != after_id
+                continue
+            modified = self._format_datetime(item['post_modified'])
+            if not self._matches(item['ID'], item['post_type'], item['post_status'], modified,
+                                 post_types, modified_since):
+                continue
+            self._pending[item['ID']] = (item['terms'], item['meta'])
+            batch.append(dict({column: item[column] for column in EXPORT_COLUMNS}, link=item['link']))
+            if len(batch) >= self.batch_size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+    
+    def load_posts(self, post_ids):
+        """从第二遍读取的item中取分类和postmeta"""
+        taxonomies, meta_keys = self.loader_keys()
+        for post_id in post_ids:
+            terms, meta = self._pending.pop(post_id, ({}, {}))
+            self._term_cache[post_id] = {taxonomy: list(terms.get(taxonomy, [])) for taxonomy in taxonomies}
+            self._meta_cache[post_id] = {key: meta[key] for key in meta_keys if key in meta}
+    
+    def warm_lookups(self):
+        """WXR的附件URL在第一遍扫描时已全部读取，分类取自item本身，不需要预热"""
+    
+    def load_permalinks(self):
+        """WXR中没有永久链接设置，永久链接直接取自每个item的<link>"""
+        return PermalinkStructure()
+    
+    @staticmethod
+    def _link_path(link):
+        """<link>中的完整URL去掉协议和主机名"""
+        parts = urllib.parse.urlsplit(link or '')
+        return (parts.path or '/') + (f"?{parts.query}" if parts.query else '') if parts.netloc else None
+    
+    def post_permalinks(self, post):
+        """永久链接取自<link>（缺少时为/?p=ID），旧链接把末尾的slug换成各个_wp_old_slug"""
+        permalink = self._link_path(post.get('link')) or f"/?p={post['ID']}"
+        old_links = []
+        if (self.aliases or self.redirect_map) and '?' not in permalink:
+            self._ensure_loaded(post['ID'])
+            head, slash, tail = permalink.rstrip('/').rpartition('/')
+            if tail == post['post_name']:
+                trailing = '/' if permalink.endswith('/') else ''
+                for slug in self._meta_cache[post['ID']].get('_wp_old_slug') or []:
+                    link = f"{head}{slash}{slug}{trailing}"
+                    if slug and link != permalink and link not in old_links:
+                        old_links.append(link)
+        return permalink, old_links
+    
+    def attachment_pages(self, posts):
+        """附件页面的路径取自第一遍扫描时附件item的<link>"""
+        for attachment_id, (link, parent_id) in sorted(self._attachment_pages.items()):
+            if parent_id in posts:
+                yield attachment_id, link, parent_id
+    
+    def get_attachment_url(self, attachment_id):
+        """附件URL取自第一遍扫描"""
+        try:
+            return self._attachments.get(int(attachment_id), "")
+        except (TypeError, ValueError):
+            return ""
+    
+    def published_ids(self, post_ids, post_types):
+        return {post_id for post_id in post_ids if self._published.get(post_id) in post_types}
+    
+    def checkpoint_header(self, post_types, modified_since):
+        """检查点还要求WXR文件未变化"""
+        header = super().checkpoint_header(post_types, modified_since)
+        stat = os.stat(self.wxr_file)
+        header['wxr'] = [os.path.abspath(self.wxr_file), stat.st_size, stat.st_mtime_ns]
+        return header
+
+
+# ---------------------------------------------------------------------------
+# 常驻模式
+# ---------------------------------------------------------------------------
+
+class ExportWatcher:
+    """常驻模式：保持数据库连接和查找缓存，轮询变更签名，只导出变化的文章
+    
+    每轮先结束上一轮的快照事务，再用一个查询读取change_signature。签名变化时增量导出
+    post_modified更新的文章和新增了已配置postmeta的文章；给文章设置分类会更新post_modified，
+    新增分类项目只让预热的分类缓存不再是全集，不需要全量导出。原地更新postmeta、关闭修订
+    版本时的编辑等不改变签名的修改，由每resync_interval秒一次的增量导出兜底。有文件变化且指定了publish_url时，
+    在debounce秒内没有新变化后（最多推迟PUBLISH_MAX_DELAY倍）调用deploy.py的/publish。
+    """
+    
+    def __init__(self, exporter, post_type='any', interval=DEFAULT_WATCH_INTERVAL,
+                 resync_interval=DEFAULT_RESYNC_INTERVAL, publish_url=None, publish_password=None,
+                 debounce=DEFAULT_PUBLISH_DEBOUNCE, metrics_file=None):
+        self.exporter = exporter
+        self.post_type = post_type
+        self.interval = interval
+        self.resync_interval = resync_interval
+        self.publish_url = publish_url
+        self.publish_password = publish_password
+        self.debounce = debounce
+        self.metrics_file = metrics_file
+        self.stop_event = threading.Event()
+        self._signature = None
+        self._next_resync = 0
+        self._publish_due = None
+        self._publish_deadline = None
+    
+    def stop(self):
+        """当前这一轮结束后停止"""
+        self.stop_event.set()
+    
+    def run(self):
+        print(f"常驻模式: 每 {self.interval} 秒检查一次变更")
+        while not self.stop_event.is_set():
+            try:
+                if self.poll() and self.publish_url:
+                    self._schedule_publish()
+            except self.exporter.input_errors as e:
+                print(f"检查变更出错，{self.interval} 秒后重试: {e}")
+            if self._publish_due is not None and time.monotonic() >= self._publish_due:
+                self.publish()
+            self.stop_event.wait(self.interval)
+        if self._publish_due is not None:
+            # 停止前发布尚未发布的变化
+            self.publish()
+    
+    def poll(self):
+        """检查一次变更，需要时导出；返回是否有文件变化"""
+        exporter = self.exporter
+        exporter.db.renew()
+        signature = exporter.change_signature()
+        now = time.monotonic()
+        previous = self._signature
+        if signature == previous and now < self._next_resync:
+            return False
         
-        # 处理多行字符串
-        string = re.sub(r'\n', '\\n  ', string)
+        full = False
+        touched = set()
+        if previous is not None and signature['last_meta_id'] != previous['last_meta_id']:
+            touched = exporter.touched_posts(previous['last_meta_id'] or 0)
+            if len(touched) > exporter.batch_size:
+                # 批量导入等大量postmeta变化时直接全量导出
+                print("大量postmeta有变化，全量导出")
+                full, touched = True, set()
+        if previous is None or signature['last_id'] != previous['last_id']:
+            # 可能有新上传的附件，预热的附件缓存不再是全集，未命中的要查询
+            exporter.attachment_lookup.complete = False
+        if previous is None or signature['last_term_id'] != previous['last_term_id']:
+            # 新增的分类项目只影响设置了它的文章，这些文章的post_modified已经更新
+            exporter.term_lookup.complete = False
         
-        return string
+        exporter.incremental = not full
+        exporter.touched_ids = touched
+        try:
+            ok = exporter.export_content(self.post_type)
+        finally:
+            exporter.incremental = True
+            exporter.touched_ids = set()
+        if self.metrics_file:
+            exporter.metrics.write(self.metrics_file)
+        if not ok:
+            return False
+        self._signature = signature
+        self._next_resync = now + self.resync_interval
+        return bool(exporter.changes)
+    
+    def _schedule_publish(self):
+        now = time.monotonic()
+        if self._publish_deadline is None:
+            self._publish_deadline = now + self.debounce * PUBLISH_MAX_DELAY
+        self._publish_due = min(now + self.debounce, self._publish_deadline)
+    
+    def publish(self):
+        """调用deploy.py的/publish；失败时debounce秒后重试"""
+        separator = '&' if '?' in self.publish_url else '?'
+        url = self.publish_url + separator + urllib.parse.urlencode({'password': self.publish_password or ''})
+        try:
+            request = urllib.request.Request(url, data=b'', method='POST')
+            with urllib.request.urlopen(request, timeout=PUBLISH_TIMEOUT) as response:
+                result = json.loads(response.read().decode('utf-8') or '{}')
+        except (OSError, ValueError) as e:
+            print(f"触发发布失败，{self.debounce} 秒后重试: {e}")
+            self._publish_due = time.monotonic() + self.debounce
+            return False
+        print(f"已触发发布: 任务 {result.get('job_id')}{' (已合并到排队中的任务)' if result.get('coalesced') else ''}")
+        self._publish_due = self._publish_deadline = None
+        return True
+
+
+def write_file_if_changed(path, content, content_hash=None, known_hash=None):
+    """原子地写入文件，内容与现有文件相同时跳过
+    
+    返回'added'（新文件）、'modified'（内容变化）或False（内容相同，未写入）。
+    
+    known_hash是上次写入时记录的哈希，与新内容一致且文件大小相同时不再读取文件比较。
+    写入先落到同目录的临时文件再rename，中断时不会留下半个文件。
+    """
+    if content_hash is None:
+        content_hash = hashlib.sha1(content).hexdigest()
+    try:
+        size = os.path.getsize(path)
+    except OSError:
+        size = None
+    if size == len(content):
+        if known_hash is not None:
+            if known_hash == content_hash:
+                return False
+        else:
+            with open(path, 'rb') as f:
+                if hashlib.sha1(f.read()).hexdigest() == content_hash:
+                    return False
+    
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    try:
+        with open(tmp_path, 'wb') as f:
+            f.write(content)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    return 'added' if size is None else 'modified'
+
+
+def _render_job(data):
+    """渲染阶段任务，返回(内容, 错误, 耗时)；在进程池中执行时异常不会中断整批"""
+    timings = {}
+    start = time.perf_counter()
+    try:
+        md_content, error = WpToHugoExporter.render_post(data, timings), None
+    except Exception as e:
+        md_content, error = None, str(e)
+    timings['render'] = time.perf_counter() - start
+    return md_content, error, timings
+
+
+def parse_shard(value):
+    """解析--shard K/N（K从1开始）"""
+    match = re.match(r'^(\d+)/(\d+)$', value)
+    if not match or not 1 <= int(match.group(1)) <= int(match.group(2)):
+        raise argparse.ArgumentTypeError(f"分片格式应为K/N且1 <= K <= N: {value}")
+    return int(match.group(1)), int(match.group(2))
+
+
+def parse_id_range(value):
+    """解析--id-range MIN:MAX（包含两端，任一端可省略）"""
+    match = re.match(r'^(\d*):(\d*)$', value)
+    if not match or value == ':':
+        raise argparse.ArgumentTypeError(f"ID范围格式应为MIN:MAX: {value}")
+    low, high = (int(part) if part else None for part in match.groups())
+    if low is not None and high is not None and low > high:
+        raise argparse.ArgumentTypeError(f"ID范围的下限大于上限: {value}")
+    return low, high
+
 
 def main():
     """主函数"""
     parser = argparse.ArgumentParser(description='将WordPress内容导出为Hugo兼容的Markdown文件')
-    parser.add_argument('--wp-root', required=True, help='WordPress安装根目录')
-    parser.add_argument('--type', choices=['post', 'page', 'product', 'any'], default='any', 
-                        help='要导出的内容类型 (默认: any)')
+    parser.add_argument('--wp-root', help='WordPress安装根目录；使用--wxr时为输出根目录 (默认: 当前目录)')
+    parser.add_argument('--wxr', help='从WordPress导出的WXR文件读取内容，不连接数据库')
+    parser.add_argument('--type', default='any',
+                        help='要导出的内容类型: post、page、product、配置文件中的自定义类型或any (默认: any)')
+    parser.add_argument('--type-config',
+                        help='内容类型配置文件（JSON或YAML），定义自定义内容类型、分类法、postmeta和front matter字段')
+    parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE,
+                        help=f'每批读取和预取的文章数量 (默认: {DEFAULT_BATCH_SIZE})')
+    parser.add_argument('--no-prefetch', action='store_true',
+                        help='禁用批量预取，逐篇查询分类、元数据和附件')
+    parser.add_argument('--incremental', action='store_true',
+                        help='增量导出，只导出上次导出后修改过的内容')
+    parser.add_argument('--front-matter', choices=FRONT_MATTER_FORMATS, default=DEFAULT_FRONT_MATTER,
+                        help=f'front matter格式，Hugo解析json最快 (默认: {DEFAULT_FRONT_MATTER})')
+    parser.add_argument('--layout', choices=CONTENT_LAYOUTS, default=DEFAULT_LAYOUT,
+                        help='输出目录布局：flat全部放在类型目录下，date按年/月、hash按文件名哈希分子目录 (默认: flat)')
+    parser.add_argument('--url-template', default=DEFAULT_URL_TEMPLATE,
+                        help='页面公开URL的模板：非flat布局或非默认模板时写入front matter的url，也是别名和重定向的目标，'
+                             '可用:section :year :month :day :slug :name(文件名) :id '
+                             f'(默认: {DEFAULT_URL_TEMPLATE}，即Hugo按slug生成的URL)')
+    parser.add_argument('--aliases', action='store_true',
+                        help='把WordPress原永久链接和旧slug链接写入front matter的aliases')
+    parser.add_argument('--redirect-map', metavar='FILE',
+                        help='生成nginx map重定向表：WordPress原永久链接、旧slug链接、附件页面和?p=ID -> 新URL')
+    parser.add_argument('--bundle', action='store_true',
+                        help='导出为Hugo页面包({slug}/index.md)，并把引用的图片放进页面包')
+    parser.add_argument('--asset-workers', type=int, default=DEFAULT_ASSET_WORKERS,
+                        help=f'页面包模式下并发下载图片的线程数 (默认: {DEFAULT_ASSET_WORKERS})')
+    output_group = parser.add_mutually_exclusive_group()
+    output_group.add_argument('--quiet', action='store_true',
+                              help='不逐个输出导出的文件，只输出汇总和错误')
+    output_group.add_argument('--progress', action='store_true',
+                              help='用单行进度代替逐个文件的输出')
+    parser.add_argument('--metrics',
+                        help='导出结束后写出指标报告；.prom/.txt为Prometheus文本格式，其余为JSON')
+    parser.add_argument('--workers', type=int, default=1,
+                        help='并行渲染Markdown的进程数 (默认: 1，即串行)')
+    parser.add_argument('--shard', type=parse_shard,
+                        help='按ID取模分片导出，K/N表示N个分片中的第K个，多个进程或主机可以各导出一片')
+    parser.add_argument('--id-range', type=parse_id_range,
+                        help='只导出ID在MIN:MAX范围内（包含两端）的文章，任一端可省略')
+    parser.add_argument('--search-index', action='store_true',
+                        help='在内容目录旁生成static/search搜索索引和data/taxonomies分类法索引')
+    parser.add_argument('--watch', action='store_true',
+                        help='常驻模式：保持数据库连接和缓存，持续轮询并导出变化的文章')
+    parser.add_argument('--interval', type=float, default=DEFAULT_WATCH_INTERVAL,
+                        help=f'常驻模式的轮询间隔秒数 (默认: {DEFAULT_WATCH_INTERVAL})')
+    parser.add_argument('--resync-interval', type=float, default=DEFAULT_RESYNC_INTERVAL,
+                        help=f'常驻模式下即使签名未变也增量导出一次的间隔秒数 (默认: {DEFAULT_RESYNC_INTERVAL})')
+    parser.add_argument('--publish-url',
+                        help='常驻模式下有内容变化时调用的deploy.py发布地址，如http://localhost:5000/publish；'
+                             '密码取自环境变量PUBLISH_PASSWORD')
+    parser.add_argument('--publish-debounce', type=float, default=DEFAULT_PUBLISH_DEBOUNCE,
+                        help=f'最后一次变化后等待多少秒再发布 (默认: {DEFAULT_PUBLISH_DEBOUNCE})')
+    parser.add_argument('--warm-cache', action='store_true',
+                        help='导出前一次性读取全部附件URL和分类项目，之后不再逐批查询')
+    parser.add_argument('--query-timeout', type=int, default=DEFAULT_QUERY_TIMEOUT,
+                        help=f'每个查询的超时秒数，0表示不限制 (默认: {DEFAULT_QUERY_TIMEOUT})')
+    parser.add_argument('--db-retries', type=int, default=DEFAULT_DB_RETRIES,
+                        help=f'连接断开或查询超时时的重试次数 (默认: {DEFAULT_DB_RETRIES})')
+    parser.add_argument('--no-snapshot', action='store_true',
+                        help='不在只读一致性快照事务中读取')
     
     args = parser.parse_args()
+    if not args.wp_root and not args.wxr:
+        parser.error("需要指定--wp-root或--wxr")
+    if args.watch and args.wxr:
+        parser.error("--watch需要连接数据库，不能与--wxr同时使用")
+    if args.publish_url and not args.watch:
+        parser.error("--publish-url只能在--watch常驻模式下使用")
+    if args.wxr and not os.path.isfile(args.wxr):
+        print(f"错误: WXR文件不存在: {args.wxr}")
+        sys.exit(1)
     
     # 确保目录存在
-    wp_root = os.path.abspath(args.wp_root)
+    wp_root = os.path.abspath(args.wp_root or '.')
     if not os.path.exists(wp_root):
         print(f"错误: 指定的WordPress根目录不存在: {wp_root}")
         sys.exit(1)
@@ -408,22 +3688,93 @@ def main():
     print("WordPress到Hugo导出工具")
     print("=" * 50)
     
-    exporter = WpToHugoExporter(wp_root)
-    
-    # 读取配置
-    if not exporter.read_wp_config():
+    if args.wxr:
+        exporter = WxrExporter(wp_root, os.path.abspath(args.wxr))
+    else:
+        exporter = WpToHugoExporter(wp_root)
+    if args.type_config:
+        try:
+            exporter.type_config = load_type_config(args.type_config)
+        except (OSError, ValueError) as e:
+            print(f"错误: 无法读取内容类型配置: {e}")
+            sys.exit(1)
+    if args.search_index and (args.shard or args.id_range):
+        print("错误: --search-index需要完整的文章集合，不能与--shard或--id-range同时使用")
         sys.exit(1)
-    
-    # 连接数据库
-    if not exporter.connect_db():
+    if args.redirect_map and (args.shard or args.id_range):
+        print("错误: --redirect-map需要完整的文章集合，不能与--shard或--id-range同时使用")
+        sys.exit(1)
+    if args.type != 'any' and args.type not in exporter.type_config:
+        print(f"错误: 未配置的内容类型: {args.type}")
         sys.exit(1)
+    exporter.prefetch_enabled = not args.no_prefetch
+    exporter.batch_size = max(1, args.batch_size)
+    exporter.incremental = args.incremental
+    exporter.workers = max(1, args.workers)
+    exporter.bundle = args.bundle
+    exporter.front_matter = args.front_matter
+    exporter.layout = args.layout
+    exporter.url_template = args.url_template
+    exporter.aliases = args.aliases
+    exporter.redirect_map = args.redirect_map
+    exporter.search_index = args.search_index
+    exporter.shard = args.shard
+    exporter.id_range = args.id_range
+    exporter.warm_cache = args.warm_cache
+    exporter.query_timeout = max(0, args.query_timeout)
+    exporter.db_retries = max(0, args.db_retries)
+    exporter.snapshot = not args.no_snapshot
+    if exporter.slice_name():
+        # 每个分片使用自己的清单和检查点，多个分片可以同时导出
+        exporter.manifest_file = os.path.join(
+            exporter.base_export_dir, f"{os.path.splitext(MANIFEST_FILENAME)[0]}.{exporter.slice_name()}.json")
+    if args.quiet:
+        exporter.output_mode = 'quiet'
+    elif args.progress:
+        exporter.output_mode = 'progress'
+    exporter.assets.workers = max(1, args.asset_workers)
     
-    # 导出内容
-    exporter.export_content(args.type)
+    if args.wxr:
+        print(f"从WXR文件导出: {args.wxr}")
+    else:
+        # 读取配置
+        if not exporter.read_wp_config():
+            sys.exit(1)
+        
+        # 连接数据库
+        if not exporter.connect_db():
+            sys.exit(1)
+    
+    ok = True
+    if args.watch:
+        # 常驻模式：增量导出，直到收到SIGTERM或Ctrl+C
+        exporter.incremental = True
+        watcher = ExportWatcher(exporter, args.type, interval=max(0.1, args.interval),
+                                resync_interval=args.resync_interval, publish_url=args.publish_url,
+                                publish_password=os.environ.get('PUBLISH_PASSWORD'),
+                                debounce=max(0.0, args.publish_debounce), metrics_file=args.metrics)
+        signal.signal(signal.SIGTERM, lambda signum, frame: watcher.stop())
+        try:
+            watcher.run()
+        except KeyboardInterrupt:
+            print("常驻模式已中断")
+    else:
+        # 导出内容
+        ok = exporter.export_content(args.type)
+        
+        if args.metrics:
+            exporter.metrics.write(args.metrics)
+            print(f"指标报告已写入: {args.metrics}")
     
-    # 关闭数据库连接
-    exporter.connection.close()
-    print("数据库连接已关闭")
+    if not args.wxr:
+        # 关闭数据库连接
+        exporter.close_db()
+        print("数据库连接已关闭")
+    
+    if not ok or exporter.error_count:
+        # 导出中止或有文章导出失败时以非零状态退出，cron和部署脚本可以据此发现失败
+        sys.exit(1)
+
 
 if __name__ == "__main__":
     main()
@@ -15,6 +15,7 @@
 3. **智能文件组织**：根据内容类型将文件保存到对应的目录结构中
 4. **完整的元数据导出**：包括标题、日期、分类、标签、特色图片等信息
 5. **产品支持**：针对WooCommerce产品导出额外的元数据
+6. **HTML转Markdown**：去掉Gutenberg区块注释（`<!-- wp:... -->`），把标题、列表、链接、图片、代码块、引用和表格转换为Markdown（列表项内的段落、代码块和引用缩进到列表项内容所在的列）；普通文本中的`*`、`_`、`` ` ``、`[`、行首的`#`、`1.`、`-`等Markdown语法和`{{<`、`{{%`会被转义，按原文显示；`[caption]`、`[embed]`、`[video]`、`[audio]`等短代码通过`register_shortcode(name, handler)`注册表展开，处理函数的输出不转义，可以直接返回Markdown或Hugo短代码；未注册的短代码按原文保留
 
 ### 使用方法
 
@@ -34,6 +35,134 @@
    - 导出内容到wp-content/md/content目录
    - 显示导出进度和结果统计
 
+### 常用选项
+
+- `--batch-size N`：每批读取的文章数量（默认500）。文章按ID键集分页流式读取，只选择需要的列，内存占用与站点规模无关
+- `--no-prefetch`：禁用批量预取。默认情况下，脚本按批用`IN (...)`查询一次性加载分类、标签、postmeta和附件URL，导出每篇文章时不再产生额外的SQL查询
+- `--incremental`：增量导出。每次导出都会在`wp-content/md/.export-manifest.json`中记录每篇文章的`post_modified`、输出路径和内容哈希；增量模式下只查询上次导出后修改过的文章。无论是否增量，已取消发布或移入回收站的文章对应的Markdown文件都会被删除
+- `--workers N`：并行渲染的进程数（默认1）。大于1时导出按流水线运行：主进程流式读库并预取元数据，进程池并行渲染Markdown，独立的写线程按批写入文件
+- `--quiet` / `--progress`：不再逐个输出导出的文件；`--quiet`只输出汇总和错误，`--progress`在标准错误输出单行进度
+- `--metrics FILE`：导出结束后写出指标报告，包括SQL查询次数和耗时（含最慢的查询）、预取/组装/渲染/`process_content`/写文件各阶段耗时、写入字节数、按内容类型的写入/跳过/失败数量和吞吐量以及渲染最慢的文章。文件扩展名为`.prom`或`.txt`时使用Prometheus文本格式，否则为JSON
+- `--bundle`：导出为Hugo页面包（`{slug}/index.md`）。特色图片、产品图片和正文引用的图片会放进页面包，front matter和正文中的链接改写为相对文件名。`wp-content/uploads`中已有的文件直接复制，其余的由线程池并发下载（`--asset-workers N`，默认8）。资源按内容哈希保存在`wp-content/md/.assets`，再硬链接到各页面包，同一图片只获取一次。获取在读库阶段就开始，与渲染并行；写入文章时只把已放进页面包的资源改写为相对文件名，获取失败的资源保留原URL（页面包中已有上次放入的同名文件时沿用该文件），不会引用不存在的文件，之后不带`--incremental`的导出会再次尝试获取
+- `--front-matter yaml|toml|json`：front matter格式（默认yaml）。所有字符串都加双引号并按所选格式转义，标题中的反斜杠、冒号、引号、换行和开头的`-`、`#`、`[`等特殊字符都能被Hugo原样读回；日期输出为日期时间。Hugo解析JSON front matter最快，站点很大时可以选用。增量导出时如果格式与清单中记录的不同（包括升级前导出的旧文件），会自动全量导出一次
+- `--layout flat|date|hash`：输出目录布局（默认flat，全部文件在类型目录下）。`date`按发布日期放到`posts/YYYY/MM/`，`hash`按文件名的MD5前两位放到`posts/ab/`，文章数以十万计时每个目录的文件数保持在较小范围。非flat布局会在front matter中写入`url`（模板由`--url-template`指定，默认`/:section/:slug/`，即flat布局下Hugo按front matter中的`slug`生成的URL，可用`:section :year :month :day :slug :name :id`，其中`:name`是含日期前缀的文件名；flat布局下指定了非默认模板时同样写入`url`），切换布局时公开链接不会变化。文件路径或URL与另一篇文章冲突时（如同一天的同一slug，或不同日期的同一slug），后导出的文章在文件名和`slug`后都加`-{ID}`，Hugo生成的页面不会互相覆盖。切换布局后增量导出会自动全量导出一次，旧路径的文件和空目录会被删除。分片导出时各分片只检查自己写入的文件名
+- `--aliases`、`--redirect-map FILE`：保留WordPress的旧链接，前者写入front matter的`aliases`，后者生成nginx重定向表，见下文“永久链接与重定向”
+- `--shard K/N`、`--id-range MIN:MAX`：分片导出。`--shard`按`ID % N`把文章分成N片，只导出第K片（K从1开始）；`--id-range`只导出ID在范围内（包含两端，任一端可省略）的文章。多个进程或主机可以各自导出不相交的一片，每片使用自己的清单（如`.export-manifest.shard-3-of-8.json`），增量导出和删除已取消发布的文章也只针对本片。不能与`--search-index`同时使用
+- `--search-index`：导出时在内容目录旁生成搜索索引和分类法索引，主题可以直接使用，Hugo构建时不必再计算：
+  - `static/search/terms/{分片}.json`：倒排索引`{索引词: [文章ID]}`。索引词取自标题、分类、标签和去掉HTML与短代码后的正文，英文等按单词、中日韩文字按二元组切分；ASCII开头的词按首字符分片，其余按首字符所在的256个码位区块分片（如`u4e`）
+  - `static/search/docs/{ID // 1000}.json`：`{文章ID: [标题, 链接, 类型, 日期]}`
+  - `static/search/index.json`：分片列表和文章数量
+  - `data/taxonomies/categories.json`、`tags.json`：`{分类或标签: [文章ID]}`，模板中通过`.Site.Data.taxonomies`读取
+
+  每篇文章的索引词保存在清单旁的`.search-index-state.json`中。增量导出时只改写变化文章涉及的分片；索引状态不存在或已过期时自动全量导出一次
+- `--warm-cache`：导出前按ID分页一次性读取全部附件的URL和`_wp_attached_file`路径，以及已配置分类法的全部项目，之后解析特色图片、产品图库和分类时不再查询数据库。不预热时，附件和分类项目经跨文章共享的LRU缓存（各50000条）解析，只有缓存中没有的才查询；不存在的附件也会缓存。两个缓存的命中率在导出结束时输出，并写入`--metrics`报告（`caches`、`wp2hugo_cache_lookups_total`）。页面包模式下，URL与上传目录中的位置不一致（如站点迁移后guid仍是旧域名）的附件按`_wp_attached_file`直接从本地复制
+- `--query-timeout SECONDS`、`--db-retries N`：每个查询的超时（默认300秒，0表示不限制；MySQL使用`max_execution_time`，MariaDB使用`max_statement_time`，客户端读写超时也相应设置）和重试次数（默认3）。连接断开、查询超时、锁等待超时或查询被KILL时，丢弃出错的连接，等待1秒、2秒、4秒……后换一个新连接重试。导出的查询依次执行，只使用一个数据库连接，没有重连时整个导出读到同一个快照
+- `--no-snapshot`：默认每个数据库连接都在`START TRANSACTION WITH CONSISTENT SNAPSHOT, READ ONLY`只读快照事务中读取，导出期间站点上的修改不会让分类、postmeta和文章内容互相不一致；在繁忙的主库上长时间导出时，快照会推迟旧版本数据的清理，可以用此选项关闭
+
+重试、连接断开和最终失败的次数会在导出结束时汇总输出，并写入`--metrics`报告（`database`、`wp2hugo_db_events_total`）。重试后仍然失败的查询不会被忽略：读取文章列表失败时导出中止并保留检查点，读取某篇文章的分类、postmeta或附件失败时该文章记为失败，下次导出重试，不会输出缺少字段的front matter。
+
+导出过程中每写完一批都会在清单旁的检查点日志（如`.export-manifest.checkpoint.jsonl`）中追加一条记录，包含这一批最后的文章ID、清单条目和文件变更。导出因数据库超时、内存不足或进程重启中断后，以相同参数再次运行会从最后提交的ID之后继续，而不是从第一篇文章重新开始；导出成功后检查点被删除，参数不同时检查点被丢弃。
+
+内容与上次导出相同的文件不会被重写（比较清单中的内容哈希和文件大小），需要写入时先写临时文件再重命名，结束时会报告写入、跳过和删除的数量。导出中止或有文章导出失败时，进程以退出码1结束。
+
+### 常驻模式
+
+代替cron定时运行，`--watch`让导出工具常驻运行，数据库连接、清单和查找缓存在各轮之间保留：
+
+```
+PUBLISH_PASSWORD=... python3 wp_to_hugo_exporter.py --wp-root /wwwroot/youdomain.com/html --watch --quiet \
+    --publish-url http://localhost:5000/publish
+```
+
+- 每`--interval`秒（默认5）先结束上一轮的只读快照事务，再用一个查询读取变更签名：posts、postmeta和term_taxonomy的最大主键（新文章、保存时产生的修订版本、新增的postmeta和分类项目）。签名只读主键索引，不变时不会扫描posts表
+- 签名变化时增量导出：`post_modified`更新的文章，加上新增了已配置postmeta键的文章（即使`post_modified`没有变化）。给文章设置分类会更新`post_modified`，分类表的变化不会触发全量导出；一次新增大量postmeta（例如批量导入）时全量导出一次，只改写内容变化的文件
+- 原地修改postmeta、关闭修订版本后的编辑、重命名或删除分类等不改变签名的修改，由每`--resync-interval`秒（默认600）一次的增量导出兜底；重命名或删除分类后需要更新所有文章时，手动运行一次不带`--incremental`的导出
+- 指定`--publish-url`时，导出有文件变化后调用deploy.py的`/publish`（密码取自环境变量`PUBLISH_PASSWORD`）。`--publish-debounce`秒（默认30）内没有新变化才发布，持续有修改时最多推迟5倍的时间；调用失败时稍后重试。deploy.py此时应使用复制模式（`WORDPRESS_CONTENT_PATH`指向导出目录），而不是设置`WP_ROOT`再导出一次
+- 收到SIGTERM时完成当前这一轮、发布尚未发布的变化后退出；`--metrics`报告在每次导出后更新
+
+### 从WXR文件导出
+
+没有数据库时，可以直接从WordPress后台“工具 -> 导出”生成的WXR文件导出（不需要pymysql）：
+
+```
+python3 wp_to_hugo_exporter.py --wxr site.WordPress.2024-01-01.xml --wp-root /tmp/site --bundle
+```
+
+`--wp-root`此时只作为输出根目录（默认当前目录），结果同样写入`wp-content/md/content`。WXR文件用`iterparse`流式解析，每个`<item>`处理完立即释放，几GB的文件内存占用也保持不变：第一遍只记录文章的ID、类型、状态、修改时间和附件URL，第二遍按批读取文章，分类、标签和postmeta取自item本身，特色图片和产品图库通过第一遍记录的附件解析。之后的组装、渲染和写入与数据库输入完全相同，`--incremental`、`--shard`、`--bundle`、`--search-index`和检查点也都可以使用；WXR文件变化后旧的检查点会被丢弃。
+
+### 永久链接与重定向
+
+front matter中的`permalink`是文章在WordPress中的永久链接，与WordPress的`get_permalink`相同：开始导出时用一个查询从`wp_options`读取`permalink_structure`、`home`（子目录安装时作为路径前缀）、静态首页设置和WooCommerce的产品基础路径，文章按永久链接结构替换`%year%`、`%postname%`、`%category%`等标签（`%category%`取term_id最小的分类，前面加上父分类），页面按父页面的slug逐级组成路径，产品为`/{产品基础路径}/%postname%/`（默认`product`）；永久链接结构为空时是`/?p=ID`。Hugo中的新URL由`--url-template`决定（flat布局下同样适用）。
+
+- `--aliases`：把与新URL不同的原永久链接，以及由`_wp_old_slug`和`_wp_old_date`（WordPress修改slug或发布日期时记录）组合出的旧链接写入`aliases`，Hugo会为每个别名生成一个跳转页
+- `--redirect-map FILE`：生成nginx的`map`文件，把原永久链接、旧链接和附件页面（跳转到所属文章）映射到新URL，另一个`map`处理`?p=ID`、`?page_id=ID`和`?attachment_id=ID`。与当前某篇文章的永久链接相同的旧链接不会重定向，静态首页不会重定向
+
+旧slug、旧日期与分类、postmeta在同一个按批预取的查询中读取，不需要额外遍历全部文章；`%category%`所需的分类父子关系和`%author%`所需的用户只在用到时各读取一次。重定向表根据清单中记录的每篇文章的链接生成，增量导出时只有链接变化或文章被删除才重写文件；永久链接设置、`--url-template`或这两个选项变化后自动全量导出一次。`--redirect-map`不能与`--shard`、`--id-range`同时使用。从WXR文件导出时，永久链接取自每个item的`<link>`，旧链接把末尾的slug换成各个`_wp_old_slug`。
+
+在nginx的`http {}`中引入生成的文件，文章数很多时调大map的哈希表：
+
+```
+map_hash_max_size 262144;
+map_hash_bucket_size 256;
+include /wwwroot/youdomain.com/html/wp-content/md/redirects.map;
+```
+
+然后在站点的`server {}`中：
+
+```
+if ($wp_redirect) { return 301 $wp_redirect; }
+if ($wp_redirect_id) { return 301 $wp_redirect_id; }
+```
+
+使用重定向表时不需要再生成别名跳转页，可以不加`--aliases`，或在Hugo配置中设置`disableAliases = true`。
+
+### 自定义内容类型
+
+内置的post、page和product之外，可以用`--type-config FILE`指定内容类型配置文件（JSON；安装了PyYAML时也可以是`.yml`/`.yaml`），增加自定义内容类型和分类法，或覆盖内置类型：
+
+```
+{
+  "post_types": {
+    "event": {
+      "layout": "event",
+      "dir": "events",
+      "taxonomies": {"event_category": "categories", "post_tag": "tags", "venue": "venues"},
+      "meta": {"_event_start": "event_start", "_event_url": "event_url"}
+    },
+    "page": null
+  }
+}
+```
+
+- `layout`、`dir`：front matter中的layout和输出目录，默认都是类型名
+- `taxonomies`：分类法 -> front matter字段。映射到`categories`和`tags`的分类法使用原有格式，其他字段输出为列表；默认为`{"category": "categories", "post_tag": "tags"}`
+- `meta`：postmeta键 -> front matter字符串字段
+- `permalink`：该类型在WordPress中的永久链接结构（如`"/events/%postname%/"`，必须包含`%postname%`），用于front matter中的`permalink`、`--aliases`和`--redirect-map`；默认为`/{类型名}/%postname%/`
+- `woocommerce`：为`true`时输出SKU、产品分类、产品标签、购买链接、图库和简短描述等产品字段（内置product类型已开启）
+- 把内置类型设为`null`表示不导出该类型
+
+配置后`--type`也可以指定自定义类型。所有类型的分类法和postmeta都由同一个通用加载器读取：每个分块用一个查询读取全部已配置分类法的项目，一个查询读取全部postmeta键；`--no-prefetch`时同样的查询逐篇执行。
+
+### 基准测试
+
+`wp_to_hugo_benchmark.py`会生成合成的WordPress数据（文章、页面、带图库的WooCommerce产品、分类和标签），默认写入内嵌的SQLite替身数据库，也可以用`--mysql-host`等参数写入本地MariaDB/MySQL（只重建`wpbench_`前缀的表）。随后分别在空目录（cold）和内容未变化（warm）时导出，统计查询、组装、渲染、写文件各阶段耗时，以及deploy.py内容同步的耗时，以JSON输出：
+
+```
+python3 wp_to_hugo_benchmark.py --scale 1000,10000,100000 --workers 4 --output bench.json
+```
+
+加上`--wxr`时会把合成数据转储为WXR文件，再通过WXR输入导出；内嵌SQLite和WXR模式都不需要数据库服务器和pymysql。
+
+结果中记录了当前提交，便于比较不同提交的性能。
+
+### 测试
+
+`tests/`下是pytest测试，在仓库根目录运行（front matter往返测试需要PyYAML和Python 3.11起自带的`tomllib`，缺少时跳过）：
+
+```
+python3 -m pytest tests
+```
+
 ### 导出结果结构
 
 导出的Markdown文件将按照以下结构组织：
@@ -53,7 +182,7 @@ wp-content/
               └── ...
 ```
 
-每个Markdown文件都包含完整的YAML front matter和内容，与Hugo兼容。
+每个Markdown文件都包含完整的front matter（默认YAML，可用`--front-matter`选择TOML或JSON）和内容，与Hugo兼容。
 
 
 